@@ -0,0 +1,244 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from simulation import (
+    WIDTH, HEIGHT, MAX_SHOT_POWER, GOAL_TOP, GOAL_BOTTOM, BALL_RADIUS, PLAN_PENDING,
+    approach_point, encode_plan, decode_plan, shoot_planned, step_ball,
+)
+from shot_table import GOAL, OWN_GOAL
+from snapshots import snapshot, unpack_from
+
+# 射门规划：枚举 (球员, 角度, 力量) 候选，用真实物理把每一脚推演到球停或进球，
+# 按进球概率和留给对手的局面打分；在每回合的时间预算内尽量多推演，可分摊到多个进程
+# instant 不做推演，只查射门结果表（需要 table）
+DIFFICULTY_BUDGET = {"instant": 0.0, "easy": 0.005, "normal": 0.02, "hard": 0.05, "expert": 0.2}
+# 力量按优先级排列；候选里各力量轮流出现，预算只够推演前几十个候选时也覆盖整个力量范围
+POWERS = (15, 12, 10, 13.5, 8)
+GOAL_AIMS = 7
+SWEEP_ANGLES = 24
+# 同一候选的重复推演加入的执行误差，用来估计进球概率而不是只看一条理想轨迹
+ANGLE_JITTER = 0.03
+POWER_JITTER = 0.6
+MAX_ROLLOUT_FRAMES = 600
+LEAVE_WEIGHT = 0.3
+
+def clone_state(game_state):
+    gs = dict(game_state)
+    gs['players'] = [dict(p) for p in game_state['players']]
+    half = len(gs['players']) // 2
+    gs['players1'] = gs['players'][:half]
+    gs['players2'] = gs['players'][half:]
+    gs['balls'] = [dict(b) for b in game_state['balls']]
+    gs['ball'] = gs['balls'][next(i for i, b in enumerate(game_state['balls']) if b is game_state['ball'])]
+    gs['score'] = dict(game_state['score'])
+    return gs
+
+def candidate_shots(game_state, team_idx):
+    # 优先级从高到低：直接射门 -> 借上下边线反弹射门 -> 均匀扫一圈
+    ball = game_state['ball']
+    goal_x = WIDTH - 30 if team_idx == 1 else 30
+    angles = []
+    for k in range(GOAL_AIMS):
+        ty = GOAL_TOP + 15 + (GOAL_BOTTOM - GOAL_TOP - 30) * k / (GOAL_AIMS - 1)
+        angles.append(math.atan2(ty - ball["y"], goal_x - ball["x"]))
+    for wall_y in (50 + BALL_RADIUS, HEIGHT - 50 - BALL_RADIUS):
+        for k in range(0, GOAL_AIMS, 2):
+            ty = GOAL_TOP + 15 + (GOAL_BOTTOM - GOAL_TOP - 30) * k / (GOAL_AIMS - 1)
+            angles.append(math.atan2(2 * wall_y - ty - ball["y"], goal_x - ball["x"]))
+    angles += [2 * math.pi * k / SWEEP_ANGLES for k in range(SWEEP_ANGLES)]
+    team = game_state['players1'] if team_idx == 1 else game_state['players2']
+    # 每个角度交给走过去最近的球员；每一轮把所有角度按优先级过一遍，第 k 个角度用第 (k + 轮次) 档力量，
+    # 预算很小时也能先覆盖各个方向和各档力量，跑满 len(POWERS) 轮后每个 (角度, 力量) 恰好出现一次
+    shooters = []
+    for angle in angles:
+        tx, ty = approach_point(ball, angle)
+        shooters.append(min(range(len(team)), key=lambda i: math.hypot(team[i]["x"] - tx, team[i]["y"] - ty)))
+    return [encode_plan(player_idx, angle, POWERS[(k + r) % len(POWERS)])
+            for r in range(len(POWERS)) for k, (angle, player_idx) in enumerate(zip(angles, shooters))]
+
+def leave_value(x, y, team_idx):
+    # 球停下后轮到对手：球离我方球门越远、离对方球门越近越好，范围 [-1, 1]
+    own_x, opp_x = (0, WIDTH) if team_idx == 1 else (WIDTH, 0)
+    own = math.hypot(x - own_x, y - HEIGHT / 2)
+    opp = math.hypot(x - opp_x, y - HEIGHT / 2)
+    return (own - opp) / WIDTH
+
+def rollout(gs, base, team_idx, plan, rng=None):
+    # gs 为可随意改写的草稿局面，每次推演前从快照 base 原地恢复
+    # 返回 (结果, 价值)：结果 1 为进球，-1 为乌龙球，0 为未进
+    player_idx, angle, power = decode_plan(plan)
+    if rng is not None:
+        angle += rng.uniform(-ANGLE_JITTER, ANGLE_JITTER)
+        power = min(MAX_SHOT_POWER, max(1.0, power + rng.uniform(-POWER_JITTER, POWER_JITTER)))
+    unpack_from(gs, base)
+    team = gs['players1'] if team_idx == 1 else gs['players2']
+    team[player_idx]["x"], team[player_idx]["y"] = approach_point(gs['ball'], angle)
+    shoot_planned(gs, team_idx, player_idx, angle, power)
+    for _ in range(MAX_ROLLOUT_FRAMES):
+        ball_stopped, scored = step_ball(gs)
+        if scored:
+            outcome = 1 if gs['winner'] == team_idx else -1
+            return outcome, float(outcome)
+        if ball_stopped:
+            break
+    return 0, LEAVE_WEIGHT * leave_value(gs['ball']["x"], gs['ball']["y"], team_idx)
+
+def table_values(table, game_state, team_idx, candidates):
+    # 查射门结果表得到的估值，与 rollout 的价值同一尺度；表里没有的候选不在规划时现算，直接略过
+    # 开球后球员早已离开建表站位，这里只要近似值排顺序，不要求站位一致
+    values = {}
+    entries = table.lookup_many(game_state, team_idx, [decode_plan(plan) for plan in candidates],
+                                compute=False, exact=False)
+    for plan, entry in zip(candidates, entries):
+        if entry is None:
+            continue
+        outcome, _, _, rest_x, rest_y = entry
+        if outcome == GOAL:
+            values[plan] = 1.0
+        elif outcome == OWN_GOAL:
+            values[plan] = -1.0
+        else:
+            values[plan] = LEAVE_WEIGHT * leave_value(rest_x, rest_y, team_idx)
+    return values
+
+def rollouts(game_state, team_idx, candidates, seed, results):
+    # 按轮次推演：第 k 轮给每个候选做第 k 次推演，结果累加进 results；每推演一次 yield 一次，由调用方决定何时停
+    rng = random.Random(seed)
+    scratch = clone_state(game_state)
+    base = snapshot(game_state)
+    sample = 0
+    while True:
+        for plan in candidates:
+            outcome, value = rollout(scratch, base, team_idx, plan, rng if sample else None)
+            r = results[plan]
+            r[0] += 1
+            r[1] += outcome == 1
+            r[2] += value
+            yield
+        sample += 1
+
+def evaluate(game_state, team_idx, candidates, deadline, seed):
+    # 推演到 deadline，返回每个候选的累计结果
+    results = {plan: [0, 0, 0.0] for plan in candidates}
+    steps = rollouts(game_state, team_idx, candidates, seed, results)
+    while time.monotonic() < deadline:
+        next(steps)
+    return results
+
+
+class ShotPlanner:
+    # frame_budget 为 None 时 plan() 阻塞到整个预算用完；否则每次调用最多推演 frame_budget 秒，
+    # 没用完预算时返回 PLAN_PENDING，调用方下一帧以同一局面再调用（游戏主循环用它，规划不卡画面）
+    def __init__(self, difficulty="normal", workers=0, budget=None, seed=0, table=None, frame_budget=None):
+        self.difficulty = difficulty
+        self.table = table
+        self.budget = budget if budget is not None else DIFFICULTY_BUDGET[difficulty]
+        self.frame_budget = frame_budget
+        if workers is None:
+            workers = min(4, (os.cpu_count() or 1) - 1)
+        self.workers = max(0, workers)
+        self.seed = seed
+        self.pool = None
+        if self.workers:
+            self.pool = ProcessPoolExecutor(self.workers)
+            # 先把工作进程拉起来，避免第一回合的预算耗在启动上
+            wait([self.pool.submit(time.sleep, 0) for _ in range(self.workers)])
+        self.job = None
+        self.turns = 0
+        self.rollouts = 0
+        self.seconds = 0.0
+        self.last = None
+
+    def plan(self, game_state, team_idx):
+        start = time.monotonic()
+        key = (team_idx, snapshot(game_state).tobytes())
+        job = self.job
+        if job is None or job["key"] != key:
+            # 新回合，或者局面在分帧推演中途变了：重新开始
+            job = self.job = self._begin(game_state, team_idx, key, start)
+        if self.pool is None:
+            limit = job["left"] if self.frame_budget is None else min(job["left"], self.frame_budget)
+            deadline = start + limit
+            steps = job["steps"]
+            while time.monotonic() < deadline:
+                next(steps)
+            spent = time.monotonic() - start
+            job["left"] -= spent
+            job["seconds"] += spent
+            if job["left"] > 0:
+                return PLAN_PENDING
+        else:
+            # 工作进程各自按绝对截止时间停；分帧时只看是否都已完成，不等待
+            if self.frame_budget is not None and not all(f.done() for f in job["futures"]):
+                return PLAN_PENDING
+            for f in job["futures"]:
+                job["results"].update(f.result())
+            job["seconds"] = time.monotonic() - job["start"]
+        self.job = None
+        return self._finish(game_state, team_idx, job)
+
+    def _begin(self, game_state, team_idx, key, start):
+        candidates = candidate_shots(game_state, team_idx)
+        table_scores = {}
+        if self.table is not None:
+            # 有结果表时先按查表估值排序，预算内优先推演最有希望的候选；查不到的按 0 分保持原顺序
+            table_scores = table_values(self.table, game_state, team_idx, candidates)
+            candidates.sort(key=lambda plan: table_scores.get(plan, 0.0), reverse=True)
+        self.turns += 1
+        seed = self.seed * 1000003 + self.turns
+        job = {"key": key, "start": start, "left": self.budget, "seconds": 0.0,
+               "candidates": candidates, "table_scores": table_scores}
+        if self.pool is None:
+            job["results"] = {plan: [0, 0, 0.0] for plan in candidates}
+            job["steps"] = rollouts(game_state, team_idx, candidates, seed, job["results"])
+        else:
+            # 候选交错分给各进程，使每个进程都先算高优先级的候选
+            job["results"] = {}
+            job["futures"] = [self.pool.submit(evaluate, game_state, team_idx, candidates[i::self.workers],
+                                               start + self.budget, seed + i)
+                              for i in range(self.workers)]
+        return job
+
+    def _finish(self, game_state, team_idx, job):
+        results = job["results"]
+        table_scores = job["table_scores"]
+        best, best_score, total = None, -math.inf, 0
+        for plan, (n, goals, value) in results.items():
+            total += n
+            if n and value / n > best_score:
+                best, best_score = plan, value / n
+        if best is None and table_scores:
+            best = max(table_scores, key=table_scores.__getitem__)
+        elif best is None:
+            # 预算太小一次都没推演完：直接瞄准球门中间
+            ball = game_state['ball']
+            goal_x = WIDTH - 30 if team_idx == 1 else 30
+            angle = math.atan2(HEIGHT / 2 - ball["y"], goal_x - ball["x"])
+            best = encode_plan(job["candidates"][0][0], angle, MAX_SHOT_POWER)
+        elapsed = job["seconds"]
+        self.rollouts += total
+        self.seconds += elapsed
+        n, goals, value = results.get(best, (0, 0, 0.0))
+        self.last = {"plan": best, "rollouts": total, "seconds": elapsed,
+                     "goal_prob": goals / n if n else 0.0, "value": value / n if n else 0.0,
+                     "rollouts_per_sec": total / elapsed if elapsed else 0.0}
+        return best
+
+    def stats(self):
+        return {
+            "difficulty": self.difficulty,
+            "budget": self.budget,
+            "workers": self.workers,
+            "turns": self.turns,
+            "rollouts": self.rollouts,
+            "rollouts_per_sec": self.rollouts / self.seconds if self.seconds else 0.0,
+            "last": self.last,
+        }
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
@@ -0,0 +1,261 @@
+import math
+import os
+import sys
+
+import numpy as np
+
+from simulation import WIDTH, HEIGHT, HIT_DIST, MAX_SHOT_POWER, GOAL_TOP, GOAL_BOTTOM, FORMATION
+from shot_table import MISS, GOAL, OWN_GOAL
+
+# 比赛数据统计：球的位置热力图、球停下的位置、射门点/力量/结果、碰撞和控球
+# 全部累加在固定大小的 NumPy 数组里，逐帧原地加一，不分配新对象；
+# 多场比赛、多个进程的结果直接逐数组相加合并，存成 .npz，离线再画成图
+VERSION = 1
+CELL = 10
+NX = WIDTH // CELL
+NY = HEIGHT // CELL
+POWER_BINS = 15
+PER_TEAM = len(FORMATION) // 2
+OUTCOMES = ("miss", "goal", "own_goal")
+COUNTERS = ("matches", "turns", "shots", "wall_bounces", "player_touches")
+# 速度方向变化超过约 8 度算一次碰撞（摩擦只改变大小，不改变方向）
+TURN_COS = 0.99
+TOUCH_SLACK = 4
+
+def cell(x, y):
+    return min(NY - 1, max(0, int(y) // CELL)), min(NX - 1, max(0, int(x) // CELL))
+
+
+class MatchAnalytics:
+    ARRAYS = ("ball_heat", "rest_heat", "contact_heat", "shot_origin", "shot_power", "possession", "touches",
+              "counters")
+
+    def __init__(self):
+        self.ball_heat = np.zeros((NY, NX), np.uint32)
+        self.rest_heat = np.zeros((NY, NX), np.uint32)
+        # [0] 球碰到球员，[1] 球碰到边线
+        self.contact_heat = np.zeros((2, NY, NX), np.uint32)
+        # [队伍, 结果, y, x] / [队伍, 结果, 力量档]
+        self.shot_origin = np.zeros((2, len(OUTCOMES), NY, NX), np.uint32)
+        self.shot_power = np.zeros((2, len(OUTCOMES), POWER_BINS), np.uint32)
+        # 按最后触球的队伍计的运动帧数
+        self.possession = np.zeros(2, np.int64)
+        self.touches = np.zeros((2, PER_TEAM), np.int64)
+        self.counters = np.zeros(len(COUNTERS), np.int64)
+        self._counter = {name: i for i, name in enumerate(COUNTERS)}
+        self.pending = None
+        self.last_touch = 0
+        self.vx = self.vy = 0.0
+
+    def count(self, name, n=1):
+        self.counters[self._counter[name]] += n
+
+    def value(self, name):
+        return int(self.counters[self._counter[name]])
+
+    # ---- 比赛中的钩子（Simulator 调用） ----
+    def shot(self, game_state):
+        # 刚射出：球的位置就是射门点，力量由出球速度反推（kick_ball 的速度是力量的 1.5 倍）
+        if self.pending is not None:
+            self.turn_end(game_state)
+        ball = game_state['ball']
+        team = game_state['kicker'][0] if game_state['kicker'] else game_state['current_player']
+        power = math.hypot(ball["vx"], ball["vy"]) / 1.5
+        self.pending = (team, ball["x"], ball["y"], power)
+        self.last_touch = team
+        self.vx, self.vy = ball["vx"], ball["vy"]
+        self.count("shots")
+
+    def frame(self, game_state):
+        # 运动阶段每帧一次
+        ball = game_state['ball']
+        x, y, vx, vy = ball["x"], ball["y"], ball["vx"], ball["vy"]
+        cy, cx = cell(x, y)
+        self.ball_heat[cy, cx] += 1
+        if self.last_touch:
+            self.possession[self.last_touch - 1] += 1
+        pvx, pvy = self.vx, self.vy
+        self.vx, self.vy = vx, vy
+        dot = pvx * vx + pvy * vy
+        norm = math.hypot(pvx, pvy) * math.hypot(vx, vy)
+        if norm == 0 or dot >= TURN_COS * norm:
+            return
+        players = game_state['players']
+        half = len(players) // 2
+        for i, p in enumerate(players):
+            if math.hypot(p["x"] - x, p["y"] - y) <= HIT_DIST + TOUCH_SLACK:
+                team = 1 if i < half else 2
+                self.last_touch = team
+                # 按球员统计触球只对标准阵型有意义（其他人数的阵型号码对不上）
+                if len(players) == len(FORMATION):
+                    self.touches[team - 1, i - (team - 1) * half] += 1
+                self.contact_heat[0, cy, cx] += 1
+                self.count("player_touches")
+                return
+        self.contact_heat[1, cy, cx] += 1
+        self.count("wall_bounces")
+
+    def turn_end(self, game_state):
+        # 球停下或进球
+        ball = game_state['ball']
+        if self.pending is None:
+            return
+        team, x, y, power = self.pending
+        self.pending = None
+        winner = game_state['winner'] if game_state['game_state'] == "scored" else None
+        if winner is None:
+            outcome = MISS
+            cy, cx = cell(ball["x"], ball["y"])
+            self.rest_heat[cy, cx] += 1
+        else:
+            outcome = GOAL if winner == team else OWN_GOAL
+        cy, cx = cell(x, y)
+        self.shot_origin[team - 1, outcome, cy, cx] += 1
+        self.shot_power[team - 1, outcome, min(POWER_BINS - 1, int(power * POWER_BINS / MAX_SHOT_POWER))] += 1
+        self.count("turns")
+        self.last_touch = 0
+
+    def match_end(self):
+        self.pending = None
+        self.last_touch = 0
+        self.count("matches")
+
+    # ---- 合并与存取 ----
+    def merge(self, other):
+        for name in self.ARRAYS:
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if mine.shape != theirs.shape:
+                raise ValueError("analytics layout mismatch: " + name)
+            mine += theirs
+        return self
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, version=np.array([VERSION, CELL]), **{n: getattr(self, n) for n in self.ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        stats = cls()
+        with np.load(path) as data:
+            if tuple(data["version"]) != (VERSION, CELL):
+                raise ValueError("analytics file does not match this build: " + path)
+            for name in cls.ARRAYS:
+                getattr(stats, name)[...] = data[name]
+        return stats
+
+    def summary(self):
+        shots = self.shot_origin.sum(axis=(2, 3))
+        total = max(1, int(self.possession.sum()))
+        lines = [f"matches {self.value('matches')}  turns {self.value('turns')}  shots {self.value('shots')}  "
+                 f"moving frames {int(self.ball_heat.sum())}"]
+        for t in range(2):
+            n = int(shots[t].sum())
+            lines.append(f"team {t + 1}: shots {n}  goals {shots[t, GOAL]}  own goals {shots[t, OWN_GOAL]}  "
+                         f"conversion {shots[t, GOAL] / n if n else 0.0:.1%}  possession {self.possession[t] / total:.1%}  "
+                         f"touches {self.touches[t].tolist()}")
+        lines.append(f"player touches {self.value('player_touches')}  wall bounces {self.value('wall_bounces')}")
+        return "\n".join(lines)
+
+
+def merge_files(paths):
+    stats = MatchAnalytics()
+    for path in paths:
+        stats.merge(MatchAnalytics.load(path))
+    return stats
+
+# ---- 离线出图（pygame 无窗口绘制） ----
+OUTCOME_COLORS = ((200, 200, 200), (60, 230, 90), (255, 70, 70))
+
+def heat_colors(counts):
+    # 对数刻度：黑 -> 红 -> 黄 -> 白
+    v = np.log1p(counts.astype(np.float64))
+    v = v / v.max() if v.max() > 0 else v
+    rgb = np.empty(counts.shape + (3,), np.uint8)
+    rgb[..., 0] = np.clip(v * 3, 0, 1) * 255
+    rgb[..., 1] = np.clip(v * 3 - 1, 0, 1) * 255
+    rgb[..., 2] = np.clip(v * 3 - 2, 0, 1) * 255
+    return rgb
+
+def field_lines(pygame, surf):
+    white = (255, 255, 255)
+    pygame.draw.rect(surf, white, (50, 50, WIDTH - 100, HEIGHT - 100), 1)
+    pygame.draw.line(surf, white, (WIDTH // 2, 50), (WIDTH // 2, HEIGHT - 50))
+    pygame.draw.circle(surf, white, (WIDTH // 2, HEIGHT // 2), 70, 1)
+    for x in (30, WIDTH - 30):
+        pygame.draw.line(surf, white, (x, GOAL_TOP), (x, GOAL_BOTTOM), 3)
+
+def heat_surface(pygame, counts, title, font):
+    surf = pygame.transform.scale(pygame.surfarray.make_surface(heat_colors(counts).swapaxes(0, 1)), (WIDTH, HEIGHT))
+    field_lines(pygame, surf)
+    surf.blit(font.render(f"{title}  (n={int(counts.sum())})", True, (255, 255, 255)), (8, 8))
+    return surf
+
+def shot_map_surface(pygame, stats, font):
+    surf = pygame.Surface((WIDTH, HEIGHT))
+    surf.fill((20, 90, 35))
+    field_lines(pygame, surf)
+    origins = stats.shot_origin.sum(axis=0)
+    peak = max(1, int(origins.max()))
+    # 先画未进的，进球画在最上面
+    for outcome in (MISS, OWN_GOAL, GOAL):
+        for cy, cx in zip(*np.nonzero(origins[outcome])):
+            r = 2 + int(6 * math.sqrt(origins[outcome, cy, cx] / peak))
+            pygame.draw.circle(surf, OUTCOME_COLORS[outcome], (cx * CELL + CELL // 2, cy * CELL + CELL // 2), r)
+    for i, name in enumerate(OUTCOMES):
+        surf.blit(font.render(f"{name} {int(origins[i].sum())}", True, OUTCOME_COLORS[i]), (8, 8 + 20 * i))
+    return surf
+
+def power_surface(pygame, stats, font):
+    surf = pygame.Surface((WIDTH, HEIGHT // 2))
+    surf.fill((25, 25, 30))
+    hist = stats.shot_power.sum(axis=0)
+    peak = max(1, int(hist.sum(axis=0).max()))
+    bar_w = (WIDTH - 80) // POWER_BINS
+    base = HEIGHT // 2 - 30
+    for b in range(POWER_BINS):
+        top = base
+        for outcome in (MISS, OWN_GOAL, GOAL):
+            h = int(hist[outcome, b] * (base - 40) / peak)
+            pygame.draw.rect(surf, OUTCOME_COLORS[outcome], (40 + b * bar_w, top - h, bar_w - 4, h))
+            top -= h
+        label = font.render(f"{(b + 1) * MAX_SHOT_POWER / POWER_BINS:g}", True, (200, 200, 200))
+        surf.blit(label, (40 + b * bar_w, base + 6))
+    surf.blit(font.render("shot power by outcome", True, (255, 255, 255)), (8, 8))
+    return surf
+
+def render(stats, out_dir):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.font.init()
+    font = pygame.font.Font(None, 22)
+    os.makedirs(out_dir, exist_ok=True)
+    images = {
+        "ball_heatmap.png": heat_surface(pygame, stats.ball_heat, "ball position", font),
+        "rest_heatmap.png": heat_surface(pygame, stats.rest_heat, "ball at rest", font),
+        "contact_heatmap.png": heat_surface(pygame, stats.contact_heat[0], "player contacts", font),
+        "shot_map.png": shot_map_surface(pygame, stats, font),
+        "shot_power.png": power_surface(pygame, stats, font),
+    }
+    paths = []
+    for name, surf in images.items():
+        path = os.path.join(out_dir, name)
+        pygame.image.save(surf, path)
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    # python analytics.py summary FILE...
+    # python analytics.py merge OUT FILE...
+    # python analytics.py render OUT_DIR FILE...
+    if len(sys.argv) < 3 or sys.argv[1] not in ("summary", "merge", "render"):
+        print("usage: python analytics.py summary FILE... | merge OUT FILE... | render OUT_DIR FILE...")
+        sys.exit(1)
+    command = sys.argv[1]
+    if command == "summary":
+        print(merge_files(sys.argv[2:]).summary())
+    elif command == "merge":
+        merge_files(sys.argv[3:]).save(sys.argv[2])
+    else:
+        print("\n".join(render(merge_files(sys.argv[3:]), sys.argv[2])))
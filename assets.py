@@ -0,0 +1,122 @@
+import os
+import struct
+import sys
+
+import pygame
+
+# 资源管理：字体和图片第一次用到时才加载，相同请求只加载一次
+# 缩放并 convert 过的图片另存一份原始像素到磁盘，下次启动直接读像素，省去 JPEG 解码和缩放
+# 打包后（PyInstaller）资源在 sys._MEIPASS 下，开发时在本文件所在目录
+CACHE_MAGIC = b"SCAC"
+# 魔数, 宽, 高, 源文件 mtime, 源文件大小, 是否带 alpha
+CACHE_HEADER = struct.Struct("<4sIIdQB")
+
+def resource_dir():
+    return getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+
+def display_format(surf, alpha=False):
+    # 转成显示格式以加快 blit；纹理渲染后端没有 set_mode 出来的显示 Surface，保持原样，上传纹理时由 SDL 转换
+    if pygame.display.get_surface() is None:
+        return surf
+    return surf.convert_alpha() if alpha else surf.convert()
+
+
+class AssetManager:
+    def __init__(self, base_dir=None, cache_dir=None):
+        self.base_dir = base_dir or resource_dir()
+        # 缓存目录为 None 时不落盘
+        self.cache_dir = cache_dir
+        self.fonts = {}
+        self.images = {}
+        self.loads = 0
+        self.disk_hits = 0
+
+    def path(self, name):
+        # 先找资源目录，再找当前目录（兼容从别处启动时把图片放在工作目录的用法）
+        for base in (self.base_dir, os.getcwd()):
+            path = os.path.join(base, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def font(self, name, size, bold=False, italic=False):
+        # name 为 None 时用 pygame 自带字体；系统字体的查找会扫描字体缓存，同一字体只查一次
+        key = (name, size, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            if name is None:
+                font = pygame.font.Font(None, size)
+            else:
+                font = pygame.font.SysFont(name, size, bold=bold, italic=italic)
+            self.fonts[key] = font
+        return font
+
+    def image(self, name, size=None, alpha=False):
+        # 返回已 convert 的 Surface；文件不存在或加载失败时返回 None 并打印一次原因
+        key = (name, size, alpha)
+        if key in self.images:
+            return self.images[key]
+        surf = None
+        path = self.path(name)
+        try:
+            if path is None:
+                raise FileNotFoundError(f"No file '{name}' found in {self.base_dir}")
+            surf = self._load_cached(path, size, alpha)
+            if surf is None:
+                surf = pygame.image.load(path)
+                surf = display_format(surf, alpha)
+                if size is not None and surf.get_size() != tuple(size):
+                    surf = pygame.transform.scale(surf, size)
+                self.loads += 1
+                self._store_cached(path, size, surf, alpha)
+        except (pygame.error, OSError) as e:
+            surf = None
+            print(f"Image {name} not found or failed to load:", e)
+        self.images[key] = surf
+        return surf
+
+    def _cache_path(self, path, size, alpha):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        w, h = size if size is not None else (0, 0)
+        return os.path.join(self.cache_dir, f"{stem}-{w}x{h}{'-a' if alpha else ''}.px")
+
+    def _load_cached(self, path, size, alpha):
+        if self.cache_dir is None:
+            return None
+        cache_path = self._cache_path(path, size, alpha)
+        try:
+            with open(cache_path, "rb") as f:
+                magic, w, h, mtime, src_size, has_alpha = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+                st = os.stat(path)
+                # 源图片改过就作废
+                if magic != CACHE_MAGIC or mtime != st.st_mtime or src_size != st.st_size or has_alpha != alpha:
+                    return None
+                pixels = f.read()
+            fmt = "RGBA" if alpha else "RGB"
+            surf = pygame.image.frombytes(pixels, (w, h), fmt)
+        except (OSError, struct.error, ValueError, pygame.error):
+            return None
+        self.disk_hits += 1
+        return display_format(surf, alpha)
+
+    def _store_cached(self, path, size, surf, alpha):
+        if self.cache_dir is None:
+            return
+        cache_path = self._cache_path(path, size, alpha)
+        tmp = cache_path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            st = os.stat(path)
+            with open(tmp, "wb") as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, *surf.get_size(), st.st_mtime, st.st_size, alpha))
+                f.write(pygame.image.tobytes(surf, "RGBA" if alpha else "RGB"))
+            os.replace(tmp, cache_path)
+        except OSError:
+            # 缓存只是加速，写不进去就算了
+            pass
+
+    def clear(self):
+        self.images.clear()
+
+    def stats(self):
+        return {"fonts": len(self.fonts), "images": len(self.images), "loads": self.loads, "disk_hits": self.disk_hits}
@@ -0,0 +1,299 @@
+import numpy as np
+
+from simulation import (
+    WIDTH, HEIGHT, BALL_RADIUS, FRICTION, GOAL_TOP, GOAL_BOTTOM, HIT_DIST, SWEEP_SPEED, MAX_SWEEP_EVENTS,
+    init_game,
+)
+
+# 批量物理：N 场互不相关的比赛以结构数组 (SoA) 存放，一次 step 推进全部
+# 逐帧语义与 simulation.step_ball 一致：慢球走 移动 -> 碰撞 -> 边界 -> 进球判定，
+# 快球走 sweep_ball 的扫掠碰撞（按时间顺序处理球员、边线、球门线），射门球员在球离开身体前不参与碰撞
+# 浮点运算顺序与单场版本相同；math.hypot 与 np.hypot 末位可能不同，多次碰撞后轨迹允许有极小偏差
+RESTING, MOVING, SCORED = 0, 1, 2
+NO_KICKER = -1
+# sweep 中的事件编号
+NONE, PLAYER, WALL_Y, WALL_X, GOAL_LINE = range(5)
+
+
+class BatchSimulator:
+    def __init__(self, n, game_state=None):
+        self.n = n
+        self.ball_x = np.zeros(n)
+        self.ball_y = np.zeros(n)
+        self.ball_vx = np.zeros(n)
+        self.ball_vy = np.zeros(n)
+        # 球员坐标: (N, 6)，前 3 列为 players1，后 3 列为 players2
+        self.player_x = np.zeros((n, 6))
+        self.player_y = np.zeros((n, 6))
+        # 射门球员的列号，NO_KICKER 表示没有
+        self.kicker = np.full(n, NO_KICKER, dtype=np.int8)
+        self.status = np.full(n, RESTING, dtype=np.int8)
+        self.winner = np.zeros(n, dtype=np.int8)
+        self.score1 = np.zeros(n, dtype=np.int32)
+        self.score2 = np.zeros(n, dtype=np.int32)
+        self.frames = np.zeros(n, dtype=np.int32)
+        self.load_state(game_state if game_state is not None else init_game())
+
+    def load_state(self, game_state, idx=slice(None)):
+        # 将 dict 形式的局面写入一条或全部槽位
+        players = game_state['players']
+        ball = game_state['ball']
+        kicker = game_state.get('kicker')
+        self.ball_x[idx] = ball["x"]
+        self.ball_y[idx] = ball["y"]
+        self.ball_vx[idx] = ball["vx"]
+        self.ball_vy[idx] = ball["vy"]
+        self.player_x[idx] = [p["x"] for p in players]
+        self.player_y[idx] = [p["y"] for p in players]
+        self.kicker[idx] = NO_KICKER if kicker is None else (kicker[0] - 1) * 3 + kicker[1]
+        self.status[idx] = MOVING if game_state['game_state'] == "moving" else RESTING
+        self.winner[idx] = 0
+        self.score1[idx] = game_state['score']["player1"]
+        self.score2[idx] = game_state['score']["player2"]
+        self.frames[idx] = 0
+
+    def to_state(self, i):
+        gs = init_game()
+        for j, p in enumerate(gs['players']):
+            p["x"] = float(self.player_x[i, j])
+            p["y"] = float(self.player_y[i, j])
+        gs['ball'].update({"x": float(self.ball_x[i]), "y": float(self.ball_y[i]),
+                           "vx": float(self.ball_vx[i]), "vy": float(self.ball_vy[i])})
+        gs['score'] = {"player1": int(self.score1[i]), "player2": int(self.score2[i])}
+        if self.kicker[i] != NO_KICKER:
+            gs['kicker'] = (int(self.kicker[i]) // 3 + 1, int(self.kicker[i]) % 3)
+        if self.status[i] == MOVING:
+            gs['game_state'] = "moving"
+        elif self.status[i] == SCORED:
+            gs['game_state'] = "scored"
+            gs['winner'] = int(self.winner[i])
+        return gs
+
+    def shoot(self, vx, vy, idx=slice(None), kicker=NO_KICKER):
+        self.ball_vx[idx] = vx
+        self.ball_vy[idx] = vy
+        self.kicker[idx] = kicker
+        self.status[idx] = MOVING
+        self.winner[idx] = 0
+
+    def shoot_polar(self, angle, power, idx=slice(None), kicker=NO_KICKER):
+        # 与 kick_ball 相同的力量换算：速度 = power * 1.5
+        speed = np.asarray(power) * 1.5
+        self.shoot(np.cos(angle) * speed, np.sin(angle) * speed, idx, kicker)
+
+    def step(self):
+        moving = self.status == MOVING
+        if not moving.any():
+            return moving
+        bx, by, vx, vy = self.ball_x, self.ball_y, self.ball_vx, self.ball_vy
+        fast = moving & (np.hypot(vx, vy) > SWEEP_SPEED)
+        slow = moving & ~fast
+        stopped = np.zeros(self.n, bool)
+        swept_goal = np.zeros(self.n, bool)
+        if slow.any():
+            nx, ny, nvx, nvy, slow_stopped = self._discrete()
+            np.copyto(bx, nx, where=slow)
+            np.copyto(by, ny, where=slow)
+            np.copyto(vx, nvx, where=slow)
+            np.copyto(vy, nvy, where=slow)
+            stopped |= slow & slow_stopped
+            self._release_kicker(slow)
+        if fast.any():
+            rows = np.flatnonzero(fast)
+            swept_goal[rows] = self._sweep(rows)
+            self._release_kicker(fast)
+            # 未进球的快球：摩擦、停球判定、边界（与 integrate_ball 相同顺序）
+            rest = fast & ~swept_goal
+            nvx = vx * FRICTION
+            nvy = vy * FRICTION
+            fast_stopped = (np.abs(nvx) < 0.1) & (np.abs(nvy) < 0.1)
+            nvx[fast_stopped] = 0.0
+            nvy[fast_stopped] = 0.0
+            np.copyto(vx, nvx, where=rest)
+            np.copyto(vy, nvy, where=rest)
+            stopped |= rest & fast_stopped
+            nx, ny, nvx, nvy = boundary(bx, by, vx, vy)
+            np.copyto(bx, nx, where=rest)
+            np.copyto(by, ny, where=rest)
+            np.copyto(vx, nvx, where=rest)
+            np.copyto(vy, nvy, where=rest)
+
+        # check_goal
+        in_goal_y = (GOAL_TOP < by) & (by < GOAL_BOTTOM)
+        goal2 = moving & (bx - BALL_RADIUS < 30) & in_goal_y
+        goal1 = moving & ~goal2 & (bx + BALL_RADIUS > WIDTH - 30) & in_goal_y
+
+        self.frames += moving
+        self.score1 += goal1
+        self.score2 += goal2
+        self.winner[goal1] = 1
+        self.winner[goal2] = 2
+        scored = goal1 | goal2
+        self.status[moving & stopped & ~scored] = RESTING
+        self.status[scored] = SCORED
+        return moving
+
+    def _discrete(self):
+        # move_ball + handle_collisions + handle_boundary，对全部槽位计算，由调用方按慢球掩码写回
+        bx, by, vx, vy = self.ball_x, self.ball_y, self.ball_vx, self.ball_vy
+        nx = bx + vx
+        ny = by + vy
+        nvx = vx * FRICTION
+        nvy = vy * FRICTION
+        stopped = (np.abs(nvx) < 0.1) & (np.abs(nvy) < 0.1)
+        nvx[stopped] = 0.0
+        nvy[stopped] = 0.0
+
+        # handle_collisions：按球员顺序依次处理，每名球员对 N 场同时判定；跳过射门球员
+        for j in range(6):
+            dx = nx - self.player_x[:, j]
+            dy = ny - self.player_y[:, j]
+            dist = np.hypot(dx, dy)
+            hit = (dist < HIT_DIST) & (self.kicker != j)
+            if not hit.any():
+                continue
+            safe = np.where(dist > 0, dist, 1.0)
+            cos_a = np.where(dist > 0, dx / safe, 1.0)
+            sin_a = np.where(dist > 0, dy / safe, 0.0)
+            overlap = HIT_DIST - dist + 1
+            speed = np.hypot(nvx, nvy) * 0.9 + 2.0
+            nx = np.where(hit, nx + cos_a * overlap, nx)
+            ny = np.where(hit, ny + sin_a * overlap, ny)
+            nvx = np.where(hit, speed * cos_a, nvx)
+            nvy = np.where(hit, speed * sin_a, nvy)
+
+        nx, ny, nvx, nvy = boundary(nx, ny, nvx, nvy)
+        return nx, ny, nvx, nvy, stopped
+
+    def _sweep(self, rows):
+        # sweep_ball 的向量化版本：对 rows 这些快球逐个事件推进，每轮所有场次各处理自己的最早事件
+        # 返回 rows 中越过球门线的掩码
+        bx, by = self.ball_x[rows], self.ball_y[rows]
+        vx, vy = self.ball_vx[rows], self.ball_vy[rows]
+        px, py = self.player_x[rows], self.player_y[rows]
+        m = len(rows)
+        local = np.arange(m)
+        # 本帧已碰过的球员和射门球员不再参与碰撞
+        excluded = np.zeros((m, 6), bool)
+        kicker = self.kicker[rows]
+        has_kicker = kicker != NO_KICKER
+        excluded[local[has_kicker], kicker[has_kicker]] = True
+        remaining = np.ones(m)
+        active = np.ones(m, bool)
+        goal = np.zeros(m, bool)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for _ in range(MAX_SWEEP_EVENTS):
+                best = remaining.copy()
+                event = np.full(m, NONE, np.int8)
+                target = np.zeros(m)
+                hit_player = np.zeros(m, np.intp)
+                a = vx * vx + vy * vy
+                # time_of_impact：与单场版本相同的判定顺序，相等时后判定的事件优先
+                for j in range(6):
+                    rx, ry = bx - px[:, j], by - py[:, j]
+                    half_b = rx * vx + ry * vy
+                    c = rx * rx + ry * ry - HIT_DIST * HIT_DIST
+                    disc = half_b * half_b - a * c
+                    t = np.where(c < 0, 0.0, (-half_b - np.sqrt(np.maximum(disc, 0.0))) / a)
+                    upd = (half_b < 0) & ~excluded[:, j] & ((c < 0) | (disc >= 0)) & (t <= best)
+                    best = np.where(upd, t, best)
+                    event[upd] = PLAYER
+                    hit_player[upd] = j
+                wall_y = np.where(vy < 0, 50 + BALL_RADIUS, HEIGHT - 50 - BALL_RADIUS)
+                t = np.maximum(0.0, (wall_y - by) / vy)
+                upd = (vy != 0) & (t <= best)
+                best = np.where(upd, t, best)
+                event[upd] = WALL_Y
+                target = np.where(upd, wall_y, target)
+                wall_x = np.where(vx < 0, 50 + BALL_RADIUS, WIDTH - 50 - BALL_RADIUS)
+                goal_x = np.where(vx < 0, 30 + BALL_RADIUS, WIDTH - 30 - BALL_RADIUS)
+                t = np.maximum(0.0, (wall_x - bx) / vx)
+                reach = (vx != 0) & (t <= best)
+                y_at = by + vy * t
+                mouth = (GOAL_TOP - BALL_RADIUS < y_at) & (y_at < GOAL_BOTTOM + BALL_RADIUS)
+                upd = reach & ~mouth
+                best = np.where(upd, t, best)
+                event[upd] = WALL_X
+                target = np.where(upd, wall_x, target)
+                t = np.maximum(0.0, (goal_x - bx) / vx)
+                y_at = by + vy * t
+                upd = reach & mouth & (t <= best) & (GOAL_TOP < y_at) & (y_at < GOAL_BOTTOM)
+                best = np.where(upd, t, best)
+                event[upd] = GOAL_LINE
+                target = np.where(upd, goal_x, target)
+
+                event[~active] = NONE
+                t = np.where(active, best, 0.0)
+                bx = bx + vx * t
+                by = by + vy * t
+                remaining = remaining - t
+                # 没有事件的场次已走完本帧
+                active &= event != NONE
+
+                sel = np.flatnonzero(event == PLAYER)
+                if len(sel):
+                    j = hit_player[sel]
+                    excluded[sel, j] = True
+                    dx = bx[sel] - px[sel, j]
+                    dy = by[sel] - py[sel, j]
+                    dist = np.hypot(dx, dy)
+                    safe = np.where(dist > 0, dist, 1.0)
+                    nx = np.where(dist > 0, dx / safe, 1.0)
+                    ny = np.where(dist > 0, dy / safe, 0.0)
+                    overlap = HIT_DIST - dist + 1
+                    bx[sel] += nx * overlap
+                    by[sel] += ny * overlap
+                    speed = np.hypot(vx[sel], vy[sel]) * 0.9 + 2.0
+                    vx[sel] = speed * nx
+                    vy[sel] = speed * ny
+                sel = event == WALL_X
+                bx[sel] = target[sel]
+                vx[sel] = -vx[sel] * 0.7
+                sel = event == WALL_Y
+                by[sel] = target[sel]
+                vy[sel] = -vy[sel] * 0.7
+                sel = event == GOAL_LINE
+                if sel.any():
+                    # 越过球门线即进球，停在门线内侧
+                    bx[sel] = np.where(vx[sel] < 0, target[sel] - 1e-6, target[sel] + 1e-6)
+                    goal |= sel
+                    active &= ~sel
+                if not active.any():
+                    break
+            else:
+                bx = np.where(active, bx + vx * remaining, bx)
+                by = np.where(active, by + vy * remaining, by)
+        self.ball_x[rows], self.ball_y[rows] = bx, by
+        self.ball_vx[rows], self.ball_vy[rows] = vx, vy
+        return goal
+
+    def _release_kicker(self, rows):
+        # release_kicker：球离开射门球员身体后恢复其碰撞
+        i = np.flatnonzero(rows & (self.kicker != NO_KICKER))
+        if len(i):
+            j = self.kicker[i].astype(np.intp)
+            away = np.hypot(self.ball_x[i] - self.player_x[i, j], self.ball_y[i] - self.player_y[i, j]) >= HIT_DIST
+            self.kicker[i[away]] = NO_KICKER
+
+    def run(self, max_frames=2000):
+        # 推进到所有球停下或进球
+        for _ in range(max_frames):
+            if not self.step().any():
+                break
+        return self.status
+
+
+def boundary(nx, ny, nvx, nvy):
+    # handle_boundary 的向量化版本，返回新数组
+    mouth = ((GOAL_TOP - BALL_RADIUS) < ny) & (ny < (GOAL_BOTTOM + BALL_RADIUS))
+    left = nx < 50 + BALL_RADIUS
+    right = nx > WIDTH - 50 - BALL_RADIUS
+    wall_left = left & ~mouth
+    wall_right = right & ~mouth
+    nx = np.where(wall_left, 50 + BALL_RADIUS, np.where(wall_right, WIDTH - 50 - BALL_RADIUS, nx))
+    nvx = np.where(wall_left | wall_right, -nvx * 0.7, nvx)
+    top = ny < 50 + BALL_RADIUS
+    bottom = ~top & (ny > HEIGHT - 50 - BALL_RADIUS)
+    ny = np.where(top, 50 + BALL_RADIUS, np.where(bottom, HEIGHT - 50 - BALL_RADIUS, ny))
+    nvy = np.where(top | bottom, -nvy * 0.7, nvy)
+    return nx, ny, nvx, nvy
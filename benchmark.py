@@ -0,0 +1,374 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 性能基准：无窗口运行（SDL dummy 驱动），结果写成 JSON，可与保存的基线比较并标出变慢的项
+# 所有结果都是“每次操作耗时（微秒）”，越小越好
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import simulation as sim_mod
+
+BENCHMARKS = {}
+DEFAULT_THRESHOLD = 0.15
+
+def benchmark(name, group):
+    def register(fn):
+        BENCHMARKS[name] = (group, fn)
+        return fn
+    return register
+
+def measure(fn, number, repeat=5):
+    # 每轮调用 fn() number 次，取各轮单次耗时的中位数
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number * 1e6)
+    return {"us": statistics.median(times), "min_us": min(times), "number": number, "repeat": repeat}
+
+def moving_state(seed=0):
+    # 中圈附近随机方向、随机力量开出的球，球停后重新开球
+    rng = random.Random(seed)
+    gs = sim_mod.init_game()
+
+    def kick():
+        angle = rng.uniform(0, 2 * math.pi)
+        speed = rng.uniform(5, sim_mod.MAX_SHOT_POWER) * 1.5
+        gs['ball'].update({"x": sim_mod.WIDTH / 2, "y": sim_mod.HEIGHT / 2,
+                           "vx": math.cos(angle) * speed, "vy": math.sin(angle) * speed})
+        gs['game_state'] = "moving"
+        gs['kicker'] = None
+    kick()
+    return gs, kick
+
+
+@benchmark("physics.discrete_step", "physics")
+def bench_discrete_step(scale):
+    gs, kick = moving_state()
+
+    def step():
+        stopped = sim_mod.move_ball(gs)
+        sim_mod.handle_collisions(gs)
+        sim_mod.handle_boundary(gs)
+        if sim_mod.check_goal(gs) or stopped:
+            kick()
+    return measure(step, 20000 * scale)
+
+@benchmark("physics.step_ball", "physics")
+def bench_step_ball(scale):
+    gs, kick = moving_state()
+
+    def step():
+        stopped, scored = sim_mod.step_ball(gs)
+        if stopped or scored:
+            kick()
+    return measure(step, 20000 * scale)
+
+@benchmark("physics.batch_step_per_match", "physics")
+def bench_batch_step(scale):
+    import numpy as np
+    from batch_physics import BatchSimulator
+    n = 1024
+    batch = BatchSimulator(n)
+    rng = np.random.default_rng(0)
+
+    def step():
+        if not (batch.status == 1).any():
+            batch.load_state(sim_mod.init_game())
+            batch.shoot_polar(rng.uniform(0, 2 * np.pi, n), rng.uniform(5, 15, n))
+        batch.step()
+    result = measure(step, 200 * scale)
+    # 换算成每场比赛每帧
+    result["us"] /= n
+    result["min_us"] /= n
+    return result
+
+@benchmark("physics.practice_step", "physics")
+def bench_practice_step(scale):
+    # 11 人制 + 3 个球的一帧多体物理（空间哈希 + 子步）
+    import practice
+    rng = random.Random(0)
+    sim = practice.PracticeSimulator(11, 3)
+    gs = sim.state
+    kicks = [(rng.uniform(0, 2 * math.pi), rng.uniform(5, sim_mod.MAX_SHOT_POWER) * 1.5) for _ in range(64)]
+    it = iter(range(1 << 62))
+
+    def step():
+        if gs['game_state'] != "moving":
+            practice.place_balls(gs)
+            practice.build_grid(gs, sim.grid)
+            for ball in gs['balls']:
+                angle, speed = kicks[next(it) % len(kicks)]
+                ball["vx"], ball["vy"] = math.cos(angle) * speed, math.sin(angle) * speed
+            gs['game_state'] = "moving"
+            gs['kicker'] = None
+        stopped, scored = practice.step_world(gs, sim.grid)
+        if stopped or scored:
+            gs['game_state'] = "aiming"
+    return measure(step, 5000 * scale)
+
+@benchmark("ai.legacy_turn", "ai")
+def bench_ai_legacy(scale):
+    # 每轮走一遍同样的 500 个球位置，各轮之间可比
+    rng = random.Random(0)
+    spots = [(rng.uniform(100, 700), rng.uniform(100, 500)) for _ in range(500)]
+    gs = sim_mod.init_game()
+    it = iter(range(1 << 62))
+
+    def turn():
+        x, y = spots[next(it) % len(spots)]
+        gs['ball'].update({"x": x, "y": y})
+        while not sim_mod.ai_choose_player_and_move(gs, 2):
+            pass
+        sim_mod.ai_charge_and_shoot(gs, 2, rng)
+        sim_mod.reset_positions(gs)
+    return measure(turn, len(spots) * scale)
+
+@benchmark("ai.planner_rollout", "ai")
+def bench_planner_rollout(scale):
+    import ai_planner
+    from snapshots import snapshot
+    gs = sim_mod.init_game()
+    scratch = ai_planner.clone_state(gs)
+    base = snapshot(gs)
+    plans = ai_planner.candidate_shots(gs, 1)
+    it = iter(range(1 << 62))
+
+    def one():
+        ai_planner.rollout(scratch, base, 1, plans[next(it) % len(plans)])
+    return measure(one, len(plans) * scale)
+
+@benchmark("ai.shot_table_lookup", "ai")
+def bench_shot_table(scale):
+    from shot_table import ShotTable
+    table = ShotTable(cache_size=1 << 20)
+    gs = sim_mod.init_game()
+    shots = [(0, a * 2 * math.pi / 64, 15) for a in range(64)]
+    table.lookup_many(gs, 1, shots)
+    it = iter(range(1 << 62))
+
+    def one():
+        table.lookup(gs, 1, *shots[next(it) % len(shots)])
+    return measure(one, len(shots) * 80 * scale)
+
+def init_game_module():
+    import game
+    if game.screen is None:
+        game.init_display()
+    return game
+
+@benchmark("render.full_frame", "render")
+def bench_full_frame(scale):
+    game = init_game_module()
+    gs, kick = moving_state()
+    screen = game.screen
+
+    def frame():
+        # 与原来逐帧重画一致：背景各层 + 球员 + HUD
+        screen.fill((55, 85, 45))
+        game.draw_track(screen)
+        screen.fill(game.BACKGROUND, (game.FIELD_MARGIN_X, game.FIELD_MARGIN_Y, game.WIDTH, game.HEIGHT))
+        game.draw_field(screen)
+        game.draw_players(screen, gs)
+        game.draw_ui(screen, gs)
+        stopped, scored = sim_mod.step_ball(gs)
+        if stopped or scored:
+            kick()
+    return measure(frame, 50 * scale)
+
+@benchmark("render.cached_frame", "render")
+def bench_cached_frame(scale):
+    game = init_game_module()
+    gs, kick = moving_state()
+    gs['game_state'] = "aiming"
+    screen = game.screen
+    background = game.get_background(None)
+    prev = []
+
+    def frame():
+        nonlocal prev
+        for rect in prev:
+            screen.blit(background, rect, rect)
+        game.draw_players(screen, gs)
+        game.draw_ui(screen, gs)
+        prev = game.dirty_rects(gs)
+        gs['ball']["x"] = 200 + (gs['ball']["x"] + 3) % 400
+    return measure(frame, 200 * scale)
+
+@benchmark("render.menu_frame", "render")
+def bench_menu_frame(scale):
+    game = init_game_module()
+    if game._menu["background"] is None:
+        game._menu["background"] = game.build_menu_background()
+    rects = game.menu_button_rects()
+    it = iter(range(1 << 62))
+
+    def frame():
+        i = next(it) % len(rects)
+        game.draw_menu(game.screen, game._menu["background"], rects, i, i)
+    return measure(frame, 100 * scale)
+
+@benchmark("history.migrate_100k", "history")
+def bench_history_migrate(scale):
+    from history_store import HistoryStore
+    tmp = tempfile.mkdtemp(prefix="soccer-bench-")
+    try:
+        legacy = os.path.join(tmp, "history.txt")
+        write_legacy_history(legacy, 100000 * scale)
+        times = []
+        for run in range(3):
+            start = time.perf_counter()
+            HistoryStore(os.path.join(tmp, f"h{run}.db"), legacy_path=legacy).close()
+            times.append((time.perf_counter() - start) * 1e6)
+        return {"us": statistics.median(times), "min_us": min(times), "number": 1, "repeat": 3}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+@benchmark("history.load_recent", "history")
+def bench_history_load(scale):
+    from history_store import HistoryStore, format_match
+    tmp = tempfile.mkdtemp(prefix="soccer-bench-")
+    try:
+        legacy = os.path.join(tmp, "history.txt")
+        write_legacy_history(legacy, 100000 * scale)
+        store = HistoryStore(os.path.join(tmp, "h.db"), legacy_path=legacy)
+        # 与 game.load_history 相同：最近 15 场并格式化
+        result = measure(lambda: [format_match(row) for row in store.recent(15)], 200)
+        store.close()
+        return result
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def write_legacy_history(path, lines):
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as f:
+        s1 = s2 = 0
+        mode = "PvP"
+        for _ in range(lines):
+            if rng.random() < 0.2:
+                s1 = s2 = 0
+                mode = rng.choice(("PvP", "PvE"))
+            if rng.random() < 0.5:
+                s1 += 1
+            else:
+                s2 += 1
+            f.write(f"{mode} | {s1}:{s2}\n")
+
+@benchmark("replay.headless_step", "replay")
+def bench_replay(scale):
+    from replay import RecordingSimulator, run_headless
+    tmp = tempfile.mkdtemp(prefix="soccer-bench-")
+    try:
+        path = os.path.join(tmp, "bench.scr")
+        rec = RecordingSimulator(path, "ai_vs_ai", seed=1)
+        for _ in range(20000):
+            if rec.step() == "scored":
+                rec.continue_after_goal()
+        rec.close()
+        times = []
+        for _ in range(3):
+            r = run_headless(path)
+            times.append(r["seconds"] / r["steps"] * 1e6)
+        return {"us": statistics.median(times), "min_us": min(times), "number": 20000, "repeat": 3}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+STARTUP_SCRIPT = """
+import game
+game.init_display()
+game._menu["background"] = game.build_menu_background()
+game.draw_menu(game.screen, game._menu["background"], game.menu_button_rects(), 0, -1)
+game.pygame.display.flip()
+game.startup.finish("first menu frame")
+print(game.startup.total_ms())
+"""
+
+@benchmark("startup.first_frame", "startup")
+def bench_startup(scale):
+    # 新进程里从导入 game 到画出第一帧菜单；第一次运行会顺带写好图片的像素缓存
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(3 + 2 * scale):
+        out = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=here, env=os.environ,
+                             capture_output=True, text=True, check=True).stdout
+        times.append(float(out.split()[-1]) * 1000)
+    times = times[1:]
+    return {"us": statistics.median(times), "min_us": min(times), "number": 1, "repeat": len(times)}
+
+def run(names=None, scale=1):
+    results = {}
+    for name, (group, fn) in BENCHMARKS.items():
+        if names and name not in names and group not in names:
+            continue
+        try:
+            results[name] = fn(scale)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+        line = results[name]
+        print(f"{name:32s} " + (f"{line['us']:12.2f} us" if "us" in line else "skipped: " + line["skipped"]))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    # 返回变慢超过阈值的项：[(名称, 基线, 当前, 比值)]
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "us" not in base or "us" not in result:
+            continue
+        ratio = result["us"] / base["us"] if base["us"] else 1.0
+        flag = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else ""
+        print(f"{name:32s} {base['us']:12.2f} -> {result['us']:12.2f} us  x{ratio:5.2f}  {flag}")
+        if ratio > 1 + threshold:
+            regressions.append((name, base["us"], result["us"], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soccer Collision benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmark names or groups (physics, ai, render, history, replay, startup)")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (default 0.15)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply iteration counts")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    args = parser.parse_args(argv)
+    if args.list:
+        for name, (group, _) in BENCHMARKS.items():
+            print(f"{group:8s} {name}")
+        return 0
+    report = run(set(args.names), args.scale)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import math
+
+# 均匀网格空间哈希：每个圆按外接方框登记到所覆盖的格子里
+# 物体移动后只有跨格时才改格子表；只有同格里有两个以上物体的格子会产生候选对
+# 格子边长不小于最大直径时，每个圆最多占 2x2 个格子
+
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bodies = {}
+        # 至少有两个物体的格子，pairs() 只看这些格子
+        self.crowded = set()
+        self.moves = 0
+        self.rehashes = 0
+
+    def _range(self, x, y, r):
+        inv = 1.0 / self.cell_size
+        return math.floor((x - r) * inv), math.floor((y - r) * inv), math.floor((x + r) * inv), math.floor((y + r) * inv)
+
+    def _add(self, key, cx0, cy0, cx1, cy1):
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                members = cells.get((cx, cy))
+                if members is None:
+                    cells[(cx, cy)] = [key]
+                else:
+                    members.append(key)
+                    self.crowded.add((cx, cy))
+
+    def _discard(self, key, cx0, cy0, cx1, cy1):
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                members = cells[(cx, cy)]
+                members.remove(key)
+                if len(members) < 2:
+                    self.crowded.discard((cx, cy))
+                    if not members:
+                        del cells[(cx, cy)]
+
+    def insert(self, key, x, y, r):
+        if key in self.bodies:
+            self.remove(key)
+        cells = self._range(x, y, r)
+        self.bodies[key] = [r, cells]
+        self._add(key, *cells)
+
+    def remove(self, key):
+        r, cells = self.bodies.pop(key)
+        self._discard(key, *cells)
+
+    def move(self, key, x, y):
+        # 仍在原来的格子范围内时什么都不用做
+        self.moves += 1
+        body = self.bodies[key]
+        cells = self._range(x, y, body[0])
+        if cells != body[1]:
+            self.rehashes += 1
+            self._discard(key, *body[1])
+            self._add(key, *cells)
+            body[1] = cells
+
+    def query(self, x, y, r):
+        # 外接方框与 (x, y, r) 的方框落在同一格子的物体
+        cx0, cy0, cx1, cy1 = self._range(x, y, r)
+        found = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for key in self.cells.get((cx, cy), ()):
+                    if key not in found:
+                        found.append(key)
+        return found
+
+    def pairs(self):
+        # 两个物体可能同时出现在多个格子里，只在两者格子范围交集的左上角格子里报告一次
+        bodies = self.bodies
+        for cell in self.crowded:
+            members = self.cells[cell]
+            n = len(members)
+            for i in range(n - 1):
+                a = members[i]
+                ax0, ay0 = bodies[a][1][0], bodies[a][1][1]
+                for j in range(i + 1, n):
+                    b = members[j]
+                    bx0, by0 = bodies[b][1][0], bodies[b][1][1]
+                    if (max(ax0, bx0), max(ay0, by0)) == cell:
+                        yield (a, b) if a < b else (b, a)
+
+    def clear(self):
+        self.cells.clear()
+        self.bodies.clear()
+        self.crowded.clear()
+
+    def stats(self):
+        return {"bodies": len(self.bodies), "cells": len(self.cells), "crowded": len(self.crowded),
+                "moves": self.moves, "rehashes": self.rehashes}
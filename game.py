@@ -1,16 +1,39 @@
+import time
+# 启动计时从导入本模块开始，pygame 自身的导入也算在内
+_import_start = time.perf_counter()
+
 import pygame
 import sys
 import math
-import random
-
-pygame.init()
+import multiprocessing
+import os
+
+from text_cache import render_text
+from sprites import SpriteAtlas
+from scheduler import FrameScheduler, FixedTimestep, StateInterpolator
+from history_store import format_match
+from history_writer import HistoryWriter
+from replay import (
+    RecordingSimulator, ReplayReader, ReplayPlayer,
+    LEFT, RIGHT, UP, DOWN, SLOW, CHARGE, RELEASE, CONTINUE, SELECT, SELECT_SHIFT,
+)
+from ai_planner import ShotPlanner
+from shot_table import ShotTable, ShotPredictor, GOAL, OWN_GOAL
+from profiler import FrameProfiler, StartupTimer
+from practice import PracticeSimulator
+from analytics import MatchAnalytics
+from net_client import NetClient
+from netcode import DEFAULT_PORT, WAITING, STARTED, OPPONENT_LEFT
+from assets import AssetManager, resource_dir, display_format
+from texture_screen import TextureScreen
+import simulation
+from simulation import (
+    WIDTH, HEIGHT, PLAYER_RADIUS, BALL_RADIUS, MAX_SHOT_POWER, GOAL_WIDTH, GOAL_DEPTH, Simulator,
+    get_current_team,
+)
 
 PANEL_WIDTH, PANEL_HEIGHT = 1200, 900
 FIELD_MARGIN_X, FIELD_MARGIN_Y = 200, 150
-WIDTH, HEIGHT = 800, 600
-
-screen = pygame.display.set_mode((PANEL_WIDTH, PANEL_HEIGHT))
-pygame.display.set_caption("Soccer Collision")
 
 BACKGROUND = (20, 120, 40)
 TRACK_COLOR = (255, 200, 220)
@@ -24,86 +47,177 @@ UI_TEXT = (255, 255, 255)
 SCOREBOARD_BG = (70, 70, 80)
 SCOREBOARD_BORDER = (200, 200, 200)
 
-PLAYER_RADIUS = 25
-BALL_RADIUS = 12
-PLAYER_SPEED = 4
-MAX_SHOT_POWER = 15
-FRICTION = 0.96
-GOAL_WIDTH = 150
-GOAL_DEPTH = 20
-
-font_large = pygame.font.Font(None, 110)
-font_menu_title = pygame.font.SysFont("impact", 120, bold=True, italic=True)
-font_glow = pygame.font.SysFont("impact", 120, bold=True, italic=True)
-font_medium = pygame.font.Font(None, 50)
-font_small = pygame.font.Font(None, 30)
+# 窗口与字体在 init_display() 中创建，导入本模块不会打开窗口
+screen = None
+font_large = None
+font_medium = None
+font_small = None
+sprite_atlas = None
 
 MENU_TEXT = (255, 255, 240)
 MENU_ACCENT = (100, 255, 255)
 MENU_ACCENT2 = (255, 0, 100)
 
 history_file = "soccer_history.txt"
+history_db = "soccer_history.db"
+history_writer = None
+replay_file = "last_replay.scr"
+# 绘制后端：software 为原来的 Surface 合成；texture 用 SDL2 Renderer/Texture，不可用时自动退回 software
+# 也可以用 python game.py --renderer texture 选择
+RENDERER = os.environ.get("SOCCER_RENDERER", "software")
+# 渲染帧率与物理步频（simulation.TICK_RATE）分开：30 为省电模式，0 为不限帧率；机器跟不上时物理照常按真实时间推进
+# 也可以用 python game.py --fps 30 选择（命令行优先于环境变量 SOCCER_FPS）；在 main() 里解析，导入本模块不读取
+DEFAULT_RENDER_FPS = 60
+RENDER_FPS = None
+REPLAY_SPEEDS = (1, 2, 4, 8, 16, 32, 64, 100)
+# 回放暂停时可倒退的帧数（10 秒）
+REPLAY_REWIND = 600
+# AI 难度对应每回合的规划时间预算，见 ai_planner.DIFFICULTY_BUDGET
+ai_difficulty = "normal"
+ai_planner = None
+# 规划器每帧占用的时间：expert 的 200ms 预算约分 50 帧推演完，画面不卡
+PLANNER_FRAME_BUDGET = 0.004
+# 射门结果表：有离线生成的 shot_table.bin 时映射进来，否则按需计算
+shot_table_file = "shot_table.bin"
+shot_table = None
+# 瞄准提示在后台线程推演，算好后投递 HINT_READY 唤醒主循环重画
+shot_predictor = None
+HINT_READY = pygame.event.custom_type()
+analytics_file = "soccer_analytics.npz"
+analytics = None
+# 帧分析器：F3 开关（同时显示统计面板），F4 导出 Chrome trace JSON 和逐帧 CSV
+# 环境变量 SOCCER_PROFILE=1 时启动即开启
+profiler = FrameProfiler()
+# 字体和图片按需加载；缩放好的背景图缓存在 asset_cache 下
+assets = AssetManager(cache_dir=os.path.join(resource_dir(), "asset_cache"))
+MENU_TITLE_FONT = ("impact", 120, True, True)
+startup = StartupTimer(_import_start)
+startup.mark("imports")
+
+def init_display(renderer=None):
+    global screen, font_large, font_medium, font_small, sprite_atlas
+    # 只初始化用到的子系统；pygame.init() 还会打开音频设备，这游戏没有声音
+    pygame.display.init()
+    pygame.font.init()
+    startup.mark("pygame init")
+    screen = None
+    if (renderer or RENDERER) == "texture":
+        try:
+            screen = TextureScreen((PANEL_WIDTH, PANEL_HEIGHT), "Soccer Collision")
+        except pygame.error as e:
+            print("Texture renderer not available, using software drawing:", e)
+    if screen is None:
+        screen = pygame.display.set_mode((PANEL_WIDTH, PANEL_HEIGHT))
+        pygame.display.set_caption("Soccer Collision")
+    startup.mark("window")
+    # 菜单标题用的系统字体在第一次画菜单时才查找
+    font_large = assets.font(None, 110)
+    font_medium = assets.font(None, 50)
+    font_small = assets.font(None, 30)
+    sprite_atlas = SpriteAtlas(font_small, {1: PLAYER1_COLOR, 2: PLAYER2_COLOR})
+    startup.mark("fonts+sprites")
+    return screen
+
+def present(rects=None):
+    # 纹理后端每帧整屏重画，rects 只对软件路径的局部刷新有意义
+    if isinstance(screen, TextureScreen):
+        screen.present()
+    elif rects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(rects)
+
+def field_image():
+    return assets.image("Soccer.jpg", (PANEL_WIDTH, PANEL_HEIGHT))
 
 def field_x(x): return x + FIELD_MARGIN_X
 def field_y(y): return y + FIELD_MARGIN_Y
 
-def init_game():
-    p1_x = 50 + GOAL_DEPTH + PLAYER_RADIUS + 10
-    p2_x = WIDTH - 50 - GOAL_DEPTH - PLAYER_RADIUS - 10
-    y_c = HEIGHT // 2
-    off_y = 60
-    return {
-        'players1': [
-            {"x": p1_x, "y": y_c, "active": False, "num": 1},
-            {"x": p1_x + 100, "y": y_c - off_y, "active": False, "num": 2},
-            {"x": p1_x + 100, "y": y_c + off_y, "active": False, "num": 3},
-        ],
-        'players2': [
-            {"x": p2_x, "y": y_c, "active": False, "num": 1},
-            {"x": p2_x - 100, "y": y_c - off_y, "active": False, "num": 2},
-            {"x": p2_x - 100, "y": y_c + off_y, "active": False, "num": 3},
-        ],
-        'selected_player': 0,
-        'ball': {"x": WIDTH // 2, "y": HEIGHT // 2, "vx": 0, "vy": 0},
-        'current_player': 1,
-        'game_state': "aiming",
-        'shot_power': 0,
-        'charging_power': False,
-        'score': {"player1": 0, "player2": 0},
-        'winner': None
-    }
-
-def reset_positions(game_state):
-    p1_x = 50 + GOAL_DEPTH + PLAYER_RADIUS + 10
-    p2_x = WIDTH - 50 - GOAL_DEPTH - PLAYER_RADIUS - 10
-    y_c = HEIGHT // 2
-    off_y = 60
-    game_state['players1'][0].update({"x": p1_x, "y": y_c, "active": False})
-    game_state['players1'][1].update({"x": p1_x + 100, "y": y_c - off_y, "active": False})
-    game_state['players1'][2].update({"x": p1_x + 100, "y": y_c + off_y, "active": False})
-    game_state['players2'][0].update({"x": p2_x, "y": y_c, "active": False})
-    game_state['players2'][1].update({"x": p2_x - 100, "y": y_c - off_y, "active": False})
-    game_state['players2'][2].update({"x": p2_x - 100, "y": y_c + off_y, "active": False})
-    game_state['ball'].update({"x": WIDTH // 2, "y": HEIGHT // 2, "vx": 0, "vy": 0})
-    game_state['shot_power'] = 0
-    game_state['charging_power'] = False
-    game_state['selected_player'] = 0
-
-def save_history(score1, score2, mode="PvP"):
-    try:
-        with open(history_file, "a", encoding='utf-8') as f:
-            f.write(f"{mode} | {score1}:{score2}\n")
-    except Exception as e:
-        print("Error saving history:", e)
-
-def load_history():
+def open_history():
+    # 写入线程负责打开数据库（含旧文件导入），游戏线程只往队列里放事件
+    global history_writer
+    if history_writer is None:
+        history_writer = HistoryWriter(history_db, legacy_path=history_file).start()
+    return history_writer
+
+def mode_label(mode):
+    return {"pvp": "PvP", "vs_ai": "PvE", "practice": "Practice"}[mode]
+
+def save_goal(match, game_state):
+    open_history().record_goal(match, game_state['winner'], game_state['score']["player1"], game_state['score']["player2"])
+
+def finish_match(match, sim):
+    open_history().finish_match(match)
+    if sim.analytics is not None:
+        sim.analytics.match_end()
+        try:
+            sim.analytics.save(analytics_file)
+        except OSError as e:
+            print("Analytics not saved:", e)
+
+def load_history(limit=15):
     try:
-        with open(history_file, "r", encoding='utf-8') as f:
-            lines = [line.strip() for line in f.readlines() if line.strip()]
-            return lines[::-1]
+        writer = open_history()
+        writer.flush(timeout=0.5)
+        return [format_match(row) for row in writer.recent(limit)]
     except Exception:
         return []
 
+def get_shot_table():
+    global shot_table
+    if shot_table is None:
+        try:
+            shot_table = ShotTable(shot_table_file)
+        except (OSError, ValueError) as e:
+            print("Shot table not loaded:", e)
+            shot_table = ShotTable()
+    return shot_table
+
+def get_shot_predictor():
+    global shot_predictor
+    if shot_predictor is None:
+        shot_predictor = ShotPredictor(get_shot_table(), lambda: pygame.event.post(pygame.event.Event(HINT_READY)))
+    return shot_predictor
+
+def get_analytics():
+    # 累计统计跨局保存在 soccer_analytics.npz，离线用 python analytics.py render 出图
+    global analytics
+    if analytics is None:
+        try:
+            analytics = MatchAnalytics.load(analytics_file)
+        except (OSError, ValueError, KeyError):
+            analytics = MatchAnalytics()
+    return analytics
+
+def get_planner():
+    global ai_planner
+    if ai_planner is None:
+        # 游戏内规划器不开进程池，打包版也不会多拉起游戏进程；推演分摊到多帧，每帧最多 PLANNER_FRAME_BUDGET 秒
+        ai_planner = ShotPlanner(ai_difficulty, workers=0, table=get_shot_table(), frame_budget=PLANNER_FRAME_BUDGET)
+    return ai_planner
+
+def init_render_fps():
+    # RENDER_FPS 为命令行给的字符串或 None；无效值（非整数、负数）退回默认帧率
+    global RENDER_FPS
+    text = RENDER_FPS if RENDER_FPS is not None else os.environ.get("SOCCER_FPS", DEFAULT_RENDER_FPS)
+    try:
+        fps = int(text)
+    except ValueError:
+        fps = -1
+    if fps < 0:
+        print(f"Invalid render FPS {text!r}, using {DEFAULT_RENDER_FPS}")
+        fps = DEFAULT_RENDER_FPS
+    RENDER_FPS = fps
+    return fps
+
+def quit_game():
+    if history_writer is not None:
+        history_writer.close()
+    if ai_planner is not None:
+        ai_planner.close()
+    pygame.quit()
+    sys.exit()
+
 def draw_track(screen):
     track_margin = 36
     track_rect = pygame.Rect(field_x(0) - track_margin, field_y(0) - track_margin, WIDTH + track_margin * 2, HEIGHT + track_margin * 2)
@@ -157,163 +271,204 @@ def draw_field(screen):
     draw_goal_3d(screen, left=True)
     draw_goal_3d(screen, left=False)
 
-def draw_soccer_ball(screen, pos, radius):
-    x, y = pos
-    sx, sy = field_x(x), field_y(y)
-    pygame.draw.circle(screen, (235, 235, 235), (int(sx), int(sy)), radius)
-    pentagon_points = [
-        [(0, -1), (0.95, -0.31), (0.59, 0.81), (-0.59, 0.81), (-0.95, -0.31)],
-        [(0, 1), (0.59, -0.81), (0.95, 0.31), (0, -1), (-0.59, -0.81)],
-    ]
-    for i in range(5):
-        angle = i * (2 * math.pi / 5)
-        pts = []
-        for px, py in pentagon_points[0]:
-            a = angle + math.atan2(py, px)
-            r = radius * 0.45 if i % 2 == 0 else radius * 0.28
-            pts.append((int(sx + math.cos(a) * r), int(sy + math.sin(a) * r)))
-        pygame.draw.polygon(screen, (40, 40, 40), pts)
-    shadow = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-    pygame.draw.circle(shadow, (50, 50, 50, 90), (radius, radius + 3), int(radius * 0.97))
-    screen.blit(shadow, (int(sx - radius), int(sy - radius)), special_flags=pygame.BLEND_RGBA_ADD)
+def draw_soccer_ball(screen, ball):
+    sprite_atlas.draw_ball(screen, ball, (field_x(ball["x"]), field_y(ball["y"])))
 
 def draw_players(screen, game_state):
-    for i, p in enumerate(game_state['players1']):
-        color = PLAYER1_COLOR
-        border = (255, 255, 255)
-        if game_state['current_player'] == 1 and i == game_state['selected_player']:
-            border = (255, 255, 0)
-            pygame.draw.circle(screen, (255, 255, 0), (field_x(int(p["x"])), field_y(int(p["y"]))), PLAYER_RADIUS + 7, 3)
-        pygame.draw.circle(screen, color, (field_x(int(p["x"])), field_y(int(p["y"]))), PLAYER_RADIUS)
-        pygame.draw.circle(screen, border, (field_x(int(p["x"])), field_y(int(p["y"]))), PLAYER_RADIUS, 2)
-        num_text = font_small.render(str(p['num']), True, (255, 255, 255))
-        screen.blit(num_text, (field_x(int(p["x"])) - num_text.get_width() // 2, field_y(int(p["y"])) - num_text.get_height() // 2))
-    for i, p in enumerate(game_state['players2']):
-        color = PLAYER2_COLOR
-        border = (255, 255, 255)
-        if game_state['current_player'] == 2 and i == game_state['selected_player']:
-            border = (255, 255, 0)
-            pygame.draw.circle(screen, (255, 255, 0), (field_x(int(p["x"])), field_y(int(p["y"]))), PLAYER_RADIUS + 7, 3)
-        pygame.draw.circle(screen, color, (field_x(int(p["x"])), field_y(int(p["y"]))), PLAYER_RADIUS)
-        pygame.draw.circle(screen, border, (field_x(int(p["x"])), field_y(int(p["y"]))), PLAYER_RADIUS, 2)
-        num_text = font_small.render(str(p['num']), True, (255, 255, 255))
-        screen.blit(num_text, (field_x(int(p["x"])) - num_text.get_width() // 2, field_y(int(p["y"])) - num_text.get_height() // 2))
-    ball = game_state['ball']
-    draw_soccer_ball(screen, (ball["x"], ball["y"]), BALL_RADIUS)
+    for team, players in ((1, game_state['players1']), (2, game_state['players2'])):
+        for i, p in enumerate(players):
+            selected = game_state['current_player'] == team and i == game_state['selected_player']
+            sprite_atlas.draw_player(screen, team, p, selected, (field_x(int(p["x"])), field_y(int(p["y"]))))
+    for ball in game_state['balls']:
+        draw_soccer_ball(screen, ball)
+
+SCOREBOARD_RECT = pygame.Rect((PANEL_WIDTH - 220) // 2, 25, 220, 80)
+# 顶栏底板和各比分的记分牌只画一次，之后每帧都是整块 blit（纹理后端下就是纹理拷贝）
+_hud = {"bar": None, "scoreboards": {}}
+
+def build_scoreboard(score1, score2):
+    surf = pygame.Surface(SCOREBOARD_RECT.size, pygame.SRCALPHA)
+    rect = surf.get_rect()
+    pygame.draw.rect(surf, SCOREBOARD_BG, rect, border_radius=18)
+    pygame.draw.rect(surf, SCOREBOARD_BORDER, rect, 4, border_radius=18)
+    for i, score in enumerate([score1, score2]):
+        color = PLAYER1_COLOR if i == 0 else PLAYER2_COLOR
+        pygame.draw.circle(surf, color, (60 + i * 100, rect.centery), 31)
+        pygame.draw.circle(surf, (255, 255, 255), (60 + i * 100, rect.centery), 28, 4)
+        num_text = render_text(font_large, str(score), True, (255, 255, 255))
+        surf.blit(num_text, (60 + i * 100 - num_text.get_width() // 2, rect.centery - num_text.get_height() // 2))
+    return surf
 
 def draw_scoreboard(screen, game_state):
-    sw, sh = 220, 80
-    scoreboard_rect = pygame.Rect((PANEL_WIDTH - sw) // 2, 25, sw, sh)
-    pygame.draw.rect(screen, SCOREBOARD_BG, scoreboard_rect, border_radius=18)
-    pygame.draw.rect(screen, SCOREBOARD_BORDER, scoreboard_rect, 4, border_radius=18)
-    for i, score in enumerate([game_state['score']['player1'], game_state['score']['player2']]):
-        color = PLAYER1_COLOR if i == 0 else PLAYER2_COLOR
-        pygame.draw.circle(screen, color, (scoreboard_rect.left + 60 + i * 100, scoreboard_rect.centery), 31)
-        pygame.draw.circle(screen, (255, 255, 255), (scoreboard_rect.left + 60 + i * 100, scoreboard_rect.centery), 28, 4)
-        num_text = font_large.render(str(score), True, (255, 255, 255))
-        screen.blit(num_text, (scoreboard_rect.left + 60 + i * 100 - num_text.get_width() // 2, scoreboard_rect.centery - num_text.get_height() // 2))
+    key = (game_state['score']['player1'], game_state['score']['player2'])
+    surf = _hud["scoreboards"].get(key)
+    if surf is None:
+        if len(_hud["scoreboards"]) > 32:
+            _hud["scoreboards"].clear()
+        surf = _hud["scoreboards"][key] = build_scoreboard(*key)
+    screen.blit(surf, SCOREBOARD_RECT.topleft)
 
 def draw_ui(screen, game_state):
-    ui_surface = pygame.Surface((PANEL_WIDTH, 70), pygame.SRCALPHA)
-    ui_surface.fill(UI_BACKGROUND)
-    screen.blit(ui_surface, (0, 0))
+    if _hud["bar"] is None:
+        _hud["bar"] = pygame.Surface((PANEL_WIDTH, 70), pygame.SRCALPHA)
+        _hud["bar"].fill(UI_BACKGROUND)
+    screen.blit(_hud["bar"], (0, 0))
     draw_scoreboard(screen, game_state)
     player_color = PLAYER1_COLOR if game_state['current_player'] == 1 else PLAYER2_COLOR
-    player_text = font_small.render(f"Current Player: {'Blue' if game_state['current_player'] == 1 else 'Red'}", True, player_color)
+    player_text = render_text(font_small, f"Current Player: {'Blue' if game_state['current_player'] == 1 else 'Red'}", True, player_color)
     screen.blit(player_text, (30, 25))
     if game_state['game_state'] == "aiming":
-        status_text = font_small.render(
+        status_text = render_text(font_small,
             "Click to select your player | Arrow keys to move | Space to charge/shoot", True, (200, 200, 100))
         screen.blit(status_text, (PANEL_WIDTH - status_text.get_width() - 30, 25))
-        bar_w, bar_h = 320, 32
-        bar_x = PANEL_WIDTH // 2 - bar_w // 2
-        bar_y = PANEL_HEIGHT - 70
-        pygame.draw.rect(screen, (70, 70, 70), (bar_x, bar_y, bar_w, bar_h), border_radius=10)
-        power_ratio = min(1.0, game_state['shot_power'] / MAX_SHOT_POWER)
-        grad_colors = [(70, 255, 70), (255, 215, 0), (255, 80, 80)]
-        def grad_col(ratio):
-            if ratio < 0.5:
-                c1, c2 = grad_colors[0], grad_colors[1]
-                f = ratio / 0.5
-            else:
-                c1, c2 = grad_colors[1], grad_colors[2]
-                f = (ratio - 0.5) / 0.5
-            return tuple(int(c1[i] + (c2[i] - c1[i]) * f) for i in range(3))
-        fill_len = int((bar_w - 10) * power_ratio)
-        if fill_len > 0:
-            for i in range(fill_len):
-                color = grad_col(i / (bar_w - 10))
-                pygame.draw.rect(screen, color, (bar_x + 5 + i, bar_y + 5, 1, bar_h - 10), border_radius=6)
-        pygame.draw.rect(screen, (200, 200, 200), (bar_x, bar_y, bar_w, bar_h), 3, border_radius=10)
-        power_text = font_small.render(f"Power: {int(game_state['shot_power'])}", True, (200, 200, 100))
-        screen.blit(power_text, (PANEL_WIDTH // 2 - power_text.get_width() // 2, bar_y - 28))
-
-def check_goal(game_state):
-    ball = game_state['ball']
-    if ball["x"] - BALL_RADIUS < 30 and HEIGHT // 2 - GOAL_WIDTH // 2 < ball["y"] < HEIGHT // 2 + GOAL_WIDTH // 2:
-        game_state['game_state'] = "scored"
-        game_state['winner'] = 2
-        game_state['score']["player2"] += 1
-        return True
-    if ball["x"] + BALL_RADIUS > WIDTH - 30 and HEIGHT // 2 - GOAL_WIDTH // 2 < ball["y"] < HEIGHT // 2 + GOAL_WIDTH // 2:
-        game_state['game_state'] = "scored"
-        game_state['winner'] = 1
-        game_state['score']["player1"] += 1
-        return True
-    return False
-
-def move_ball(game_state):
-    ball = game_state['ball']
-    ball["x"] += ball["vx"]
-    ball["y"] += ball["vy"]
-    ball["vx"] *= FRICTION
-    ball["vy"] *= FRICTION
-    if abs(ball["vx"]) < 0.1 and abs(ball["vy"]) < 0.1:
-        ball["vx"] = ball["vy"] = 0
-        return True
-    return False
-
-def handle_collisions(game_state):
-    ball = game_state['ball']
-    for player in game_state['players1'] + game_state['players2']:
-        dx = ball["x"] - player["x"]
-        dy = ball["y"] - player["y"]
-        dist = math.hypot(dx, dy)
-        if dist < PLAYER_RADIUS + BALL_RADIUS:
-            angle = math.atan2(dy, dx)
-            overlap = PLAYER_RADIUS + BALL_RADIUS - dist + 1
-            ball["x"] += math.cos(angle) * overlap
-            ball["y"] += math.sin(angle) * overlap
-            speed = math.hypot(ball["vx"], ball["vy"]) * 0.9 + 2.0
-            ball["vx"] = speed * math.cos(angle)
-            ball["vy"] = speed * math.sin(angle)
-
-def handle_boundary(game_state):
+        draw_power_bar(screen, game_state['shot_power'])
+
+POWER_BAR_RECT = pygame.Rect(PANEL_WIDTH // 2 - 160, PANEL_HEIGHT - 70, 320, 32)
+POWER_GRADIENT = [(70, 255, 70), (255, 215, 0), (255, 80, 80)]
+_power_bar = {}
+
+def build_power_bar():
+    # 力量条只画一次：底板、整条渐变、描边；每帧按力量裁剪渐变
+    bar_w, bar_h = POWER_BAR_RECT.size
+    base = pygame.Surface((bar_w, bar_h), pygame.SRCALPHA)
+    pygame.draw.rect(base, (70, 70, 70), (0, 0, bar_w, bar_h), border_radius=10)
+    gradient = pygame.Surface((bar_w - 10, bar_h - 10))
+    for i in range(bar_w - 10):
+        ratio = i / (bar_w - 10)
+        if ratio < 0.5:
+            c1, c2 = POWER_GRADIENT[0], POWER_GRADIENT[1]
+            f = ratio / 0.5
+        else:
+            c1, c2 = POWER_GRADIENT[1], POWER_GRADIENT[2]
+            f = (ratio - 0.5) / 0.5
+        color = tuple(int(c1[k] + (c2[k] - c1[k]) * f) for k in range(3))
+        pygame.draw.line(gradient, color, (i, 0), (i, bar_h - 11))
+    border = pygame.Surface((bar_w, bar_h), pygame.SRCALPHA)
+    pygame.draw.rect(border, (200, 200, 200), (0, 0, bar_w, bar_h), 3, border_radius=10)
+    _power_bar.update(base=base, gradient=gradient, border=border)
+
+def draw_power_bar(screen, shot_power):
+    if not _power_bar:
+        build_power_bar()
+    bar_x, bar_y = POWER_BAR_RECT.topleft
+    screen.blit(_power_bar["base"], (bar_x, bar_y))
+    power_ratio = min(1.0, shot_power / MAX_SHOT_POWER)
+    fill_len = int((POWER_BAR_RECT.width - 10) * power_ratio)
+    if fill_len > 0:
+        gradient = _power_bar["gradient"]
+        screen.blit(gradient, (bar_x + 5, bar_y + 5), (0, 0, fill_len, gradient.get_height()))
+    screen.blit(_power_bar["border"], (bar_x, bar_y))
+    power_text = render_text(font_small, f"Power: {int(shot_power)}", True, (200, 200, 100))
+    screen.blit(power_text, (PANEL_WIDTH // 2 - power_text.get_width() // 2, bar_y - 28))
+    return pygame.Rect(POWER_BAR_RECT.left, bar_y - 28, POWER_BAR_RECT.width, POWER_BAR_RECT.height + 28)
+
+INSTRUCTIONS = [
+    "Instructions:",
+    "Click on your player to select (when playing).",
+    "Arrow keys - Move selected player",
+    "Space - Charge/Shoot (release to shoot)",
+    "Shift - Slow move",
+    "R - Restart   H - Aim hint",
+    "ESC - Back to Menu"
+]
+# 每帧需要重画的 HUD 区域：顶栏+记分牌、底部力量条
+HUD_RECTS = [
+    pygame.Rect(0, 0, PANEL_WIDTH, 110),
+    pygame.Rect(PANEL_WIDTH // 2 - 170, PANEL_HEIGHT - 100, 340, 64),
+]
+
+# 静态背景层（底图、跑道、球场线、球门、操作说明）只在尺寸或主题变化时重建
+_background = {"key": None, "surface": None}
+
+def build_background(soccer_bg):
+    surf = display_format(pygame.Surface(screen.get_size()))
+    if soccer_bg:
+        surf.blit(soccer_bg, (0, 0))
+        overlay = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
+        overlay.fill((40, 60, 40, 70))
+        surf.blit(overlay, (0, 0))
+    else:
+        surf.fill((55, 85, 45))
+    draw_track(surf)
+    surf.fill(BACKGROUND, (FIELD_MARGIN_X, FIELD_MARGIN_Y, WIDTH, HEIGHT))
+    draw_field(surf)
+    for i, text in enumerate(INSTRUCTIONS):
+        instr = render_text(font_small, text, True, (200, 200, 200))
+        surf.blit(instr, (30, PANEL_HEIGHT - 210 + i * 28))
+    return surf
+
+def get_background(soccer_bg, theme=None):
+    key = (screen.get_size(), id(soccer_bg), theme)
+    if _background["key"] != key:
+        _background["surface"] = build_background(soccer_bg)
+        _background["key"] = key
+    return _background["surface"]
+
+def invalidate_background():
+    _background["key"] = None
+
+def dirty_rects(game_state):
+    # 球员、球和 HUD 本帧覆盖的屏幕区域
+    r = PLAYER_RADIUS + 10
+    rects = [pygame.Rect(field_x(int(p["x"])) - r, field_y(int(p["y"])) - r, r * 2, r * 2)
+             for p in game_state['players']]
+    r = BALL_RADIUS + 4
+    rects.extend(pygame.Rect(int(field_x(ball["x"])) - r, int(field_y(ball["y"])) - r, r * 2, r * 2)
+                 for ball in game_state['balls'])
+    rects.extend(HUD_RECTS)
+    return rects
+
+def aim_hint(game_state):
+    # 选中球员按当前方向射门（未蓄力时按满力）的预测：(球位置, 静止位置, 结果)
+    # 从真实站位推演，在后台线程里算，还没算好时返回 None（或同一球位的上一次预测）
+    # 结果表按 3 人制单球建表，训练模式不给提示
+    if game_state['game_state'] != "aiming" or len(game_state['players']) != 6 or len(game_state['balls']) > 1:
+        return None
+    team_idx = game_state['current_player']
+    player_idx = game_state['selected_player']
+    p = get_current_team(game_state)[player_idx]
     ball = game_state['ball']
-    in_left_goal = (
-        ball["x"] < 50 + BALL_RADIUS and
-        (HEIGHT // 2 - GOAL_WIDTH // 2 - BALL_RADIUS) < ball["y"] < (HEIGHT // 2 + GOAL_WIDTH // 2 + BALL_RADIUS)
-    )
-    in_right_goal = (
-        ball["x"] > WIDTH - 50 - BALL_RADIUS and
-        (HEIGHT // 2 - GOAL_WIDTH // 2 - BALL_RADIUS) < ball["y"] < (HEIGHT // 2 + GOAL_WIDTH // 2 + BALL_RADIUS)
+    dx, dy = ball["x"] - p["x"], ball["y"] - p["y"]
+    if not 0 < math.hypot(dx, dy) < 150:
+        return None
+    power = game_state['shot_power'] if game_state['charging_power'] and game_state['shot_power'] > 0 else MAX_SHOT_POWER
+    result = get_shot_predictor().submit(game_state, team_idx, player_idx, math.atan2(dy, dx), power)
+    if result is None:
+        return None
+    outcome, _, _, rest_x, rest_y = result
+    return (ball["x"], ball["y"]), (rest_x, rest_y), outcome
+
+def draw_aim_hint(screen, hint):
+    (bx, by), (rx, ry), outcome = hint
+    color = (120, 255, 120) if outcome == GOAL else (255, 90, 90) if outcome == OWN_GOAL else (255, 255, 255)
+    start = (int(field_x(bx)), int(field_y(by)))
+    end = (int(field_x(rx)), int(field_y(ry)))
+    if isinstance(screen, TextureScreen):
+        screen.draw_line(color, start, end, 2)
+    else:
+        pygame.draw.line(screen, color, start, end, 2)
+    screen.blit(hint_marker(color), (end[0] - 10, end[1] - 10))
+    return pygame.Rect(start, (0, 0)).union(pygame.Rect(end, (0, 0))).inflate(22, 22)
+
+_hint_markers = {}
+
+def hint_marker(color):
+    surf = _hint_markers.get(color)
+    if surf is None:
+        surf = _hint_markers[color] = pygame.Surface((20, 20), pygame.SRCALPHA)
+        pygame.draw.circle(surf, color, (10, 10), 8, 2)
+    return surf
+
+MOVE_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+def scene_key(game_state):
+    # 画面上可见内容的摘要，相同则本帧无需重画
+    return (
+        game_state['game_state'], game_state['current_player'], game_state['selected_player'],
+        game_state['shot_power'], game_state['score']["player1"], game_state['score']["player2"],
+        tuple((int(b["x"]), int(b["y"])) for b in game_state['balls']),
+        tuple((int(p["x"]), int(p["y"])) for p in game_state['players']),
     )
-    if not (in_left_goal or in_right_goal):
-        if ball["x"] < 50 + BALL_RADIUS:
-            ball["x"] = 50 + BALL_RADIUS
-            ball["vx"] = -ball["vx"] * 0.7
-        elif ball["x"] > WIDTH - 50 - BALL_RADIUS:
-            ball["x"] = WIDTH - 50 - BALL_RADIUS
-            ball["vx"] = -ball["vx"] * 0.7
-    if ball["y"] < 50 + BALL_RADIUS:
-        ball["y"] = 50 + BALL_RADIUS
-        ball["vy"] = -ball["vy"] * 0.7
-    elif ball["y"] > HEIGHT - 50 - BALL_RADIUS:
-        ball["y"] = HEIGHT - 50 - BALL_RADIUS
-        ball["vy"] = -ball["vy"] * 0.7
-
-def get_current_team(game_state):
-    return game_state['players1'] if game_state['current_player'] == 1 else game_state['players2']
 
 def draw_cool_sharp_button(surf, rect, label, selected=False, hover=False):
     x, y, w, h = rect
@@ -341,328 +496,481 @@ def draw_cool_sharp_button(surf, rect, label, selected=False, hover=False):
     for glow in range(10, 0, -3):
         glow_alpha = 24 if (hover or selected) else 10
         pygame.draw.polygon(surf, border_col + (glow_alpha,), [(px, py) for px, py in points], glow)
-    txt = font_medium.render(label, True, MENU_TEXT)
+    txt = render_text(font_medium, label, True, MENU_TEXT)
     surf.blit(txt, (x + w // 2 - txt.get_width() // 2, y + h // 2 - txt.get_height() // 2))
 
+MENU_ITEMS = [
+    {"label": "Player vs Player", "action": "pvp"},
+    {"label": "Player vs AI", "action": "vs_ai"},
+    {"label": "Practice 11v11", "action": "practice"},
+    {"label": "History", "action": "history"},
+    {"label": "Replay", "action": "replay"},
+    {"label": "Quit", "action": "quit"},
+]
+MENU_FPS = 30
+PRACTICE_PER_TEAM = 11
+PRACTICE_BALLS = 3
+# 菜单背景（底图+遮罩+标题）和各状态按钮只画一次
+_menu = {"background": None, "buttons": {}, "history_box": None}
+
+def build_menu_background():
+    menu_bg = assets.image("background.jpg", (PANEL_WIDTH, PANEL_HEIGHT))
+    surf = display_format(pygame.Surface(screen.get_size()))
+    if menu_bg:
+        surf.blit(menu_bg, (0, 0))
+        overlay = pygame.Surface((PANEL_WIDTH, PANEL_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((30, 40, 60, 80))
+        surf.blit(overlay, (0, 0))
+    else:
+        surf.fill((25, 25, 40))
+    title_str = "Soccer Collision"
+    title_font = assets.font(*MENU_TITLE_FONT)
+    for i in range(14, 0, -2):
+        col = (MENU_ACCENT2[0], MENU_ACCENT2[1], 255, 20 + i * 3)
+        glow = render_text(title_font, title_str, True, col)
+        surf.blit(glow, (PANEL_WIDTH // 2 - glow.get_width() // 2, 120 + i))
+    title_text = render_text(title_font, title_str, True, (255, 255, 255))
+    surf.blit(title_text, (PANEL_WIDTH // 2 - title_text.get_width() // 2, 120))
+    return surf
+
+def menu_button_rects():
+    btn_w, btn_h = 340, 80 if len(MENU_ITEMS) <= 5 else 70
+    btn_margin = 50 if len(MENU_ITEMS) <= 4 else 30 if len(MENU_ITEMS) <= 5 else 20
+    start_y = PANEL_HEIGHT // 2 - (len(MENU_ITEMS) * (btn_h + btn_margin)) // 2 + 60
+    return [pygame.Rect(PANEL_WIDTH // 2 - btn_w // 2, start_y + i * (btn_h + btn_margin), btn_w, btn_h)
+            for i in range(len(MENU_ITEMS))]
+
+def blit_menu_button(screen, rect, label, selected, hover):
+    # 按钮的叠加渐变依赖底下的背景，所以缓存的是“背景+按钮”合成后的整块区域
+    key = (tuple(rect), label, selected, hover)
+    pad = 8
+    surf = _menu["buttons"].get(key)
+    if surf is None:
+        surf = _menu["background"].subsurface(rect.inflate(pad * 2, pad * 2)).copy()
+        draw_cool_sharp_button(surf, pygame.Rect(pad, pad, rect.w, rect.h), label, selected=selected, hover=hover)
+        _menu["buttons"][key] = surf
+    screen.blit(surf, (rect.x - pad, rect.y - pad))
+
+def draw_history_panel(screen, history_lines):
+    box_w, box_h = 550, 420
+    box_x = PANEL_WIDTH // 2 - box_w // 2
+    box_y = PANEL_HEIGHT // 2 - box_h // 2 + 10
+    if _menu["history_box"] is None:
+        box = _menu["history_box"] = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
+        pygame.draw.rect(box, (255, 255, 255), (0, 0, box_w, box_h), border_radius=18)
+        pygame.draw.rect(box, (170, 170, 200), (0, 0, box_w, box_h), 4, border_radius=18)
+    screen.blit(_menu["history_box"], (box_x, box_y))
+    title = render_text(font_medium, "History", True, MENU_TEXT)
+    screen.blit(title, (PANEL_WIDTH // 2 - title.get_width() // 2, box_y + 20))
+    if history_lines:
+        for idx, line in enumerate(history_lines[:15]):
+            txt = render_text(font_small, f"{line}", True, MENU_TEXT)
+            screen.blit(txt, (box_x + 34, box_y + 70 + idx * 24))
+    else:
+        txt = render_text(font_small, "No record yet.", True, MENU_TEXT)
+        screen.blit(txt, (box_x + box_w // 2 - txt.get_width() // 2, box_y + box_h // 2))
+    tip = render_text(font_small, "Press ESC to return", True, (150, 150, 180))
+    screen.blit(tip, (box_x + box_w // 2 - tip.get_width() // 2, box_y + box_h - 40))
+
+def draw_menu(screen, background, rects, selected, hover_idx, history_lines=None):
+    screen.blit(background, (0, 0))
+    if history_lines is None:
+        for i, item in enumerate(MENU_ITEMS):
+            blit_menu_button(screen, rects[i], item["label"], i == selected, i == hover_idx)
+    else:
+        draw_history_panel(screen, history_lines)
+
 def menu_screen():
-    try:
-        menu_bg = pygame.image.load("background.jpg").convert()
-        menu_bg = pygame.transform.scale(menu_bg, (PANEL_WIDTH, PANEL_HEIGHT))
-    except Exception as e:
-        menu_bg = None
-        print("Menu background image not found or failed to load:", e)
-    menu_items = [
-        {"label": "Player vs Player", "action": "pvp"},
-        {"label": "Player vs AI", "action": "vs_ai"},
-        {"label": "History", "action": "history"},
-        {"label": "Quit", "action": "quit"},
-    ]
-    selected = 0
+    if _menu["background"] is None:
+        _menu["background"] = build_menu_background()
+    background = _menu["background"]
+    rects = menu_button_rects()
+    clock = pygame.time.Clock()
+
+    def button_at(pos):
+        for i, rect in enumerate(rects):
+            if rect.collidepoint(pos):
+                return i
+        return -1
+
+    hover_idx = button_at(pygame.mouse.get_pos())
+    selected = hover_idx if hover_idx != -1 else 0
     viewing_history = False
     history_lines = []
+    dirty = True
     while True:
-        if menu_bg:
-            screen.blit(menu_bg, (0, 0))
-            overlay = pygame.Surface((PANEL_WIDTH, PANEL_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((30, 40, 60, 80))
-            screen.blit(overlay, (0, 0))
-        else:
-            screen.fill((25, 25, 40))
-        title_str = "Soccer Collision"
-        for i in range(14, 0, -2):
-            col = (MENU_ACCENT2[0], MENU_ACCENT2[1], 255, 20 + i * 3)
-            glow = font_glow.render(title_str, True, col)
-            screen.blit(glow, (PANEL_WIDTH // 2 - glow.get_width() // 2, 120 + i))
-        title_text = font_menu_title.render(title_str, True, (255, 255, 255))
-        screen.blit(title_text, (PANEL_WIDTH // 2 - title_text.get_width() // 2, 120))
-        if not viewing_history:
-            btn_w, btn_h = 340, 80
-            btn_margin = 50
-            start_y = PANEL_HEIGHT // 2 - (len(menu_items) * (btn_h + btn_margin)) // 2 + 60
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            hover_idx = -1
-            for i, item in enumerate(menu_items):
-                bx = PANEL_WIDTH // 2 - btn_w // 2
-                by = start_y + i * (btn_h + btn_margin)
-                rect = pygame.Rect(bx, by, btn_w, btn_h)
-                is_hover = rect.collidepoint(mouse_x, mouse_y)
-                if is_hover: hover_idx = i
-                draw_cool_sharp_button(screen, rect, item["label"], selected=(i == selected), hover=is_hover)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key in (pygame.K_DOWN, pygame.K_s):
-                        selected = (selected + 1) % len(menu_items)
-                    elif event.key in (pygame.K_UP, pygame.K_w):
-                        selected = (selected - 1) % len(menu_items)
-                    elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
-                        action = menu_items[selected]["action"]
-                        if action == "history":
-                            viewing_history = True
-                            history_lines = load_history()
-                        else:
-                            return action
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    for i, item in enumerate(menu_items):
-                        bx = PANEL_WIDTH // 2 - btn_w // 2
-                        by = start_y + i * (btn_h + btn_margin)
-                        rect = pygame.Rect(bx, by, btn_w, btn_h)
-                        if rect.collidepoint(mouse_x, mouse_y):
-                            if item["action"] == "history":
-                                viewing_history = True
-                                history_lines = load_history()
-                            else:
-                                return item["action"]
-            if hover_idx != -1:
-                selected = hover_idx
-        else:
-            box_w, box_h = 550, 420
-            box_x = PANEL_WIDTH // 2 - box_w // 2
-            box_y = PANEL_HEIGHT // 2 - box_h // 2 + 10
-            pygame.draw.rect(screen, (255, 255, 255), (box_x, box_y, box_w, box_h), border_radius=18)
-            pygame.draw.rect(screen, (170, 170, 200), (box_x, box_y, box_w, box_h), 4, border_radius=18)
-            title = font_medium.render("History", True, MENU_TEXT)
-            screen.blit(title, (PANEL_WIDTH // 2 - title.get_width() // 2, box_y + 20))
-            if history_lines:
-                for idx, line in enumerate(history_lines[:15]):
-                    txt = font_small.render(f"{line}", True, MENU_TEXT)
-                    screen.blit(txt, (box_x + 34, box_y + 70 + idx * 24))
-            else:
-                txt = font_small.render("No record yet.", True, MENU_TEXT)
-                screen.blit(txt, (box_x + box_w // 2 - txt.get_width() // 2, box_y + box_h // 2))
-            tip = font_small.render("Press ESC to return", True, (150, 150, 180))
-            screen.blit(tip, (box_x + box_w // 2 - tip.get_width() // 2, box_y + box_h - 40))
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        viewing_history = False
-                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+        if dirty:
+            draw_menu(screen, background, rects, selected, hover_idx, history_lines if viewing_history else None)
+            present()
+            dirty = False
+            if not startup.done:
+                startup.finish("first menu frame")
+                if os.environ.get("SOCCER_PROFILE") == "1":
+                    print(startup.report())
+            clock.tick(MENU_FPS)
+        # 没有输入时阻塞等待，菜单停留期间几乎不占 CPU
+        for event in [pygame.event.wait()] + pygame.event.get():
+            if event.type == pygame.QUIT:
+                quit_game()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty = True
+            elif viewing_history:
+                if (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE) or \
+                        (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1):
                     viewing_history = False
-        pygame.display.flip()
-
-def ai_choose_player_and_move(game_state, team_idx):
-    team = game_state['players1'] if team_idx == 1 else game_state['players2']
-    ball = game_state['ball']
-    dists = [math.hypot(ball['x'] - p['x'], ball['y'] - p['y']) for p in team]
-    min_i = dists.index(min(dists))
-    game_state['selected_player'] = min_i
-    cur_player = team[min_i]
-    dx, dy = ball['x'] - cur_player['x'], ball['y'] - cur_player['y']
-    dist = math.hypot(dx, dy)
-    move_speed = PLAYER_SPEED
-    if dist > 40:
-        move_x = move_speed * dx / dist
-        move_y = move_speed * dy / dist
-        cur_player['x'] += move_x
-        cur_player['y'] += move_y
-        cur_player['x'] = max(60, min(WIDTH - 60, cur_player['x']))
-        cur_player['y'] = max(60, min(HEIGHT - 60, cur_player['y']))
-        return False
-    else:
-        return True
-
-def ai_charge_and_shoot(game_state, team_idx):
-    team = game_state['players1'] if team_idx == 1 else game_state['players2']
-    cur_player = team[game_state['selected_player']]
-    ball = game_state['ball']
-    dx, dy = ball['x'] - cur_player['x'], ball['y'] - cur_player['y']
-    dist = math.hypot(dx, dy)
-    if dist < 150:
-        angle = math.atan2(dy, dx)
-        if team_idx == 1:
-            tx, ty = WIDTH - 20, HEIGHT // 2 + random.randint(-40, 40)
-        else:
-            tx, ty = 20, HEIGHT // 2 + random.randint(-40, 40)
-        tdx, tdy = tx - ball['x'], ty - ball['y']
-        tdist = math.hypot(tdx, tdy)
-        if tdist > 0:
-            tdx, tdy = tdx / tdist, tdy / tdist
+                    dirty = True
+            elif event.type == pygame.MOUSEMOTION:
+                idx = button_at(event.pos)
+                if idx != hover_idx:
+                    hover_idx = idx
+                    if idx != -1:
+                        selected = idx
+                    dirty = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_DOWN, pygame.K_s):
+                    selected = (selected + 1) % len(MENU_ITEMS)
+                    dirty = True
+                elif event.key in (pygame.K_UP, pygame.K_w):
+                    selected = (selected - 1) % len(MENU_ITEMS)
+                    dirty = True
+                elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
+                    action = MENU_ITEMS[selected]["action"]
+                    if action != "history":
+                        return action
+                    viewing_history = True
+                    history_lines = load_history()
+                    dirty = True
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                idx = button_at(event.pos)
+                if idx != -1:
+                    action = MENU_ITEMS[idx]["action"]
+                    if action != "history":
+                        return action
+                    viewing_history = True
+                    history_lines = load_history()
+                    dirty = True
+
+def replay_screen(soccer_bg):
+    # 回放上一场：上/下键调速（1x-100x），空格暂停，暂停时左/右键逐帧后退/前进，Home 回到开头，ESC 返回菜单
+    try:
+        reader = ReplayReader(replay_file)
+    except (OSError, ValueError) as e:
+        print("No replay to show:", e)
+        return
+    player = ReplayPlayer(reader, rewind=REPLAY_REWIND)
+    clock = pygame.time.Clock()
+    timestep = FixedTimestep()
+    speed_idx = 0
+    paused = False
+    background = get_background(soccer_bg)
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                reader.close()
+                quit_game()
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_ESCAPE:
+                reader.close()
+                return
+            if paused and event.key == pygame.K_LEFT:
+                player.step_back()
+            elif paused and event.key == pygame.K_RIGHT:
+                player.advance(1)
+            elif event.key in (pygame.K_UP, pygame.K_RIGHT):
+                speed_idx = min(speed_idx + 1, len(REPLAY_SPEEDS) - 1)
+            elif event.key in (pygame.K_DOWN, pygame.K_LEFT):
+                speed_idx = max(speed_idx - 1, 0)
+            elif event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.key == pygame.K_HOME:
+                player.seek(0)
+        steps = timestep.advance()
+        if not paused and steps:
+            player.advance(REPLAY_SPEEDS[speed_idx] * steps)
+        state = player.sim.state
+        screen.blit(background, (0, 0))
+        draw_players(screen, state)
+        draw_ui(screen, state)
+        status = "Paused" if paused else "Replay x%d" % REPLAY_SPEEDS[speed_idx]
+        info = render_text(font_small, f"{status}   {player.step_index}/{reader.total_steps}", True, (255, 255, 200))
+        screen.blit(info, (30, PANEL_HEIGHT - 40))
+        present()
+        clock.tick(RENDER_FPS)
+
+ONLINE_STATUS = {WAITING: "Waiting for an opponent...", STARTED: "", OPPONENT_LEFT: "Opponent left the match"}
+
+_shades = {}
+
+def shade(screen, rgba, rect=None):
+    # 半透明遮罩：纹理后端直接做带混合的矩形填充（不经过纹理）；软件路径复用同色同尺寸的遮罩 Surface
+    if isinstance(screen, TextureScreen):
+        screen.shade(rgba, rect)
+        return
+    rect = pygame.Rect(rect) if rect is not None else screen.get_rect()
+    key = (rect.size, tuple(rgba))
+    surf = _shades.get(key)
+    if surf is None:
+        surf = _shades[key] = pygame.Surface(rect.size, pygame.SRCALPHA)
+        surf.fill(rgba)
+    screen.blit(surf, rect.topleft)
+
+def draw_goal_overlay(screen, game_state, prompt="Press Space to continue"):
+    shade(screen, (0, 0, 0, 150))
+    goal_text = render_text(font_large, f"Player {game_state['winner']} Scores!", True,
+                            PLAYER1_COLOR if game_state['winner'] == 1 else PLAYER2_COLOR)
+    screen.blit(goal_text, (PANEL_WIDTH // 2 - goal_text.get_width() // 2, PANEL_HEIGHT // 2 - 50))
+    score_text = render_text(font_medium,
+        f"Now: {game_state['score']['player1']} - {game_state['score']['player2']}",
+        True, (255, 255, 200))
+    screen.blit(score_text, (PANEL_WIDTH // 2 - score_text.get_width() // 2, PANEL_HEIGHT // 2 + 20))
+    if prompt:
+        continue_text = render_text(font_medium, prompt, True, (200, 200, 100))
+        screen.blit(continue_text, (PANEL_WIDTH // 2 - continue_text.get_width() // 2, PANEL_HEIGHT // 2 + 80))
+
+def online_screen(host, port, match_id=0):
+    # 联网对战：服务器推进物理，本地只发输入、画收到的最新局面；ESC 断开返回
+    try:
+        client = NetClient(host, port, match_id)
+    except OSError as e:
+        print(f"Cannot connect to {host}:{port}:", e)
+        return
+    clock = pygame.time.Clock()
+    background = get_background(field_image())
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                client.close()
+                quit_game()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                client.close()
+                return
+            gs = client.state
+            if gs['game_state'] == "scored" and event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                client.send_input(CONTINUE)
+            if not client.my_turn() or gs['game_state'] != "aiming":
+                continue
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                mx, my = event.pos[0] - FIELD_MARGIN_X, event.pos[1] - FIELD_MARGIN_Y
+                team = gs['players1'] if client.team == 1 else gs['players2']
+                for i, p in enumerate(team):
+                    if math.hypot(mx - p["x"], my - p["y"]) < PLAYER_RADIUS + 6:
+                        client.send_input(SELECT | i << SELECT_SHIFT)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                client.send_input(CHARGE)
+            if event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+                client.send_input(RELEASE)
+        keys = pygame.key.get_pressed()
+        held = 0
+        if client.my_turn():
+            held = ((keys[pygame.K_LEFT] and LEFT) | (keys[pygame.K_RIGHT] and RIGHT) | (keys[pygame.K_UP] and UP) |
+                    (keys[pygame.K_DOWN] and DOWN) | ((keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT]) and SLOW))
+        client.set_held(held)
+        screen.blit(background, (0, 0))
+        with client.lock:
+            draw_players(screen, client.state)
+            draw_ui(screen, client.state)
+        if not client.connected:
+            status = "Disconnected - press ESC"
         else:
-            tdx, tdy = math.cos(angle), math.sin(angle)
-        shot_power = random.uniform(10, 15)
-        game_state['ball']["vx"] = tdx * shot_power * 1.5
-        game_state['ball']["vy"] = tdy * shot_power * 1.5
-        game_state['game_state'] = "moving"
-        for pl in game_state['players1']:
-            pl["active"] = False
-        for pl in game_state['players2']:
-            pl["active"] = False
-        game_state['shot_power'] = 0
-        return True
-    return False
+            status = ONLINE_STATUS.get(client.status, "")
+            if client.team is not None:
+                side = "Blue" if client.team == 1 else "Red"
+                status = f"Match {client.match_id}  You: {side}   {status}"
+        info = render_text(font_small, status, True, (255, 255, 200))
+        screen.blit(info, (30, PANEL_HEIGHT - 40))
+        present()
+        clock.tick(RENDER_FPS)
+
+def init_profiler():
+    module = sys.modules[__name__]
+    profiler.add_targets(module, ("get_background", "draw_aim_hint", "draw_players", "draw_ui",
+                                  "dirty_rects", "render_text"))
+    profiler.add_targets(simulation, ("step_ball", "ai_choose_player_and_move", "ai_charge_and_shoot",
+                                      "ai_follow_plan"), "sim.")
+    profiler.add_targets(ShotPlanner, ("plan",), "ai.")
+    if os.environ.get("SOCCER_PROFILE") == "1":
+        profiler.enable()
 
 def main():
-    clock = pygame.time.Clock()
-    power_speed = 0.25
-    game_state = init_game()
+    init_render_fps()
+    init_display()
+    init_profiler()
+    scheduler = FrameScheduler(RENDER_FPS)
+    timestep = FixedTimestep()
+    interpolator = StateInterpolator()
+    sim = Simulator("pvp")
+    # 纹理后端不保留上一帧的画面，每帧从背景开始整屏拷贝
+    textured = isinstance(screen, TextureScreen)
+    game_state = sim.state
+    match = None
     in_menu = True
     mode = "pvp"
-    try:
-        soccer_bg = pygame.image.load("Soccer.jpg").convert()
-        soccer_bg = pygame.transform.scale(soccer_bg, (PANEL_WIDTH, PANEL_HEIGHT))
-    except Exception as e:
-        soccer_bg = None
-        print("Game background image not found or failed to load:", e)
+    full_redraw = True
+    prev_rects = []
+    show_aim_hint = False
 
     while True:
+        profiler.frame_start()
         if in_menu:
             menu_action = menu_screen()
             if menu_action == "pvp":
                 mode = "pvp"
-                game_state = init_game()
+                sim = RecordingSimulator(replay_file, mode)
                 in_menu = False
             elif menu_action == "vs_ai":
                 mode = "vs_ai"
-                game_state = init_game()
+                sim = RecordingSimulator(replay_file, mode, planner=get_planner())
+                in_menu = False
+            elif menu_action == "practice":
+                # 训练：11 人制、3 个球，双人轮流；多体物理不写回放
+                mode = "practice"
+                sim = PracticeSimulator(PRACTICE_PER_TEAM, PRACTICE_BALLS)
                 in_menu = False
             elif menu_action == "history":
                 continue
+            elif menu_action == "replay":
+                replay_screen(field_image())
+                continue
             elif menu_action == "quit":
-                pygame.quit()
-                sys.exit()
-        for event in pygame.event.get():
+                quit_game()
+            if mode != "practice":
+                # 训练模式的多球物理不走统计钩子
+                sim.analytics = get_analytics()
+            game_state = sim.state
+            match = open_history().new_match(mode_label(mode))
+            full_redraw = True
+            scheduler.invalidate()
+            timestep.reset()
+            # 停在菜单里的时间不算进这一帧
+            profiler.restart_frame()
+        keys = pygame.key.get_pressed()
+        idle = scheduler.is_idle(game_state, sim.is_ai_turn(), any(keys[k] for k in MOVE_KEYS))
+        events = scheduler.events(idle)
+        if idle:
+            # 等输入的时间不补物理
+            timestep.reset()
+            profiler.mark("idle")
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
+                finish_match(match, sim)
+                sim.close()
+                quit_game()
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                invalidate_background()
+                full_redraw = True
+                scheduler.invalidate()
             if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
-                game_state = init_game()
+                finish_match(match, sim)
+                sim.reset()
+                game_state = sim.state
+                match = open_history().new_match(mode_label(mode))
+            if event.type == HINT_READY and show_aim_hint:
+                scheduler.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                show_aim_hint = not show_aim_hint
+                scheduler.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+                scheduler.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and profiler.frames:
+                print("profile written to", *profiler.export())
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                finish_match(match, sim)
+                open_history().flush(wait=False)
+                sim.close()
                 in_menu = True
                 break
             if game_state['game_state'] == "scored" and event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                save_history(game_state['score']["player1"], game_state['score']["player2"], mode="PvP" if mode == "pvp" else "PvE")
-                reset_positions(game_state)
-                game_state['current_player'] = 2 if game_state['winner'] == 1 else 1
-                game_state['game_state'] = "aiming"
-                game_state['winner'] = None
-
-            if mode == "vs_ai":
-                human_player = 1
-                ai_player = 2
-            else:
-                human_player = 1
-                ai_player = -1
-
-            if game_state['game_state'] == "aiming":
-                if mode == "vs_ai" and game_state['current_player'] == 2:
-                    # 事件内不处理AI逻辑
-                    pass
-                else:
-                    # 玩家操作
-                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                        mx, my = event.pos
-                        mx_field = mx - FIELD_MARGIN_X
-                        my_field = my - FIELD_MARGIN_Y
-                        team = get_current_team(game_state)
-                        for i, p in enumerate(team):
-                            if math.hypot(mx_field - p["x"], my_field - p["y"]) < PLAYER_RADIUS + 6:
-                                game_state['selected_player'] = i
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE and not game_state['charging_power']:
-                        game_state['charging_power'] = True
-                        game_state['shot_power'] = 0
-                    if event.type == pygame.KEYUP and event.key == pygame.K_SPACE and game_state['charging_power']:
-                        game_state['charging_power'] = False
-                        team = get_current_team(game_state)
-                        cur_player = team[game_state['selected_player']]
-                        dx = game_state['ball']["x"] - cur_player["x"]
-                        dy = game_state['ball']["y"] - cur_player["y"]
-                        dist = math.hypot(dx, dy)
-                        if dist < 150 and game_state['shot_power'] > 0:
-                            dx /= dist
-                            dy /= dist
-                            game_state['ball']["vx"] = dx * game_state['shot_power'] * 1.5
-                            game_state['ball']["vy"] = dy * game_state['shot_power'] * 1.5
-                            game_state['game_state'] = "moving"
-                            for pl in game_state['players1']:
-                                pl["active"] = False
-                            for pl in game_state['players2']:
-                                pl["active"] = False
-                        game_state['shot_power'] = 0
+                sim.continue_after_goal()
+                interpolator.snap(game_state)
+
+            # 玩家操作；AI 回合由 sim.step() 处理
+            if game_state['game_state'] == "aiming" and not sim.is_ai_turn():
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    mx, my = event.pos
+                    idx = sim.player_at(mx - FIELD_MARGIN_X, my - FIELD_MARGIN_Y)
+                    if idx is not None:
+                        sim.select_player(idx)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                    sim.start_charge()
+                if event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+                    sim.release_shot()
 
         if in_menu:
             continue
 
+        profiler.mark("events")
         keys = pygame.key.get_pressed()
-        # --- AI逻辑每帧执行，不卡顿 ---
-        if game_state['game_state'] == "aiming":
-            if mode == "vs_ai" and game_state['current_player'] == 2:
-                ready = ai_choose_player_and_move(game_state, 2)
-                if ready:
-                    ai_charge_and_shoot(game_state, 2)
-            else:
-                cur_player = get_current_team(game_state)[game_state['selected_player']]
-                cur_player["active"] = True
-                speed = PLAYER_SPEED * (0.7 if keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT] else 1)
-                if keys[pygame.K_LEFT] and cur_player["x"] > 60:
-                    cur_player["x"] -= speed
-                if keys[pygame.K_RIGHT] and cur_player["x"] < WIDTH - 60:
-                    cur_player["x"] += speed
-                if keys[pygame.K_UP] and cur_player["y"] > 60:
-                    cur_player["y"] -= speed
-                if keys[pygame.K_DOWN] and cur_player["y"] < HEIGHT - 60:
-                    cur_player["y"] += speed
-                if game_state['charging_power']:
-                    game_state['shot_power'] += power_speed
-                    if game_state['shot_power'] > MAX_SHOT_POWER:
-                        game_state['shot_power'] = MAX_SHOT_POWER
-        elif game_state['game_state'] == "moving":
-            ball_stopped = move_ball(game_state)
-            handle_collisions(game_state)
-            handle_boundary(game_state)
-            scored = check_goal(game_state)
-            if ball_stopped and not scored:
-                game_state['current_player'] = 2 if game_state['current_player'] == 1 else 1
-                game_state['game_state'] = "aiming"
-                game_state['shot_power'] = 0
-                game_state['charging_power'] = False
-                for pl in game_state['players1']:
-                    pl["active"] = False
-                for pl in game_state['players2']:
-                    pl["active"] = False
-
-        if soccer_bg:
-            screen.blit(soccer_bg, (0, 0))
-            overlay = pygame.Surface((PANEL_WIDTH, PANEL_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((40, 60, 40, 70))
-            screen.blit(overlay, (0, 0))
+        # 固定步长：走位、蓄力、AI 和球的运动都按物理步推进，与本帧画了多久无关
+        for _ in range(timestep.advance()):
+            if game_state['game_state'] == "aiming" and not sim.is_ai_turn():
+                sim.move_selected(keys[pygame.K_RIGHT] - keys[pygame.K_LEFT], keys[pygame.K_DOWN] - keys[pygame.K_UP],
+                                  slow=keys[pygame.K_LSHIFT] or keys[pygame.K_RSHIFT])
+            interpolator.save(game_state)
+            was_scored = game_state['game_state'] == "scored"
+            if sim.step() == "scored" and not was_scored:
+                save_goal(match, game_state)
+        profiler.mark("simulate")
+
+        # 画上一步与当前一步之间的插值位置；接下来要停下等输入时直接画当前状态，不留半步的残影
+        settled = scheduler.is_idle(game_state, sim.is_ai_turn(), any(keys[k] for k in MOVE_KEYS))
+        view = interpolator.view(game_state, 1.0 if settled else timestep.alpha())
+        if not scheduler.should_render(scene_key(view)) and not full_redraw:
+            scheduler.tick()
+            profiler.mark("sleep")
+            continue
+        background = get_background(field_image())
+        if full_redraw or textured or game_state['game_state'] == "scored":
+            screen.blit(background, (0, 0))
         else:
-            screen.fill((55, 85, 45))
-        draw_track(screen)
-        field_surface = pygame.Surface((WIDTH, HEIGHT))
-        field_surface.fill(BACKGROUND)
-        screen.blit(field_surface, (FIELD_MARGIN_X, FIELD_MARGIN_Y))
-        draw_field(screen)
-        draw_players(screen, game_state)
+            for rect in prev_rects:
+                screen.blit(background, rect, rect)
+        profiler.mark("background")
+        hint = aim_hint(game_state) if show_aim_hint and not sim.is_ai_turn() else None
+        hint_rect = draw_aim_hint(screen, hint) if hint else None
+        draw_players(screen, view)
+        profiler.mark("sprites")
         draw_ui(screen, game_state)
-        instructions = [
-            "Instructions:",
-            "Click on your player to select (when playing).",
-            "Arrow keys - Move selected player",
-            "Space - Charge/Shoot (release to shoot)",
-            "Shift - Slow move",
-            "R - Restart",
-            "ESC - Back to Menu"
-        ]
-        for i, text in enumerate(instructions):
-            instr = font_small.render(text, True, (200, 200, 200))
-            screen.blit(instr, (30, PANEL_HEIGHT - 210 + i * 28))
+        rects = dirty_rects(view)
+        if hint_rect:
+            rects.append(hint_rect)
+        profiler.mark("hud")
         if game_state['game_state'] == "scored":
-            overlay = pygame.Surface((PANEL_WIDTH, PANEL_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 150))
-            screen.blit(overlay, (0, 0))
-            goal_text = font_large.render(f"Player {game_state['winner']} Scores!", True,
-                                          PLAYER1_COLOR if game_state['winner'] == 1 else PLAYER2_COLOR)
-            screen.blit(goal_text, (PANEL_WIDTH // 2 - goal_text.get_width() // 2, PANEL_HEIGHT // 2 - 50))
-            score_text = font_medium.render(
-                f"Now: {game_state['score']['player1']} - {game_state['score']['player2']}",
-                True, (255, 255, 200))
-            screen.blit(score_text, (PANEL_WIDTH // 2 - score_text.get_width() // 2, PANEL_HEIGHT // 2 + 20))
-            continue_text = font_medium.render("Press Space to continue", True, (200, 200, 100))
-            screen.blit(continue_text, (PANEL_WIDTH // 2 - continue_text.get_width() // 2, PANEL_HEIGHT // 2 + 80))
-        pygame.display.flip()
-        clock.tick(60)
+            draw_goal_overlay(screen, game_state)
+            full_redraw = True
+        if profiler.enabled:
+            rects.append(profiler.draw_overlay(screen))
+            profiler.mark("overlay")
+        if full_redraw:
+            present()
+            # 进球遮罩盖住了整个画面，离开进球状态时需要整屏重画
+            full_redraw = game_state['game_state'] == "scored"
+        else:
+            # 只提交上一帧和本帧被画过的区域
+            present(prev_rects + rects)
+        prev_rects = rects
+        profiler.mark("present")
+        scheduler.tick()
+        profiler.mark("sleep")
+
+def run_online(address, match_id=0):
+    # python game.py --connect HOST[:PORT] [MATCH_ID]
+    host, _, port = address.partition(":")
+    init_render_fps()
+    init_display()
+    online_screen(host or "127.0.0.1", int(port or DEFAULT_PORT), match_id)
+    quit_game()
 
 if __name__ == "__main__":
+    # PyInstaller 打包版里 multiprocessing 的子进程会重新执行游戏本身，必须最先调用
+    multiprocessing.freeze_support()
+    while len(sys.argv) > 2 and sys.argv[1] in ("--renderer", "--fps"):
+        if sys.argv[1] == "--renderer":
+            RENDERER = sys.argv[2]
+        else:
+            RENDER_FPS = sys.argv[2]
+        del sys.argv[1:3]
+    if len(sys.argv) > 2 and sys.argv[1] == "--connect":
+        run_online(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 0)
     main()
\ No newline at end of file
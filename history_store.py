@@ -0,0 +1,232 @@
+import os
+import pathlib
+import sqlite3
+import time
+
+# 比赛记录库：每场比赛一行，每个进球一行，另有按模式预先累计的胜负统计
+# 旧版 soccer_history.txt（每进一球追加一行比分）在首次打开时一次性导入
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    started_at REAL,
+    ended_at REAL,
+    score1 INTEGER NOT NULL DEFAULT 0,
+    score2 INTEGER NOT NULL DEFAULT 0,
+    finished INTEGER NOT NULL DEFAULT 0,
+    legacy INTEGER NOT NULL DEFAULT 0,
+    key TEXT
+);
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY,
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    t REAL,
+    scorer INTEGER NOT NULL,
+    score1 INTEGER NOT NULL,
+    score2 INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS goals_match ON goals(match_id);
+CREATE TABLE IF NOT EXISTS mode_stats (
+    mode TEXT PRIMARY KEY,
+    matches INTEGER NOT NULL DEFAULT 0,
+    wins1 INTEGER NOT NULL DEFAULT 0,
+    wins2 INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    goals1 INTEGER NOT NULL DEFAULT 0,
+    goals2 INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+LEGACY_MODE = "PvP"
+
+def parse_legacy_line(line):
+    # "PvE | 1:0" 或更早的 "1 : 0"（没有模式，按 PvP 处理）
+    mode = LEGACY_MODE
+    if "|" in line:
+        mode, line = line.split("|", 1)
+        mode = mode.strip() or LEGACY_MODE
+    a, b = line.split(":", 1)
+    return mode, int(a), int(b)
+
+
+class HistoryStore:
+    def __init__(self, path="soccer_history.db", legacy_path=None, readonly=False):
+        self.path = path
+        if readonly:
+            # 只读连接：不建表、不改 PRAGMA，不会去等写入方的锁；库要已经存在
+            self.conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True,
+                                        check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL：后台线程写入时，菜单里的读取不会被阻塞
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(matches)")]
+        if "key" not in columns:
+            self.conn.execute("ALTER TABLE matches ADD COLUMN key TEXT")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS matches_key ON matches(key)")
+        if legacy_path:
+            self.migrate_legacy(legacy_path)
+
+    def close(self):
+        self.conn.close()
+
+    def new_match(self, mode, started_at=None, key=None):
+        # 第一个进球时才写入数据库，没有进球的比赛不留记录
+        return {"id": None, "key": key, "mode": mode, "started_at": started_at or time.time(), "finished": False}
+
+    def record_goal(self, match, scorer, score1, score2, t=None):
+        with self.conn:
+            self._record_goal(match, scorer, score1, score2, t or time.time())
+
+    def finish_match(self, match, t=None):
+        with self.conn:
+            self._finish_match(match, t or time.time())
+
+    def apply(self, events, seq=None):
+        # 一个事务写入一批事件，并记下已写入的日志序号
+        with self.conn:
+            for event, match, args in events:
+                if event == "goal":
+                    self._record_goal(match, *args)
+                elif event == "finish":
+                    self._finish_match(match, *args)
+            if seq is not None:
+                self.conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('journal_seq', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(seq),))
+
+    def journal_seq(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'journal_seq'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _match_id(self, match):
+        if match["id"] is None and match.get("key") is not None:
+            row = self.conn.execute("SELECT id FROM matches WHERE key = ?", (match["key"],)).fetchone()
+            if row:
+                match["id"] = row[0]
+        return match["id"]
+
+    def _record_goal(self, match, scorer, score1, score2, t):
+        if self._match_id(match) is None:
+            cur = self.conn.execute(
+                "INSERT INTO matches (mode, started_at, key) VALUES (?, ?, ?)",
+                (match["mode"], match["started_at"], match.get("key")))
+            match["id"] = cur.lastrowid
+            self.conn.execute(
+                "INSERT INTO mode_stats (mode, matches) VALUES (?, 1) "
+                "ON CONFLICT(mode) DO UPDATE SET matches = matches + 1", (match["mode"],))
+        self.conn.execute(
+            "INSERT INTO goals (match_id, t, scorer, score1, score2) VALUES (?, ?, ?, ?, ?)",
+            (match["id"], t, scorer, score1, score2))
+        self.conn.execute(
+            "UPDATE matches SET score1 = ?, score2 = ?, ended_at = ? WHERE id = ?",
+            (score1, score2, t, match["id"]))
+        self.conn.execute(
+            "UPDATE mode_stats SET goals1 = goals1 + ?, goals2 = goals2 + ? WHERE mode = ?",
+            (1 if scorer == 1 else 0, 1 if scorer == 2 else 0, match["mode"]))
+
+    def _finish_match(self, match, t):
+        if self._match_id(match) is None or match["finished"]:
+            return
+        match["finished"] = True
+        cur = self.conn.execute(
+            "UPDATE matches SET finished = 1, ended_at = ? WHERE id = ? AND finished = 0", (t, match["id"]))
+        if cur.rowcount:
+            self._count_result(match["id"])
+
+    def _count_result(self, match_id):
+        mode, s1, s2 = self.conn.execute(
+            "SELECT mode, score1, score2 FROM matches WHERE id = ?", (match_id,)).fetchone()
+        column = "wins1" if s1 > s2 else "wins2" if s2 > s1 else "draws"
+        self.conn.execute(f"UPDATE mode_stats SET {column} = {column} + 1 WHERE mode = ?", (mode,))
+
+    def recent(self, limit=15, before_id=None):
+        # 按主键倒序翻页，只读取一页的数据
+        if before_id is None:
+            rows = self.conn.execute(
+                "SELECT id, mode, started_at, ended_at, score1, score2, finished FROM matches "
+                "ORDER BY id DESC LIMIT ?", (limit,))
+        else:
+            rows = self.conn.execute(
+                "SELECT id, mode, started_at, ended_at, score1, score2, finished FROM matches "
+                "WHERE id < ? ORDER BY id DESC LIMIT ?", (before_id, limit))
+        keys = ("id", "mode", "started_at", "ended_at", "score1", "score2", "finished")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def goals(self, match_id):
+        rows = self.conn.execute(
+            "SELECT t, scorer, score1, score2 FROM goals WHERE match_id = ? ORDER BY id", (match_id,))
+        return [{"t": t, "scorer": scorer, "score1": s1, "score2": s2} for t, scorer, s1, s2 in rows]
+
+    def aggregates(self):
+        keys = ("matches", "wins1", "wins2", "draws", "goals1", "goals2")
+        rows = self.conn.execute("SELECT mode, " + ", ".join(keys) + " FROM mode_stats ORDER BY mode")
+        return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+    def migrate_legacy(self, legacy_path):
+        key = "legacy:" + os.path.abspath(legacy_path)
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            return 0
+        if not os.path.exists(legacy_path):
+            return 0
+        # 旧文件每进一球记一行：比分在同一模式下恰好一方 +1 视为同一场的下一球，否则是新比赛
+        next_id = (self.conn.execute("SELECT MAX(id) FROM matches").fetchone()[0] or 0) + 1
+        matches = []
+        goals = []
+        stats = {}
+        last = None
+        with open(legacy_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    mode, s1, s2 = parse_legacy_line(line)
+                except ValueError:
+                    continue
+                st = stats.setdefault(mode, [0, 0, 0, 0, 0, 0])
+                scorer = None
+                if last is not None and last[0] == mode:
+                    if (s1, s2) == (last[1] + 1, last[2]):
+                        scorer = 1
+                    elif (s1, s2) == (last[1], last[2] + 1):
+                        scorer = 2
+                if scorer is None:
+                    matches.append([next_id + len(matches), mode, s1, s2])
+                    st[0] += 1
+                    st[4] += s1
+                    st[5] += s2
+                    scorer = 1 if s1 >= s2 else 2
+                else:
+                    matches[-1][2:] = [s1, s2]
+                    st[3 + scorer] += 1
+                goals.append((matches[-1][0], scorer, s1, s2))
+                last = (mode, s1, s2)
+        for _, mode, s1, s2 in matches:
+            stats[mode][1 if s1 > s2 else 2 if s2 > s1 else 3] += 1
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO matches (id, mode, score1, score2, finished, legacy) VALUES (?, ?, ?, ?, 1, 1)",
+                matches)
+            self.conn.executemany(
+                "INSERT INTO goals (match_id, scorer, score1, score2) VALUES (?, ?, ?, ?)", goals)
+            self.conn.executemany(
+                "INSERT INTO mode_stats (mode, matches, wins1, wins2, draws, goals1, goals2) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(mode) DO UPDATE SET "
+                "matches = matches + excluded.matches, wins1 = wins1 + excluded.wins1, "
+                "wins2 = wins2 + excluded.wins2, draws = draws + excluded.draws, "
+                "goals1 = goals1 + excluded.goals1, goals2 = goals2 + excluded.goals2",
+                [(mode,) + tuple(st) for mode, st in stats.items()])
+            self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (key, str(len(goals))))
+        return len(goals)
+
+def format_match(row):
+    line = f"{row['mode']} | {row['score1']}:{row['score2']}"
+    if row["started_at"]:
+        line = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["started_at"])) + "   " + line
+    return line
@@ -0,0 +1,276 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from history_store import HistoryStore
+
+# 比赛记录的后台写入：游戏循环只把事件放进有界队列，磁盘读写都在写入线程里完成
+# 事件先追加到日志文件（长度+CRC 分帧），再按批写入 SQLite；崩溃后重启时回放未提交的部分
+RECORD_HEADER = struct.Struct("<II")
+
+def encode_record(record):
+    payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_journal(path):
+    # 返回 (完整记录列表, 有效长度)；末尾被截断或校验失败的记录丢弃
+    records = []
+    good = 0
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return records, 0
+    while good + RECORD_HEADER.size <= len(data):
+        length, crc = RECORD_HEADER.unpack_from(data, good)
+        start = good + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        try:
+            records.append(json.loads(payload))
+        except ValueError:
+            break
+        good = start + length
+    return records, good
+
+
+class HistoryWriter:
+    def __init__(self, db_path, journal_path=None, legacy_path=None, maxsize=256,
+                 flush_interval=0.5, fsync_interval=2.0):
+        self.db_path = db_path
+        self.journal_path = journal_path or db_path + ".journal"
+        self.legacy_path = legacy_path
+        self.flush_interval = flush_interval
+        # fsync_interval 为 0 时每批都 fsync，None 时只在 flush/关闭时 fsync
+        self.fsync_interval = fsync_interval
+        self.queue = queue.Queue(maxsize)
+        self.session = "%x-%x" % (int(time.time() * 1000), os.getpid())
+        self.dropped = 0
+        self.written = 0
+        self.recovered = 0
+        self.error = None
+        self._next_key = 0
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._reader = None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # ---- 游戏线程调用：只入队，不碰磁盘 ----
+    def new_match(self, mode):
+        self._next_key += 1
+        return {"key": "%s:%d" % (self.session, self._next_key), "mode": mode,
+                "started_at": time.time(), "finished": False}
+
+    def record_goal(self, match, scorer, score1, score2):
+        self._put(("goal", match, (scorer, score1, score2, time.time())))
+
+    def finish_match(self, match):
+        if match is None or match["finished"]:
+            return
+        match["finished"] = True
+        self._put(("finish", match, (time.time(),)))
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            print("History queue full, dropping event:", item[0])
+
+    def flush(self, wait=True, timeout=2.0):
+        # 请求写入线程立刻提交并 fsync；wait=False 时只发请求不等待。超时返回 False，游戏线程不会无限期等待
+        done = threading.Event()
+        try:
+            self.queue.put(("flush", done, None), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout) if wait else True
+
+    def close(self, timeout=5.0):
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self.queue.put(("stop", done, None), timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def recent(self, limit=15, before_id=None):
+        # 读取走独立的只读连接（WAL 模式下不会被写入线程阻塞）
+        return self._read().recent(limit, before_id)
+
+    def aggregates(self):
+        return self._read().aggregates()
+
+    def _read(self):
+        # 建表、迁移都在写入线程里做完；读连接不跑 DDL 和 PRAGMA，打开时也不会等写锁
+        self._ready.wait(5.0)
+        if self._reader is None:
+            self._reader = HistoryStore(self.db_path, readonly=True)
+        return self._reader
+
+    # ---- 写入线程 ----
+    def _run(self):
+        try:
+            store = HistoryStore(self.db_path, legacy_path=self.legacy_path)
+            seq = self._recover(store)
+        except Exception as e:
+            self.error = e
+            print("Error opening history:", e)
+            self._ready.set()
+            self._drain_without_store()
+            return
+        self._ready.set()
+        try:
+            journal = open(self.journal_path, "ab")
+        except OSError as e:
+            journal = self._journal_failed(None, e)
+        try:
+            self._loop(store, journal, seq)
+        except Exception as e:
+            # 意外错误也不能让游戏线程卡在 flush/close 上：之后只消费队列、唤醒等待者
+            self.error = e
+            print("History writer stopped:", e)
+            self._drain_without_store()
+        finally:
+            store.close()
+
+    def _loop(self, store, journal, seq):
+        matches = {}
+        pending = []
+        deadline = None
+        last_fsync = time.monotonic()
+        unsynced = False
+        running = True
+        while running:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            waiters = []
+            force = False
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            try:
+                while item is not None:
+                    kind, payload, args = item
+                    if kind in ("flush", "stop"):
+                        waiters.append(payload)
+                        force = True
+                        running = running and kind != "stop"
+                    else:
+                        seq += 1
+                        match = payload
+                        if journal is not None:
+                            try:
+                                journal.write(encode_record({
+                                    "seq": seq, "event": kind, "key": match["key"], "mode": match["mode"],
+                                    "started_at": match["started_at"], "args": list(args)}))
+                                unsynced = True
+                            except OSError as e:
+                                journal = self._journal_failed(journal, e)
+                                unsynced = False
+                        pending.append((kind, self._store_match(matches, match), args))
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        item = None
+                now = time.monotonic()
+                if unsynced:
+                    try:
+                        journal.flush()
+                        if force or self.fsync_interval == 0 or \
+                                (self.fsync_interval is not None and now - last_fsync >= self.fsync_interval):
+                            os.fsync(journal.fileno())
+                            last_fsync = now
+                            unsynced = False
+                    except OSError as e:
+                        journal = self._journal_failed(journal, e)
+                        unsynced = False
+                if pending and (force or now >= deadline):
+                    try:
+                        store.apply(pending, seq)
+                        self.written += len(pending)
+                        pending = []
+                        deadline = None
+                    except Exception as e:
+                        self.error = e
+                        print("Error saving history:", e)
+                        deadline = time.monotonic() + self.flush_interval
+                    else:
+                        # 全部提交后日志可以清空；若清空前崩溃，回放时按序号跳过已提交的记录
+                        if journal is not None and self.queue.empty():
+                            try:
+                                journal.truncate(0)
+                                journal.seek(0)
+                            except OSError as e:
+                                journal = self._journal_failed(journal, e)
+            finally:
+                for done in waiters:
+                    done.set()
+        if journal is not None:
+            try:
+                journal.close()
+            except OSError:
+                pass
+
+    def _journal_failed(self, journal, error):
+        # 日志写不进去（磁盘满、被杀毒软件锁住）：记下错误，之后不再写日志，事件照常按批写入数据库，
+        # 只是失去了崩溃后的补写保护
+        self.error = error
+        print("History journal disabled:", error)
+        if journal is not None:
+            try:
+                journal.close()
+            except OSError:
+                pass
+        return None
+
+    def _store_match(self, matches, match):
+        # 游戏线程的 match 字典只在本线程里映射成数据库行，避免跨线程共享可变状态
+        m = matches.get(match["key"])
+        if m is None:
+            m = {"id": None, "key": match["key"], "mode": match["mode"],
+                 "started_at": match["started_at"], "finished": False}
+            matches[match["key"]] = m
+        return m
+
+    def _recover(self, store):
+        applied = store.journal_seq()
+        records, good = read_journal(self.journal_path)
+        if os.path.exists(self.journal_path) and good < os.path.getsize(self.journal_path):
+            print("History journal: discarding partial trailing record")
+        matches = {}
+        events = []
+        seq = applied
+        for r in records:
+            if r["seq"] <= applied:
+                continue
+            match = self._store_match(matches, r)
+            events.append((r["event"], match, tuple(r["args"])))
+            seq = max(seq, r["seq"])
+        if events:
+            store.apply(events, seq)
+            self.recovered = len(events)
+        with open(self.journal_path, "wb"):
+            pass
+        return seq
+
+    def _drain_without_store(self):
+        # 数据库打不开时仍然消费队列并唤醒等待者，保证游戏不会卡住
+        while True:
+            kind, payload, _ = self.queue.get()
+            if kind in ("flush", "stop"):
+                payload.set()
+                if kind == "stop":
+                    return
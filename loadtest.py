@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from netcode import (
+    DEFAULT_PORT, JOIN, INPUT, HELD, BYE, WELCOME, STATUS, SNAPSHOT, STARTED, OPPONENT_LEFT,
+    JOIN_MSG, INPUT_MSG, HELD_MSG, WELCOME_MSG, STATUS_MSG, SnapshotDecoder, frame, read_frame,
+)
+from replay import LEFT, RIGHT, UP, DOWN, CHARGE, RELEASE, CONTINUE, SELECT, SELECT_SHIFT
+from simulation import WIDTH, HEIGHT, PLAYER_SPEED, init_game, approach_point
+
+# 压力测试：在一个进程里用 asyncio 开几百个模拟玩家连到服务器，两两自动配对，
+# 轮到自己时选人、走到球后、蓄力、射门，进球后发开球；统计收到的快照频率、大小和间隔抖动
+WALK_TIMEOUT = 120
+ARRIVE_DIST = PLAYER_SPEED
+
+
+class Bot:
+    def __init__(self, rng):
+        self.rng = rng
+        self.team = None
+        self.state = init_game()
+        self.decoder = None
+        self.started = False
+        self.phase = "idle"
+        self.target = None
+        self.timer = 0
+        self.held = 0
+        self.continued_at = None
+        self.snapshots = 0
+        self.bytes = 0
+        self.gaps = []
+        self.last_at = None
+        self.shots = 0
+
+    def on_snapshot(self, payload, now):
+        self.decoder.apply(payload, self.state)
+        self.snapshots += 1
+        self.bytes += len(payload)
+        if self.last_at is not None:
+            self.gaps.append(now - self.last_at)
+        self.last_at = now
+        return self.decide()
+
+    def decide(self):
+        # 返回要发送的消息列表
+        gs = self.state
+        out = []
+        if gs['game_state'] == "scored":
+            score = (gs['score']["player1"], gs['score']["player2"])
+            # 服务器只接受被进球一方的开球
+            if self.continued_at != score and gs['winner'] != self.team:
+                self.continued_at = score
+                out.append(frame(INPUT, INPUT_MSG.pack(CONTINUE)))
+            return out
+        if not self.started or gs['current_player'] != self.team or gs['game_state'] != "aiming":
+            self.phase = "idle"
+            return self.hold(0, out)
+        team = gs['players1'] if self.team == 1 else gs['players2']
+        if self.phase == "idle":
+            goal_x = WIDTH - 30 if self.team == 1 else 30
+            ball = gs['ball']
+            angle = math.atan2(HEIGHT / 2 - ball["y"], goal_x - ball["x"]) + self.rng.uniform(-0.4, 0.4)
+            self.target = approach_point(ball, angle)
+            idx = min(range(len(team)), key=lambda i: math.hypot(team[i]["x"] - self.target[0],
+                                                                  team[i]["y"] - self.target[1]))
+            out.append(frame(INPUT, INPUT_MSG.pack(SELECT | idx << SELECT_SHIFT)))
+            self.phase, self.timer = "walk", 0
+        elif self.phase == "walk":
+            p = team[gs['selected_player']]
+            dx, dy = self.target[0] - p["x"], self.target[1] - p["y"]
+            self.timer += 1
+            if math.hypot(dx, dy) <= ARRIVE_DIST or self.timer > WALK_TIMEOUT:
+                self.hold(0, out)
+                out.append(frame(INPUT, INPUT_MSG.pack(CHARGE)))
+                self.phase, self.timer = "charge", self.rng.randint(5, 30)
+            else:
+                bits = ((dx > ARRIVE_DIST / 2 and RIGHT) | (dx < -ARRIVE_DIST / 2 and LEFT) |
+                        (dy > ARRIVE_DIST / 2 and DOWN) | (dy < -ARRIVE_DIST / 2 and UP))
+                self.hold(bits, out)
+        elif self.phase == "charge":
+            self.timer -= 1
+            if self.timer <= 0:
+                out.append(frame(INPUT, INPUT_MSG.pack(RELEASE)))
+                self.shots += 1
+                self.phase, self.timer = "shot", 10
+        elif self.phase == "shot":
+            # 射门被服务器忽略（例如蓄力没生效）时过一会儿重来
+            self.timer -= 1
+            if self.timer <= 0:
+                self.phase = "idle"
+        return out
+
+    def hold(self, bits, out):
+        if bits != self.held:
+            self.held = bits
+            out.append(frame(HELD, HELD_MSG.pack(bits)))
+        return out
+
+    async def run(self, host, port, deadline):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(frame(JOIN, JOIN_MSG.pack(0)))
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    kind, payload = await asyncio.wait_for(read_frame(reader), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if kind == SNAPSHOT:
+                    for data in self.on_snapshot(payload, loop.time()):
+                        writer.write(data)
+                elif kind == WELCOME:
+                    _, self.team, n_players, _, _ = WELCOME_MSG.unpack(payload)
+                    self.decoder = SnapshotDecoder(n_players)
+                elif kind == STATUS:
+                    status = STATUS_MSG.unpack(payload)[0]
+                    self.started = status == STARTED
+                    if status == OPPONENT_LEFT:
+                        break
+            writer.write(frame(BYE))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_bots(host, port, clients, duration, ramp, seed):
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    bots = [Bot(random.Random(rng.random())) for _ in range(clients)]
+    deadline = loop.time() + ramp + duration
+    start = time.monotonic()
+    tasks = []
+    for i, bot in enumerate(bots):
+        tasks.append(asyncio.create_task(bot.run(host, port, deadline)))
+        # 逐步建立连接，避免一瞬间几百个 SYN
+        if ramp:
+            await asyncio.sleep(ramp / clients)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    # 连接是在 ramp 内陆续建立的，平均每个客户端少算 ramp / 2 秒
+    return bots, errors, time.monotonic() - start - ramp / 2
+
+def summarize(bots, errors, seconds):
+    gaps = sorted(g for b in bots for g in b.gaps)
+    snapshots = sum(b.snapshots for b in bots)
+    total_bytes = sum(b.bytes for b in bots)
+    started = sum(1 for b in bots if b.snapshots)
+    goals = sum(b.state['score']["player1"] + b.state['score']["player2"] for b in bots if b.team == 1)
+
+    def pct(q):
+        return gaps[min(len(gaps) - 1, int(len(gaps) * q))] * 1000 if gaps else 0.0
+    return {
+        "clients": len(bots),
+        "playing": started,
+        "errors": len(errors),
+        "snapshots": snapshots,
+        "snapshots_per_client_per_sec": snapshots / started / seconds if started and seconds else 0.0,
+        "bytes_per_snapshot": total_bytes / snapshots if snapshots else 0.0,
+        "kib_per_sec": total_bytes / 1024 / seconds if seconds else 0.0,
+        "gap_ms_p50": pct(0.5),
+        "gap_ms_p99": pct(0.99),
+        "shots": sum(b.shots for b in bots),
+        "goals": goals,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spawn simulated players against a match server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to play after the ramp-up")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which to open connections")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spawn-server", action="store_true", help="start server.py on localhost first")
+    parser.add_argument("--snapshot-rate", type=int, default=30, help="passed to the spawned server")
+    args = parser.parse_args(argv)
+    server = None
+    if args.spawn_server:
+        server_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+        server = subprocess.Popen([sys.executable, server_py, "--port", str(args.port),
+                                   "--snapshot-rate", str(args.snapshot_rate)])
+        time.sleep(1.0)
+    try:
+        bots, errors, seconds = asyncio.run(run_bots(args.host, args.port, args.clients, args.duration,
+                                                     args.ramp, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    for key, value in summarize(bots, errors, seconds).items():
+        print(f"{key:30s} {value:.2f}" if isinstance(value, float) else f"{key:30s} {value}")
+    if errors:
+        print("first error:", repr(errors[0]))
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import socket
+import threading
+
+from netcode import (
+    JOIN, INPUT, HELD, BYE, WELCOME, STATUS, SNAPSHOT, WAITING, JOIN_MSG, INPUT_MSG, HELD_MSG, WELCOME_MSG,
+    STATUS_MSG, FrameBuffer, SnapshotDecoder, frame,
+)
+from simulation import init_game, FORMATION
+
+# 游戏窗口用的联网客户端：后台线程阻塞收包、解码快照，主循环随时取最新局面；发送直接在调用线程里做
+
+
+class NetClient:
+    def __init__(self, host, port, match_id=0, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(None)
+        self.match_id = None
+        self.team = None
+        self.tick_rate = None
+        self.snapshot_rate = None
+        self.status = WAITING
+        self.state = init_game()
+        self.decoder = SnapshotDecoder(len(FORMATION))
+        self.connected = True
+        self.held = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+        self.sock.sendall(frame(JOIN, JOIN_MSG.pack(match_id)))
+        self.thread = threading.Thread(target=self._receive, name="net-client", daemon=True)
+        self.thread.start()
+
+    def _receive(self):
+        frames = FrameBuffer()
+        try:
+            while True:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    break
+                self.bytes_received += len(chunk)
+                for kind, payload in frames.feed(chunk):
+                    self._handle(kind, payload)
+        except OSError:
+            pass
+        self.connected = False
+
+    def _handle(self, kind, payload):
+        if kind == SNAPSHOT:
+            with self.lock:
+                self.decoder.apply(payload, self.state)
+        elif kind == WELCOME:
+            self.match_id, self.team, n_players, self.tick_rate, self.snapshot_rate = WELCOME_MSG.unpack(payload)
+            if n_players != len(FORMATION):
+                self.state = init_game([(0, 0)] * n_players)
+                self.decoder = SnapshotDecoder(n_players)
+        elif kind == STATUS:
+            self.status = STATUS_MSG.unpack(payload)[0]
+
+    def send_input(self, word):
+        self._send(frame(INPUT, INPUT_MSG.pack(word)))
+
+    def set_held(self, bits):
+        # 方向键状态只在变化时发送
+        if bits != self.held:
+            self.held = bits
+            self._send(frame(HELD, HELD_MSG.pack(bits)))
+
+    def _send(self, data):
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.connected = False
+
+    def my_turn(self):
+        return self.team is not None and self.state['current_player'] == self.team
+
+    def close(self):
+        if self.connected:
+            self._send(frame(BYE))
+        try:
+            # 先 shutdown 让收包线程从 recv 返回
+            self.sock.shutdown(socket.SHUT_RDWR)
+            self.sock.close()
+        except OSError:
+            pass
+        self.connected = False
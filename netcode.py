@@ -0,0 +1,137 @@
+import struct
+from array import array
+
+from snapshots import state_size, pack_into, unpack_from
+
+# 联网对战的线路协议：每条消息 = 长度(2 字节) + 类型(1 字节) + 负载
+# 客户端只发输入：一次性动作沿用回放的 16 位输入字（选人 / 蓄力 / 射门 / 开球），
+# 方向键按住的状态变化时才发一次；服务器权威推进物理，按固定频率下发局面快照
+# 快照：局面按 snapshots 的平铺布局量化成整数，只发相对上一次发给该客户端的快照变化了的槽位
+FRAME = struct.Struct("<HB")
+DEFAULT_PORT = 7777
+
+# 客户端 -> 服务器
+JOIN, INPUT, HELD, BYE = 1, 2, 3, 4
+# 服务器 -> 客户端
+WELCOME, STATUS, SNAPSHOT = 16, 17, 18
+# STATUS 的取值
+WAITING, STARTED, OPPONENT_LEFT = 0, 1, 2
+
+JOIN_MSG = struct.Struct("<I")
+INPUT_MSG = struct.Struct("<H")
+HELD_MSG = struct.Struct("<B")
+# 比赛号, 本方队伍, 球员总数, 服务器帧率, 快照频率
+WELCOME_MSG = struct.Struct("<IBBHH")
+STATUS_MSG = struct.Struct("<B")
+# 服务器帧号；后面是变化位图和各变化槽位的差值（zigzag 变长整数）
+SNAPSHOT_HEAD = struct.Struct("<I")
+
+# 量化：所有槽位统一乘 QUANT 取整，坐标精度 1/64 像素，计数类标量保持精确
+QUANT = 64
+
+def frame(kind, payload=b""):
+    return FRAME.pack(len(payload), kind) + payload
+
+def quantize(buf):
+    return [int(round(v * QUANT)) for v in buf]
+
+def encode_state(game_state, buf):
+    pack_into(game_state, buf)
+    return quantize(buf)
+
+def write_varint(out, value):
+    # zigzag：小的负数也编码成短字节
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    shift = result = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+def encode_delta(tick, base, values):
+    # base 为对方已有的量化局面（全 0 即首帧全量），返回 SNAPSHOT 负载
+    out = bytearray(SNAPSHOT_HEAD.pack(tick))
+    mask_at = len(out)
+    out += bytes((len(values) + 7) // 8)
+    for i, (old, new) in enumerate(zip(base, values)):
+        if old != new:
+            out[mask_at + (i >> 3)] |= 1 << (i & 7)
+            write_varint(out, new - old)
+    return bytes(out)
+
+def decode_delta(payload, base):
+    # 原地更新 base（量化局面），返回服务器帧号
+    tick, = SNAPSHOT_HEAD.unpack_from(payload)
+    pos = SNAPSHOT_HEAD.size
+    mask_len = (len(base) + 7) // 8
+    mask = payload[pos:pos + mask_len]
+    pos += mask_len
+    for i in range(len(base)):
+        if mask[i >> 3] >> (i & 7) & 1:
+            diff, pos = read_varint(payload, pos)
+            base[i] += diff
+    return tick
+
+
+class SnapshotEncoder:
+    # 服务器端：每个客户端一份，记着上次发给它的量化局面
+    def __init__(self, n_players):
+        self.last = [0] * state_size(n_players)
+
+    def encode(self, tick, values):
+        payload = encode_delta(tick, self.last, values)
+        self.last = values
+        return payload
+
+
+class SnapshotDecoder:
+    # 客户端：累积增量，还原成 game_state
+    def __init__(self, n_players):
+        self.values = [0] * state_size(n_players)
+        self.buf = array("d", bytes(8 * state_size(n_players)))
+        self.tick = 0
+        self.count = 0
+
+    def apply(self, payload, game_state):
+        self.tick = decode_delta(payload, self.values)
+        self.count += 1
+        for i, q in enumerate(self.values):
+            self.buf[i] = q / QUANT
+        unpack_from(game_state, self.buf)
+        return self.tick
+
+
+class FrameBuffer:
+    # 阻塞 socket 用：喂入收到的字节，取出完整的 (类型, 负载)
+    def __init__(self):
+        self.data = bytearray()
+
+    def feed(self, chunk):
+        self.data += chunk
+        frames = []
+        pos = 0
+        while len(self.data) - pos >= FRAME.size:
+            length, kind = FRAME.unpack_from(self.data, pos)
+            end = pos + FRAME.size + length
+            if end > len(self.data):
+                break
+            frames.append((kind, bytes(self.data[pos + FRAME.size:end])))
+            pos = end
+        del self.data[:pos]
+        return frames
+
+
+async def read_frame(reader):
+    # asyncio 流用：读一条完整消息，连接关闭时抛 IncompleteReadError
+    length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return kind, await reader.readexactly(length) if length else b""
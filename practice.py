@@ -0,0 +1,228 @@
+import math
+
+from broadphase import SpatialHash
+from simulation import (
+    WIDTH, HEIGHT, PLAYER_RADIUS, BALL_RADIUS, HIT_DIST, FRICTION, SWEEP_SPEED, P1_X, FORMATION,
+    Simulator, init_game, reset_positions, bounce_ball, goal_scorer, score_goal, release_kicker, end_turn,
+)
+
+# 训练模式：大名单（如 11 人制）和多球
+# 球员和球都登记在同一张空间哈希里，每个子步只对同格的物体做精确碰撞：
+# 球-球员沿用原来的反弹规则，球-球按等质量弹性碰撞交换法向速度，球员之间只做位置分离
+CELL_SIZE = 64
+MAX_PER_TEAM = 13
+LINE_SPACING = 80
+ROW_SPACING = 110
+BALL_SPACING = 80
+BALL_BOUNCE = 0.9
+MAX_SUBSTEPS = 8
+
+def practice_formation(per_team):
+    # 1 名门将，其余每线最多 4 人向前排开；2 队左右镜像。3 人时就是普通站位
+    if per_team == 3:
+        return FORMATION
+    if not 1 <= per_team <= MAX_PER_TEAM:
+        raise ValueError("team size must be between 1 and %d" % MAX_PER_TEAM)
+    left = [(P1_X, HEIGHT // 2)]
+    remaining = per_team - 1
+    line = 1
+    while remaining > 0:
+        n = min(4, remaining)
+        for j in range(n):
+            left.append((P1_X + LINE_SPACING * line, HEIGHT // 2 + (j - (n - 1) / 2) * ROW_SPACING))
+        remaining -= n
+        line += 1
+    return left + [(WIDTH - x, y) for x, y in left]
+
+def place_balls(game_state):
+    # 开球：所有球沿中线排开，第一个球在中圈
+    balls = game_state['balls']
+    for k, ball in enumerate(balls):
+        offset = ((k + 1) // 2) * BALL_SPACING * (1 if k % 2 else -1)
+        ball.update({"x": WIDTH // 2, "y": HEIGHT // 2 + offset, "vx": 0, "vy": 0})
+    game_state['ball'] = balls[0]
+
+def init_practice(per_team=11, balls=3):
+    gs = init_game(practice_formation(per_team))
+    gs['balls'] += [dict(gs['ball']) for _ in range(balls - 1)]
+    place_balls(gs)
+    return gs
+
+def build_grid(game_state, grid=None):
+    # 键：球员按 game_state['players'] 的下标，球排在球员之后
+    grid = grid or SpatialHash(CELL_SIZE)
+    grid.clear()
+    for i, p in enumerate(game_state['players']):
+        grid.insert(i, p["x"], p["y"], PLAYER_RADIUS)
+    n = len(game_state['players'])
+    for k, ball in enumerate(game_state['balls']):
+        grid.insert(n + k, ball["x"], ball["y"], BALL_RADIUS)
+    return grid
+
+def collide_ball_player(ball, player, first):
+    dx = ball["x"] - player["x"]
+    dy = ball["y"] - player["y"]
+    dist = math.hypot(dx, dy)
+    if dist >= HIT_DIST:
+        return False
+    nx, ny = (dx / dist, dy / dist) if dist > 0 else (1.0, 0.0)
+    overlap = HIT_DIST - dist + 1
+    ball["x"] += nx * overlap
+    ball["y"] += ny * overlap
+    if first:
+        speed = math.hypot(ball["vx"], ball["vy"]) * 0.9 + 2.0
+        ball["vx"] = speed * nx
+        ball["vy"] = speed * ny
+    else:
+        # 同一帧内再次碰到同一名球员只去掉朝里的速度，不再加速
+        vn = ball["vx"] * nx + ball["vy"] * ny
+        if vn < 0:
+            ball["vx"] -= vn * nx
+            ball["vy"] -= vn * ny
+    return True
+
+def collide_balls(a, b):
+    dx = b["x"] - a["x"]
+    dy = b["y"] - a["y"]
+    dist = math.hypot(dx, dy)
+    if dist >= 2 * BALL_RADIUS:
+        return False
+    nx, ny = (dx / dist, dy / dist) if dist > 0 else (1.0, 0.0)
+    push = (2 * BALL_RADIUS - dist) / 2
+    a["x"] -= nx * push
+    a["y"] -= ny * push
+    b["x"] += nx * push
+    b["y"] += ny * push
+    rel = (b["vx"] - a["vx"]) * nx + (b["vy"] - a["vy"]) * ny
+    if rel < 0:
+        j = -(1 + BALL_BOUNCE) * rel / 2
+        a["vx"] -= j * nx
+        a["vy"] -= j * ny
+        b["vx"] += j * nx
+        b["vy"] += j * ny
+    return True
+
+def step_world(game_state, grid, dt=1.0):
+    # 一帧多体物理，返回 (全部球已停, 是否进球)
+    # 按最快的球分子步，使每个子步的位移不超过 SWEEP_SPEED，快球不会穿过球员或其他球
+    balls = game_state['balls']
+    players = game_state['players']
+    n = len(players)
+    top = max(math.hypot(b["vx"], b["vy"]) for b in balls) * dt
+    steps = min(MAX_SUBSTEPS, max(1, math.ceil(top / SWEEP_SPEED)))
+    h = dt / steps
+    kicker = game_state.get('kicker')
+    skip = None
+    if kicker is not None:
+        # 射门球员在球离开身体前不与射出的球碰撞
+        skip = ((kicker[0] - 1) * len(game_state['players1']) + kicker[1],
+                n + next(k for k, b in enumerate(balls) if b is game_state['ball']))
+    touched = set()
+    for _ in range(steps):
+        for k, ball in enumerate(balls):
+            if ball["vx"] or ball["vy"]:
+                ball["x"] += ball["vx"] * h
+                ball["y"] += ball["vy"] * h
+                bounce_ball(ball)
+                grid.move(n + k, ball["x"], ball["y"])
+        for a, b in list(grid.pairs()):
+            # b < n 说明两个都是球员，回合中球员不动，不用处理
+            if b < n or (a, b) == skip:
+                continue
+            if a < n:
+                ball = balls[b - n]
+                if collide_ball_player(ball, players[a], (a, b) not in touched):
+                    touched.add((a, b))
+                    bounce_ball(ball)
+                    grid.move(b, ball["x"], ball["y"])
+            elif collide_balls(balls[a - n], balls[b - n]):
+                grid.move(a, balls[a - n]["x"], balls[a - n]["y"])
+                grid.move(b, balls[b - n]["x"], balls[b - n]["y"])
+        for ball in balls:
+            winner = goal_scorer(ball)
+            if winner is not None:
+                score_goal(game_state, winner)
+                return False, True
+    release_kicker(game_state)
+    friction = FRICTION if dt == 1.0 else FRICTION ** dt
+    stopped = True
+    for ball in balls:
+        ball["vx"] *= friction
+        ball["vy"] *= friction
+        if abs(ball["vx"]) < 0.1 and abs(ball["vy"]) < 0.1:
+            ball["vx"] = ball["vy"] = 0
+        else:
+            stopped = False
+    return stopped, False
+
+def separate_player(game_state, grid, idx):
+    # 走位时不能挤进别的球员：把移动的球员沿连线推出去
+    players = game_state['players']
+    p = players[idx]
+    for other in grid.query(p["x"], p["y"], PLAYER_RADIUS):
+        if other == idx or other >= len(players):
+            continue
+        q = players[other]
+        dx, dy = p["x"] - q["x"], p["y"] - q["y"]
+        dist = math.hypot(dx, dy)
+        if dist < 2 * PLAYER_RADIUS:
+            nx, ny = (dx / dist, dy / dist) if dist > 0 else (1.0, 0.0)
+            p["x"] = q["x"] + nx * 2 * PLAYER_RADIUS
+            p["y"] = q["y"] + ny * 2 * PLAYER_RADIUS
+    grid.move(idx, p["x"], p["y"])
+
+
+class PracticeSimulator(Simulator):
+    # 训练模式的比赛驱动：双人对战规则，大名单 + 多球，物理走 step_world
+    def __init__(self, per_team=11, balls=3, mode="pvp"):
+        self.per_team = per_team
+        self.n_balls = balls
+        # 空间哈希跨帧复用，只在换局面（开局、重开、进球后开球）时重建
+        self.grid = SpatialHash(CELL_SIZE)
+        super().__init__(mode, ai_teams=())
+        self.state = init_practice(per_team, balls)
+        build_grid(self.state, self.grid)
+
+    def reset(self):
+        super().reset()
+        self.state = init_practice(self.per_team, self.n_balls)
+        build_grid(self.state, self.grid)
+
+    def selected_index(self):
+        gs = self.state
+        return (gs['current_player'] - 1) * len(gs['players1']) + gs['selected_player']
+
+    def move_selected(self, dx, dy, slow=False):
+        super().move_selected(dx, dy, slow)
+        if self.state['game_state'] == "aiming":
+            separate_player(self.state, self.grid, self.selected_index())
+
+    def release_shot(self):
+        # 射离选中球员最近的那个球
+        gs = self.state
+        if gs['game_state'] == "aiming" and gs['charging_power']:
+            p = gs['players'][self.selected_index()]
+            gs['ball'] = min(gs['balls'], key=lambda b: math.hypot(b["x"] - p["x"], b["y"] - p["y"]))
+        return super().release_shot()
+
+    def continue_after_goal(self):
+        gs = self.state
+        if gs['game_state'] != "scored":
+            return
+        super().continue_after_goal()
+        reset_positions(gs, practice_formation(self.per_team))
+        place_balls(gs)
+        build_grid(gs, self.grid)
+
+    def step(self):
+        gs = self.state
+        if gs['game_state'] != "moving":
+            return super().step()
+        self.frames += 1
+        ball_stopped, scored = step_world(gs, self.grid)
+        if ball_stopped and not scored:
+            end_turn(gs)
+        return gs['game_state']
+
+    def close(self):
+        self.grid.clear()
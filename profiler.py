@@ -0,0 +1,237 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+from text_cache import render_text
+
+# 帧分析：主循环各阶段打点 + 可选地给 draw_* 等函数套计时包装
+# 关闭时打点只做一次属性判断，函数包装会被撤掉恢复原函数，几乎没有开销
+HISTOGRAM_MS = 50
+HISTOGRAM_BINS = 25
+OVERLAY_REFRESH = 0.25
+OVERLAY_POS = (10, 120)
+OVERLAY_WIDTH = 300
+TEXT_COLOR = (230, 230, 230)
+BAR_COLOR = (90, 200, 255)
+SLOW_COLOR = (255, 110, 90)
+TARGET_MS = 1000 / 60
+# 画面静止时阻塞等事件的时间不算帧耗时，否则一次长等待就把 p99 拉到几秒
+IDLE_PHASE = "idle"
+
+
+class FrameProfiler:
+    def __init__(self, history=600, max_events=200000):
+        self.enabled = False
+        self.frames = deque(maxlen=history)
+        self.events = []
+        self.max_events = max_events
+        self.frame_index = 0
+        self._origin = time.perf_counter()
+        self._frame_start = None
+        self._last = None
+        self._phases = {}
+        self._targets = []
+        self._patched = []
+        self._overlay = None
+        self._overlay_at = 0.0
+        self._font = None
+
+    # ---- 开关 ----
+    def add_targets(self, owner, names, prefix=""):
+        # 登记需要计时的函数（模块函数或类方法）；只在开启时替换
+        for name in names:
+            self._targets.append((owner, name, prefix + name))
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._frame_start = None
+        for owner, name, label in self._targets:
+            original = getattr(owner, name)
+            setattr(owner, name, self._wrap(original, label))
+            self._patched.append((owner, name, original))
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def _wrap(self, fn, label):
+        profiler = self
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler._span(label, start, time.perf_counter(), "call")
+        return timed
+
+    # ---- 打点 ----
+    def frame_start(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            total = (now - self._frame_start) * 1000 - self._phases.get(IDLE_PHASE, 0.0)
+            self.frames.append((total, self._phases))
+            self._span("frame", self._frame_start, now, "frame")
+            self.frame_index += 1
+        self._frame_start = self._last = now
+        self._phases = {}
+
+    def restart_frame(self):
+        if self.enabled and self._frame_start is not None:
+            self._frame_start = self._last = time.perf_counter()
+            self._phases = {}
+
+    def mark(self, phase):
+        # 结束当前阶段：从上一个打点到现在的耗时记到 phase 名下
+        if not self.enabled or self._last is None:
+            return
+        now = time.perf_counter()
+        self._phases[phase] = self._phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._span(phase, self._last, now, "phase")
+        self._last = now
+
+    def _span(self, name, start, end, cat):
+        if len(self.events) < self.max_events:
+            self.events.append((name, cat, (start - self._origin) * 1e6, (end - start) * 1e6))
+
+    # ---- 统计 ----
+    def stats(self):
+        if not self.frames:
+            return None
+        totals = sorted(f[0] for f in self.frames)
+        n = len(totals)
+        phases = {}
+        for _, frame_phases in self.frames:
+            for name, ms in frame_phases.items():
+                phases[name] = phases.get(name, 0.0) + ms
+        mean = sum(totals) / n
+        return {
+            "frames": n,
+            "mean_ms": mean,
+            "fps": 1000 / mean if mean else 0.0,
+            "p50_ms": totals[n // 2],
+            "p99_ms": totals[min(n - 1, int(n * 0.99))],
+            "max_ms": totals[-1],
+            "phases": {name: ms / n for name, ms in phases.items()},
+        }
+
+    def histogram(self):
+        bins = [0] * HISTOGRAM_BINS
+        for total, _ in self.frames:
+            bins[min(HISTOGRAM_BINS - 1, int(total / HISTOGRAM_MS * HISTOGRAM_BINS))] += 1
+        return bins
+
+    # ---- 屏幕叠加层 ----
+    def draw_overlay(self, screen):
+        # 统计面板每 OVERLAY_REFRESH 秒重画一次，其余帧只 blit 缓存的面板
+        now = time.perf_counter()
+        if self._overlay is None or now - self._overlay_at >= OVERLAY_REFRESH:
+            self._overlay = self._build_overlay()
+            self._overlay_at = now
+        return screen.blit(self._overlay, OVERLAY_POS)
+
+    def _build_overlay(self):
+        if self._font is None:
+            self._font = pygame.font.Font(None, 20)
+        st = self.stats()
+        phases = sorted(st["phases"].items(), key=lambda kv: -kv[1]) if st else []
+        line_h = 16
+        hist_h = 40
+        height = 8 + line_h * 2 + hist_h + 10 + line_h * len(phases) + 8
+        surf = pygame.Surface((OVERLAY_WIDTH, height), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 170))
+        if st is None:
+            surf.blit(render_text(self._font, "profiler: collecting...", True, TEXT_COLOR), (8, 8))
+            return surf
+        y = 8
+        surf.blit(render_text(self._font, f"frame {st['mean_ms']:.1f} ms   {st['fps']:.0f} fps   max {st['max_ms']:.1f}",
+                              True, TEXT_COLOR), (8, y))
+        y += line_h
+        surf.blit(render_text(self._font, f"p50 {st['p50_ms']:.1f} ms   p99 {st['p99_ms']:.1f} ms   (0-{HISTOGRAM_MS} ms)",
+                              True, TEXT_COLOR), (8, y))
+        y += line_h + 2
+        bins = self.histogram()
+        peak = max(bins) or 1
+        bar_w = (OVERLAY_WIDTH - 16) // HISTOGRAM_BINS
+        for i, count in enumerate(bins):
+            h = max(1, int(hist_h * count / peak)) if count else 0
+            slow = (i + 1) * HISTOGRAM_MS / HISTOGRAM_BINS > TARGET_MS + 0.5
+            pygame.draw.rect(surf, SLOW_COLOR if slow else BAR_COLOR, (8 + i * bar_w, y + hist_h - h, bar_w - 1, h))
+        y += hist_h + 10
+        for name, ms in phases:
+            w = int(min(1.0, ms / TARGET_MS) * 110)
+            pygame.draw.rect(surf, BAR_COLOR, (OVERLAY_WIDTH - 118, y + 3, w, line_h - 6))
+            surf.blit(render_text(self._font, f"{name:s}  {ms:.2f} ms", True, TEXT_COLOR), (8, y))
+            y += line_h
+        return surf
+
+    # ---- 导出 ----
+    def export_chrome(self, path):
+        # Chrome / Perfetto 的 trace event 格式，完整事件 (ph = X)
+        trace = [{"name": name, "cat": cat, "ph": "X", "ts": round(ts, 1), "dur": round(dur, 1), "pid": 0, "tid": 0}
+                 for name, cat, ts, dur in self.events]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def export_csv(self, path):
+        # 每帧一行：帧号、总耗时、各阶段耗时
+        names = sorted({name for _, phases in self.frames for name in phases})
+        first = self.frame_index - len(self.frames)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "total_ms"] + names)
+            for i, (total, phases) in enumerate(self.frames):
+                writer.writerow([first + i, f"{total:.3f}"] + [f"{phases.get(n, 0.0):.3f}" for n in names])
+
+    def export(self, prefix="profile"):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        trace_path = f"{prefix}-{stamp}.json"
+        csv_path = f"{prefix}-{stamp}.csv"
+        self.export_chrome(trace_path)
+        self.export_csv(csv_path)
+        return trace_path, csv_path
+
+
+class StartupTimer:
+    # 启动各阶段耗时：mark(name) 记下从上一次 mark 到现在的时间，finish() 之后不再记录
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []
+        self.done = False
+        self._last = self.start
+
+    def mark(self, name):
+        if self.done:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def finish(self, name):
+        self.mark(name)
+        self.done = True
+
+    def total_ms(self):
+        return (self._last - self.start) * 1000
+
+    def report(self):
+        parts = [f"{name} {ms:.1f} ms" for name, ms in self.phases]
+        return "startup: " + " | ".join(parts) + f" | total {self.total_ms():.1f} ms"
@@ -0,0 +1,377 @@
+import bisect
+import mmap
+import random
+import struct
+import sys
+import time
+from array import array
+
+from simulation import Simulator
+from snapshots import StateRing, state_hash
+
+# 比赛回放：记录种子 + 每帧输入（2 字节），每隔一段写一个关键帧（全部坐标打包成 float64）
+# 文件按块追加：块头 + 块起点的关键帧 + 该块的输入；读取时用 mmap 按块取，不整体载入内存
+MAGIC = b"SCRP"
+# 物理或输入语义改变时加一，旧文件按新规则重演会不同步
+VERSION = 3
+# 魔数, 版本, 模式, AI 队伍位图, 种子, 关键帧间隔
+HEADER = struct.Struct("<4sHBBQI")
+# 起始输入序号, 起始帧序号, 输入条数
+CHUNK = struct.Struct("<III")
+# 球 x/y/vx/vy, 6 名球员 x/y, 蓄力值, frames, turns, 比分, 当前队, 选中球员, 状态, 胜方, 蓄力中, 射门球员,
+# 球员激活位图, AI 射门计划（球员, 角度编码, 力量编码）
+KEYFRAME = struct.Struct("<17dIIHHBBBBBBBBHH")
+TICK = struct.Struct("<H")
+KEYFRAME_INTERVAL = 300
+MODES = ("pvp", "vs_ai", "ai_vs_ai")
+STATES = ("aiming", "moving", "scored")
+
+# 每条输入是一个 16 位字，同一帧内按固定顺序执行：重开 -> 开球 -> 选人 -> 蓄力 -> 射门 -> 走位 -> 推进
+LEFT, RIGHT, UP, DOWN, SLOW, MOVE = 1, 2, 4, 8, 16, 32
+CHARGE, RELEASE, CONTINUE, RESET, SELECT = 64, 128, 256, 512, 1024
+SELECT_SHIFT = 11
+STEP = 1 << 13
+# AI 射门计划：低 2 位为球员序号，后面紧跟角度编码和力量编码两个字
+PLAN = 1 << 14
+STAGE_RESET, STAGE_CONTINUE, STAGE_SELECT, STAGE_CHARGE, STAGE_RELEASE, STAGE_MOVE, STAGE_STEP = range(7)
+
+def pack_state(sim):
+    gs = sim.state
+    players = gs['players']
+    ball = gs['ball']
+    coords = [ball["x"], ball["y"], ball["vx"], ball["vy"]]
+    active = 0
+    for i, p in enumerate(players):
+        coords += [p["x"], p["y"]]
+        if p["active"]:
+            active |= 1 << i
+    kicker = gs['kicker']
+    plan = sim.plan or (0xff, 0, 0)
+    return KEYFRAME.pack(
+        *coords, gs['shot_power'], sim.frames, sim.turns,
+        gs['score']["player1"], gs['score']["player2"], gs['current_player'], gs['selected_player'],
+        STATES.index(gs['game_state']), gs['winner'] or 0, bool(gs['charging_power']),
+        0xff if kicker is None else kicker[0] << 4 | kicker[1], active, *plan)
+
+def unpack_state(sim, data, offset=0):
+    values = KEYFRAME.unpack_from(data, offset)
+    coords = values[:16]
+    (shot_power, frames, turns, score1, score2, current, selected,
+     state, winner, charging, kicker, active, plan_player, angle_code, power_code) = values[16:]
+    gs = sim.state
+    gs['ball'].update({"x": coords[0], "y": coords[1], "vx": coords[2], "vy": coords[3]})
+    for i, p in enumerate(gs['players']):
+        p["x"], p["y"] = coords[4 + i * 2], coords[5 + i * 2]
+        p["active"] = bool(active >> i & 1)
+    gs['shot_power'] = shot_power
+    gs['score'] = {"player1": score1, "player2": score2}
+    gs['current_player'] = current
+    gs['selected_player'] = selected
+    gs['game_state'] = STATES[state]
+    gs['winner'] = winner or None
+    gs['charging_power'] = bool(charging)
+    gs['kicker'] = None if kicker == 0xff else (kicker >> 4, kicker & 0xf)
+    sim.plan = None if plan_player == 0xff else (plan_player, angle_code, power_code)
+    sim.frames = frames
+    sim.turns = turns
+
+def apply_tick(sim, word):
+    # 返回本条输入是否推进了一帧
+    if word & RESET:
+        sim.reset()
+    if word & CONTINUE:
+        sim.continue_after_goal()
+    if word & SELECT:
+        sim.select_player(word >> SELECT_SHIFT & 3)
+    if word & CHARGE:
+        sim.start_charge()
+    if word & RELEASE:
+        sim.release_shot()
+    if word & MOVE:
+        sim.move_selected((word & RIGHT and 1) - (word & LEFT and 1), (word & DOWN and 1) - (word & UP and 1),
+                          slow=bool(word & SLOW))
+    if word & STEP:
+        sim.step()
+        return True
+    return False
+
+
+class ReplayWriter:
+    def __init__(self, path, sim, keyframe_interval=KEYFRAME_INTERVAL):
+        self.sim = sim
+        self.interval = keyframe_interval
+        self.file = open(path, "wb")
+        mask = sum(1 << (t - 1) for t in sim.ai_teams)
+        self.file.write(HEADER.pack(MAGIC, VERSION, MODES.index(sim.mode), mask, sim.seed, keyframe_interval))
+        self.ticks = array("H")
+        self.first_tick = 0
+        self.first_step = 0
+        self.steps = 0
+        self.keyframe = pack_state(sim)
+        self.word = 0
+        self.stage = -1
+
+    def begin(self, bits, stage):
+        # 在 Simulator 方法执行之前调用；顺序倒退（如同一帧内先松开再按下）时另起一条不推进的输入
+        if self.word and stage <= self.stage:
+            self.end_tick()
+        if not self.word and len(self.ticks) >= self.interval:
+            self.flush_chunk()
+            self.keyframe = pack_state(self.sim)
+        self.word |= bits
+        self.stage = stage
+
+    def plan(self, plan):
+        # 计划在推进之前产生：本帧已执行的输入先单独落盘，计划排在推进字之前
+        if self.word & ~STEP:
+            self.ticks.append(self.word & ~STEP)
+            self.word = STEP
+        self.ticks.extend((PLAN | plan[0], plan[1], plan[2]))
+
+    def end_tick(self):
+        if not self.word:
+            return
+        self.ticks.append(self.word)
+        if self.word & STEP:
+            self.steps += 1
+        self.word = 0
+        self.stage = -1
+
+    def flush_chunk(self):
+        if not self.ticks:
+            return
+        if sys.byteorder != "little":
+            self.ticks.byteswap()
+        self.file.write(CHUNK.pack(self.first_tick, self.first_step, len(self.ticks)))
+        self.file.write(self.keyframe)
+        self.file.write(self.ticks.tobytes())
+        self.file.flush()
+        self.first_tick += len(self.ticks)
+        self.first_step = self.steps
+        self.ticks = array("H")
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.end_tick()
+        self.flush_chunk()
+        self.file.close()
+
+
+class RecordingSimulator(Simulator):
+    # 与 Simulator 用法相同，所有输入和帧推进同时写入回放文件
+    def __init__(self, path, mode="pvp", seed=None, ai_teams=None, planner=None,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        if seed is None:
+            seed = random.getrandbits(32)
+        super().__init__(mode, seed, ai_teams, planner)
+        self.recorder = ReplayWriter(path, self, keyframe_interval)
+
+    def reset(self):
+        self.recorder.begin(RESET, STAGE_RESET)
+        super().reset()
+
+    def continue_after_goal(self):
+        self.recorder.begin(CONTINUE, STAGE_CONTINUE)
+        super().continue_after_goal()
+
+    def select_player(self, idx):
+        self.recorder.begin(SELECT | idx << SELECT_SHIFT, STAGE_SELECT)
+        super().select_player(idx)
+
+    def start_charge(self):
+        self.recorder.begin(CHARGE, STAGE_CHARGE)
+        super().start_charge()
+
+    def release_shot(self):
+        self.recorder.begin(RELEASE, STAGE_RELEASE)
+        return super().release_shot()
+
+    def move_selected(self, dx, dy, slow=False):
+        bits = MOVE | (LEFT if dx < 0 else RIGHT if dx > 0 else 0) | (UP if dy < 0 else DOWN if dy > 0 else 0)
+        self.recorder.begin(bits | (SLOW if slow else 0), STAGE_MOVE)
+        super().move_selected(dx, dy, slow)
+
+    def set_plan(self, plan):
+        self.recorder.plan(plan)
+        super().set_plan(plan)
+
+    def step(self):
+        # 规划器还在分帧推演的帧不推进，也不写进回放（重演时没有规划器，直接读记录下来的计划）
+        if self.think():
+            return self.state['game_state']
+        self.recorder.begin(STEP, STAGE_STEP)
+        result = super().step()
+        self.recorder.end_tick()
+        return result
+
+    def close(self):
+        self.recorder.close()
+
+
+class ReplayReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("empty replay file")
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError("not a replay file")
+        magic, version, mode, mask, seed, interval = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("not a replay file")
+        self.mode = MODES[mode]
+        self.ai_teams = tuple(t for t in (1, 2) if mask >> (t - 1) & 1)
+        self.seed = seed
+        self.interval = interval
+        # 块索引只记偏移，输入本身留在映射里；最后一个没写完的块忽略
+        self.chunks = []
+        offset = HEADER.size
+        while offset + CHUNK.size + KEYFRAME.size <= len(self.map):
+            first_tick, first_step, count = CHUNK.unpack_from(self.map, offset)
+            ticks_at = offset + CHUNK.size + KEYFRAME.size
+            if ticks_at + count * TICK.size > len(self.map):
+                break
+            self.chunks.append((offset + CHUNK.size, ticks_at, first_step, count))
+            offset = ticks_at + count * TICK.size
+        self.chunk_steps = [c[2] for c in self.chunks]
+        if self.chunks:
+            last = self.chunks[-1]
+            self.total_steps = last[2] + sum(1 for w, _ in self.ticks(len(self.chunks) - 1) if w & STEP)
+        else:
+            self.total_steps = 0
+
+    def new_simulator(self):
+        return Simulator(self.mode, self.seed, self.ai_teams)
+
+    def ticks(self, chunk):
+        _, ticks_at, _, count = self.chunks[chunk]
+        # 每次只拷出一个块（几百字节）的输入；产出 (输入字, AI 计划或 None)
+        words = TICK.iter_unpack(self.map[ticks_at:ticks_at + count * TICK.size])
+        for (word,) in words:
+            if word & PLAN:
+                (angle_code,), (power_code,) = next(words), next(words)
+                yield word, (word & 3, angle_code, power_code)
+            else:
+                yield word, None
+
+    def keyframe(self, chunk):
+        return self.map[self.chunks[chunk][0]:self.chunks[chunk][0] + KEYFRAME.size]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class ReplayPlayer:
+    # 按帧推进回放；每进入一个块都与关键帧比对，发现不一致时计数并以关键帧为准
+    # rewind > 0 时保留最近 rewind 帧的局面，暂停时可逐帧倒退
+    def __init__(self, reader, verify=True, rewind=0):
+        self.reader = reader
+        self.verify = verify
+        self.sim = reader.new_simulator()
+        self.desyncs = 0
+        self.step_index = 0
+        self.chunk = -1
+        self._ticks = iter(())
+        self.history = None
+        self.rewound = False
+        if rewind:
+            gs = self.sim.state
+            self.history = StateRing(rewind + 1, len(gs['players']), len(gs['balls']))
+            self.history.push(gs, 0)
+
+    @property
+    def done(self):
+        return self.step_index >= self.reader.total_steps
+
+    def _next_word(self):
+        for item in self._ticks:
+            return item
+        if self.chunk + 1 >= len(self.reader.chunks):
+            return None
+        self.chunk += 1
+        keyframe = self.reader.keyframe(self.chunk)
+        if self.verify and pack_state(self.sim) != keyframe:
+            self.desyncs += 1
+            unpack_state(self.sim, keyframe)
+        self._ticks = self.reader.ticks(self.chunk)
+        return self._next_word()
+
+    def advance(self, steps=1):
+        if self.rewound:
+            # 倒带只改了画面用的局面（AI 计划、随机数不在快照里），继续前从关键帧精确重建
+            self.rewound = False
+            self._rebuild(self.step_index)
+        done = 0
+        while done < steps:
+            item = self._next_word()
+            if item is None:
+                break
+            word, plan = item
+            if plan is not None:
+                self.sim.set_plan(plan)
+            elif apply_tick(self.sim, word):
+                done += 1
+                if self.history is not None:
+                    self.history.push(self.sim.state, self.step_index + done)
+        self.step_index += done
+        return done
+
+    def step_back(self):
+        # 退回上一帧；返回是否退成功（超出保留范围时不动）
+        if self.history is None or self.history.count < 2:
+            return False
+        self.history.pop(self.sim.state)
+        self.step_index = self.history.restore(self.sim.state)
+        self.rewound = True
+        return True
+
+    def seek(self, step):
+        self._rebuild(step)
+        self.rewound = False
+        if self.history is not None:
+            self.history.clear()
+            self.history.push(self.sim.state, self.step_index)
+
+    def _rebuild(self, step):
+        # 从不晚于目标帧的最近关键帧恢复，再逐帧推进到目标帧
+        chunk = max(0, bisect.bisect_right(self.reader.chunk_steps, step) - 1)
+        self.sim = self.reader.new_simulator()
+        self.chunk = chunk - 1
+        self._ticks = iter(())
+        if chunk < len(self.reader.chunks):
+            unpack_state(self.sim, self.reader.keyframe(chunk))
+            self.step_index = self.reader.chunk_steps[chunk]
+        else:
+            self.step_index = 0
+        verify, self.verify = self.verify, False
+        history, self.history = self.history, None
+        self.advance(step - self.step_index)
+        self.verify = verify
+        self.history = history
+
+def run_headless(path, verify=True):
+    reader = ReplayReader(path)
+    player = ReplayPlayer(reader, verify)
+    start = time.perf_counter()
+    while player.advance(10000):
+        pass
+    elapsed = time.perf_counter() - start
+    # 终局哈希：同一回放在不同机器、不同版本上重演，比对这个值即可确认结果一致
+    result = {"steps": player.step_index, "score": dict(player.sim.state['score']),
+              "desyncs": player.desyncs, "hash": state_hash(player.sim.state), "seconds": elapsed}
+    reader.close()
+    return result
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python replay.py REPLAY_FILE")
+        sys.exit(1)
+    r = run_headless(sys.argv[1])
+    print(f"{r['steps']} frames in {r['seconds']:.2f}s, score {r['score']['player1']}:{r['score']['player2']}, "
+          f"desyncs {r['desyncs']}, state {r['hash']:08x}")
@@ -0,0 +1,128 @@
+import time
+
+import pygame
+
+from simulation import TICK_RATE
+
+# 帧调度：按比赛状态决定本帧是固定频率推进、还是阻塞等待输入；画面没变化就不重画
+BUSY_STATES = ("moving",)
+# 一帧最多补几步物理：机器慢到连物理都跑不动时丢掉多出来的时间（变慢），而不是越补越卡
+MAX_CATCH_UP = 8
+
+
+class FrameScheduler:
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self.idle_waits = 0
+        self._last_key = None
+
+    def is_idle(self, game_state, ai_turn, keys_held):
+        # 球在动、AI 在走位、玩家在蓄力或按着方向键时需要逐帧推进，其余状态只等输入
+        state = game_state['game_state']
+        if state in BUSY_STATES:
+            return False
+        if state == "aiming":
+            return not (ai_turn or game_state['charging_power'] or keys_held)
+        return True
+
+    def events(self, idle):
+        if idle:
+            self.idle_waits += 1
+            return [pygame.event.wait()] + pygame.event.get()
+        return pygame.event.get()
+
+    def invalidate(self):
+        self._last_key = None
+
+    def should_render(self, scene_key):
+        if scene_key == self._last_key:
+            self.frames_skipped += 1
+            return False
+        self._last_key = scene_key
+        self.frames_rendered += 1
+        return True
+
+    def tick(self):
+        return self.clock.tick(self.fps)
+
+    def stats(self):
+        return {
+            "rendered": self.frames_rendered,
+            "skipped": self.frames_skipped,
+            "idle_waits": self.idle_waits,
+            "fps": self.clock.get_fps(),
+        }
+
+
+class FixedTimestep:
+    # 累加器式固定步长：每帧按真实经过的时间决定推进几步物理（可能是 0 步或多步），
+    # 物理始终按 TICK_RATE 推进，与渲染帧率无关；余下不足一步的时间给插值用
+    def __init__(self, rate=TICK_RATE, max_steps=MAX_CATCH_UP):
+        self.dt = 1.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last = None
+        self.steps = 0
+        self.dropped = 0
+
+    def reset(self):
+        # 阻塞等待输入或停在菜单之后调用：等待的时间不补物理，下一帧只推进一步
+        self.last = None
+        self.accumulator = 0.0
+
+    def advance(self):
+        now = time.perf_counter()
+        self.accumulator += self.dt if self.last is None else now - self.last
+        self.last = now
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        self.steps += steps
+        return steps
+
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+
+class StateInterpolator:
+    # 渲染用的插值视图：球员和球的位置取上一步与当前一步之间的 alpha 处
+    # 视图里的 dict 跨帧复用（球的滚动帧按 dict 的 id 记录），其余字段与 game_state 相同
+    def __init__(self):
+        self.source = None
+        self.prev = None
+        self.objects = []
+
+    def save(self, game_state):
+        # 每步物理之前调用
+        self.prev = [(o["x"], o["y"]) for o in game_state['players'] + game_state['balls']]
+
+    def snap(self, game_state):
+        # 球员被瞬移（开球、重开）之后调用，避免从旧位置滑过去
+        self.save(game_state)
+
+    def view(self, game_state, alpha):
+        objs = game_state['players'] + game_state['balls']
+        if self.source is not game_state or len(self.objects) != len(objs) or len(self.prev) != len(objs):
+            self.source = game_state
+            self.objects = [dict(o) for o in objs]
+            self.save(game_state)
+        for v, o, (px, py) in zip(self.objects, objs, self.prev):
+            v.update(o)
+            v["x"] = px + (o["x"] - px) * alpha
+            v["y"] = py + (o["y"] - py) * alpha
+        n = len(game_state['players'])
+        half = len(game_state['players1'])
+        view = dict(game_state)
+        view['players'] = self.objects[:n]
+        view['players1'] = self.objects[:half]
+        view['players2'] = self.objects[half:n]
+        view['balls'] = self.objects[n:]
+        view['ball'] = next(v for v, b in zip(view['balls'], game_state['balls']) if b is game_state['ball'])
+        return view
@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import socket
+import statistics
+import struct
+import time
+from array import array
+
+from netcode import (
+    DEFAULT_PORT, JOIN, INPUT, HELD, BYE, WELCOME, STATUS, SNAPSHOT, WAITING, STARTED, OPPONENT_LEFT,
+    JOIN_MSG, INPUT_MSG, HELD_MSG, WELCOME_MSG, STATUS_MSG,
+    SnapshotEncoder, encode_state, frame, read_frame,
+)
+from replay import LEFT, RIGHT, UP, DOWN, SLOW, CHARGE, RELEASE, CONTINUE, SELECT, SELECT_SHIFT
+from simulation import TICK_RATE, Simulator
+from snapshots import state_size
+
+# 权威比赛服务器：一个 asyncio 事件循环承载全部比赛，单个定时任务按 TICK_RATE 推进所有比赛，
+# 每 snapshot_rate 分之一秒给每个客户端发一次增量快照。客户端只能操作轮到自己的那一方
+# 物理按帧推进，帧率与本地游戏、回放相同，不可配置（改了会改变比赛速度）；只有快照频率可调
+SNAPSHOT_RATE = 30
+# 客户端收得太慢、发送缓冲积压超过这个值时跳过给它的快照（增量基准不变，赶上后自然补齐）
+MAX_BACKLOG = 64 * 1024
+HELD_BITS = LEFT | RIGHT | UP | DOWN | SLOW
+STATS_INTERVAL = 5.0
+
+
+class Client:
+    def __init__(self, writer, match, team):
+        self.writer = writer
+        self.match = match
+        self.team = team
+        self.held = 0
+        self.encoder = SnapshotEncoder(len(match.sim.state['players']))
+
+    def send(self, data):
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+
+class Match:
+    def __init__(self, match_id, seed=None):
+        self.id = match_id
+        self.sim = Simulator("pvp", seed)
+        self.clients = {}
+        self.buf = array("d", bytes(8 * state_size(len(self.sim.state['players']))))
+
+    def full(self):
+        return len(self.clients) == 2
+
+    def apply_input(self, client, word):
+        sim = self.sim
+        gs = sim.state
+        if not self.full():
+            return
+        # 进球后由被进球的一方开球，只有他能继续
+        if word & CONTINUE and gs['game_state'] == "scored" and client.team == (2 if gs['winner'] == 1 else 1):
+            sim.continue_after_goal()
+        # 其余操作只对轮到的一方有效
+        if client.team != gs['current_player']:
+            return
+        if word & SELECT:
+            sim.select_player(word >> SELECT_SHIFT & 3)
+        if word & CHARGE:
+            sim.start_charge()
+        if word & RELEASE:
+            sim.release_shot()
+
+    def step(self):
+        sim = self.sim
+        gs = sim.state
+        client = self.clients.get(gs['current_player'])
+        if client is not None and client.held and gs['game_state'] == "aiming":
+            held = client.held
+            sim.move_selected((held & RIGHT and 1) - (held & LEFT and 1), (held & DOWN and 1) - (held & UP and 1),
+                              slow=bool(held & SLOW))
+        sim.step()
+
+
+class MatchServer:
+    def __init__(self, snapshot_rate=SNAPSHOT_RATE):
+        self.snapshot_every = max(1, round(TICK_RATE / snapshot_rate))
+        self.snapshot_rate = TICK_RATE / self.snapshot_every
+        self.matches = {}
+        self.waiting = None
+        self.next_id = 1
+        self.tick = 0
+        self.tick_times = []
+        self.overruns = 0
+        self.bytes_sent = 0
+        self.skipped = 0
+
+    # ---- 连接 ----
+    async def handle(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = None
+        try:
+            kind, payload = await read_frame(reader)
+            if kind != JOIN:
+                return
+            client = self.join(writer, JOIN_MSG.unpack(payload)[0])
+            while True:
+                kind, payload = await read_frame(reader)
+                if kind == INPUT:
+                    client.match.apply_input(client, INPUT_MSG.unpack(payload)[0])
+                elif kind == HELD:
+                    client.held = HELD_MSG.unpack(payload)[0] & HELD_BITS
+                elif kind == BYE:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error):
+            # struct.error：消息长度不对的畸形客户端，直接断开
+            pass
+        finally:
+            if client is not None:
+                self.leave(client)
+            writer.close()
+
+    def join(self, writer, match_id):
+        # match_id 为 0 时自动配对：有人在等就加入他的比赛，否则新开一场等人
+        # 指定的比赛已满时另开一场
+        match = self.matches.get(match_id) if match_id else self.waiting
+        if match is None or match.full():
+            new_id = match_id if match_id and match_id not in self.matches else self.next_id
+            match = Match(new_id)
+            self.next_id = max(self.next_id, new_id) + 1
+            self.matches[new_id] = match
+        team = 1 if 1 not in match.clients else 2
+        client = Client(writer, match, team)
+        match.clients[team] = client
+        client.send(frame(WELCOME, WELCOME_MSG.pack(match.id, team, len(match.sim.state['players']),
+                                                     TICK_RATE, round(self.snapshot_rate))))
+        if match.full():
+            if self.waiting is match:
+                self.waiting = None
+            for c in match.clients.values():
+                c.send(frame(STATUS, STATUS_MSG.pack(STARTED)))
+        else:
+            if match_id == 0:
+                self.waiting = match
+            client.send(frame(STATUS, STATUS_MSG.pack(WAITING)))
+        return client
+
+    def leave(self, client):
+        match = client.match
+        match.clients.pop(client.team, None)
+        if self.waiting is match:
+            self.waiting = None
+        # 对手掉线，这场比赛结束
+        for c in match.clients.values():
+            c.send(frame(STATUS, STATUS_MSG.pack(OPPONENT_LEFT)))
+            c.writer.close()
+        match.clients.clear()
+        self.matches.pop(match.id, None)
+
+    # ---- 推进 ----
+    def step_all(self):
+        self.tick += 1
+        send = self.tick % self.snapshot_every == 0
+        for match in self.matches.values():
+            if not match.full():
+                continue
+            match.step()
+            if send:
+                self.broadcast(match)
+
+    def broadcast(self, match):
+        values = encode_state(match.sim.state, match.buf)
+        shared = None
+        for client in match.clients.values():
+            transport = client.writer.transport
+            if transport.get_write_buffer_size() > MAX_BACKLOG:
+                self.skipped += 1
+                continue
+            # 两边的增量基准通常相同，只编码一次
+            if shared is not None and shared[0] == client.encoder.last:
+                data = shared[1]
+                client.encoder.last = values
+            else:
+                base = client.encoder.last
+                data = frame(SNAPSHOT, client.encoder.encode(self.tick, values))
+                shared = (base, data)
+            client.send(data)
+            self.bytes_sent += len(data)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        period = 1.0 / TICK_RATE
+        next_tick = loop.time()
+        last_report = time.monotonic()
+        while True:
+            start = time.perf_counter()
+            self.step_all()
+            self.tick_times.append(time.perf_counter() - start)
+            next_tick += period
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # 跟不上时不追帧，从现在重新计时
+                self.overruns += 1
+                next_tick = loop.time()
+                delay = 0
+            if time.monotonic() - last_report >= STATS_INTERVAL:
+                print(self.report())
+                last_report = time.monotonic()
+                self.tick_times = []
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        times = sorted(self.tick_times) or [0.0]
+        return {
+            "matches": sum(1 for m in self.matches.values() if m.full()),
+            "clients": sum(len(m.clients) for m in self.matches.values()),
+            "tick": self.tick,
+            "tick_ms_mean": statistics.fmean(times) * 1000,
+            "tick_ms_p99": times[min(len(times) - 1, int(len(times) * 0.99))] * 1000,
+            "overruns": self.overruns,
+            "bytes_sent": self.bytes_sent,
+            "skipped": self.skipped,
+        }
+
+    def report(self):
+        st = self.stats()
+        return (f"matches {st['matches']}  clients {st['clients']}  tick {st['tick_ms_mean']:.2f}/"
+                f"{st['tick_ms_p99']:.2f} ms (mean/p99)  overruns {st['overruns']}  "
+                f"sent {st['bytes_sent'] / 1024:.0f} KiB  skipped {st['skipped']}")
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, snapshot_rate=SNAPSHOT_RATE):
+    server = MatchServer(snapshot_rate)
+    listener = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    print(f"listening on {host}:{port}, {TICK_RATE} ticks/s, {server.snapshot_rate:g} snapshots/s")
+    async with listener:
+        await server.run()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soccer Collision match server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--snapshot-rate", type=int, default=SNAPSHOT_RATE, help="snapshots per second per client")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.snapshot_rate))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import math
+import os
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import numpy as np
+
+from simulation import (
+    WIDTH, HEIGHT, BALL_RADIUS, HIT_DIST, MAX_SHOT_POWER, init_game,
+    approach_point, shoot_planned, step_ball,
+)
+
+# 射门结果表：场地、摩擦都是常量，在固定站位下一脚射门的结果只取决于 (球位置, 角度, 力量)
+# 离线把量化网格上的每一格推演一遍存成定长记录，用 mmap 打开；没算过的格子或站位不同时现算并缓存
+# 表按 1 队进攻（向右）存放，2 队的查询左右镜像后查同一张表
+MAGIC = b"SCST"
+# 物理改变时加一，旧表自动作废、按需重算
+VERSION = 2
+GRID_X0, GRID_Y0, GRID_STEP = 50 + BALL_RADIUS, 50 + BALL_RADIUS, 25
+GRID_NX = (WIDTH - 2 * GRID_X0) // GRID_STEP + 1
+GRID_NY = (HEIGHT - 2 * GRID_Y0) // GRID_STEP + 1
+ANGLE_BINS = 128
+POWER_STEP = 2.5
+POWER_BINS = int(MAX_SHOT_POWER / POWER_STEP)
+# 魔数, 版本, 网格尺寸 x/y/角度/力量, 站位（6 名球员 x/y）
+HEADER = struct.Struct("<4sHHHHH12d")
+ENTRY = np.dtype([("outcome", "u1"), ("contact", "u1"), ("frames", "<u2"), ("x", "<u2"), ("y", "<u2")])
+# outcome：0 未进，1 射门方进球，2 乌龙球，UNKNOWN 表示该格尚未计算
+# contact：第一次触碰的对象，0-2 为本方球员、3-5 为对方球员、WALL 为边线，NO_CONTACT 为没有碰到
+MISS, GOAL, OWN_GOAL, UNKNOWN = 0, 1, 2, 0xff
+WALL, NO_CONTACT = 6, 0xff
+REST_SCALE = 8
+MAX_FRAMES = 600
+POSITION_TOLERANCE = 0.5
+# 瞄准提示缓存键的量化：位置 HINT_POSITION 像素、角度 HINT_ANGLE 弧度、力量 HINT_POWER
+HINT_POSITION, HINT_ANGLE, HINT_POWER = 2.0, 0.005, 0.5
+
+def default_formation():
+    gs = init_game()
+    return [(p["x"], p["y"]) for p in gs['players']]
+
+def grid_index(x, y, angle, power):
+    i = min(GRID_NX - 1, max(0, int(round((x - GRID_X0) / GRID_STEP))))
+    j = min(GRID_NY - 1, max(0, int(round((y - GRID_Y0) / GRID_STEP))))
+    k = int(round(angle % (2 * math.pi) / (2 * math.pi) * ANGLE_BINS)) % ANGLE_BINS
+    m = min(POWER_BINS - 1, max(0, int(round(power / POWER_STEP)) - 1))
+    return i, j, k, m
+
+def grid_values(i, j, k, m):
+    return GRID_X0 + i * GRID_STEP, GRID_Y0 + j * GRID_STEP, k * 2 * math.pi / ANGLE_BINS, (m + 1) * POWER_STEP
+
+def nearest_shooter(team, x, y):
+    # 与 AI 规划器一致：由走到站位点最近的球员射门
+    return min(range(len(team)), key=lambda i: math.hypot(team[i][0] - x, team[i][1] - y))
+
+def simulate_shot(formation, x, y, angle, power, shooter=None, approach=True):
+    # formation 为 1 队进攻视角下 6 名球员的位置；射门球员站到球后方，返回一条表项
+    # approach=False 时射门球员留在 formation 给的位置（按真实局面预测）
+    gs = init_game()
+    players = gs['players']
+    for p, (px, py) in zip(players, formation):
+        p["x"], p["y"] = px, py
+    gs['ball'].update({"x": x, "y": y, "vx": 0, "vy": 0})
+    if approach:
+        tx, ty = approach_point(gs['ball'], angle)
+        if shooter is None:
+            shooter = nearest_shooter(formation[:3], tx, ty)
+        players[shooter]["x"], players[shooter]["y"] = tx, ty
+    shoot_planned(gs, 1, shooter, angle, power)
+    ball = gs['ball']
+    contact = NO_CONTACT
+    outcome = MISS
+    frames = 0
+    while frames < MAX_FRAMES:
+        vx, vy = ball["vx"], ball["vy"]
+        ball_stopped, scored = step_ball(gs)
+        frames += 1
+        if contact == NO_CONTACT and not scored:
+            # 速度方向变了（摩擦只改变大小）：碰后球还会走完本帧剩余的位移，
+            # 距离在 碰撞距离+本帧位移 以内的最近球员就是碰到的对象，否则是边线
+            cross = vx * ball["vy"] - vy * ball["vx"]
+            dot = vx * ball["vx"] + vy * ball["vy"]
+            if abs(cross) > 1e-6 * (vx * vx + vy * vy) or dot < 0:
+                dists = [math.hypot(ball["x"] - p["x"], ball["y"] - p["y"]) for p in players]
+                near = min(range(6), key=dists.__getitem__)
+                contact = near if dists[near] <= HIT_DIST + 2 + math.hypot(vx, vy) else WALL
+        if scored:
+            outcome = GOAL if gs['winner'] == 1 else OWN_GOAL
+            break
+        if ball_stopped:
+            break
+    rest_x = min(65535, max(0, int(round(ball["x"] * REST_SCALE))))
+    rest_y = min(65535, max(0, int(round(ball["y"] * REST_SCALE))))
+    return outcome, contact, frames, rest_x, rest_y
+
+def mirror_state(game_state, team_idx):
+    # 转成 1 队进攻视角：返回 (本方 3 人 + 对方 3 人的位置, 球 x, 球 y)
+    own = game_state['players1'] if team_idx == 1 else game_state['players2']
+    opp = game_state['players2'] if team_idx == 1 else game_state['players1']
+    ball = game_state['ball']
+    if team_idx == 1:
+        return [(p["x"], p["y"]) for p in own + opp], ball["x"], ball["y"]
+    return [(WIDTH - p["x"], p["y"]) for p in own + opp], WIDTH - ball["x"], ball["y"]
+
+def field_result(result, team_idx):
+    # 表项转成真实场地坐标：(outcome, contact, frames, 静止 x, 静止 y)
+    if result is None:
+        return None
+    outcome, contact, frames, rest_x, rest_y = result
+    rest_x /= REST_SCALE
+    rest_y /= REST_SCALE
+    if team_idx == 2:
+        rest_x = WIDTH - rest_x
+    return outcome, contact, frames, rest_x, rest_y
+
+def _build_column(args):
+    formation, i = args
+    column = np.empty((GRID_NY, ANGLE_BINS, POWER_BINS), dtype=ENTRY)
+    for j in range(GRID_NY):
+        for k in range(ANGLE_BINS):
+            for m in range(POWER_BINS):
+                x, y, angle, power = grid_values(i, j, k, m)
+                column[j, k, m] = simulate_shot(formation, x, y, angle, power)
+    return i, column
+
+
+class ShotTable:
+    def __init__(self, path=None, formation=None, writable=False, cache_size=65536):
+        shape = (GRID_NX, GRID_NY, ANGLE_BINS, POWER_BINS)
+        self.path = path
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                header = HEADER.unpack(f.read(HEADER.size))
+            if header[0] != MAGIC or header[1] != VERSION or tuple(header[2:6]) != shape:
+                raise ValueError("shot table does not match this build: " + path)
+            self.formation = [(header[6 + 2 * n], header[7 + 2 * n]) for n in range(6)]
+            self.table = np.memmap(path, dtype=ENTRY, mode="r+" if writable else "r",
+                                   offset=HEADER.size, shape=shape)
+        else:
+            # 没有离线表：全部格子按需计算
+            self.formation = formation or default_formation()
+            self.table = np.empty(shape, dtype=ENTRY)
+            self.table["outcome"] = UNKNOWN
+            writable = True
+        self.writable = writable
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def build(path, formation=None, workers=None):
+        formation = formation or default_formation()
+        shape = (GRID_NX, GRID_NY, ANGLE_BINS, POWER_BINS)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, *shape, *[v for xy in formation for v in xy]))
+        table = np.memmap(path, dtype=ENTRY, mode="r+", offset=HEADER.size, shape=shape)
+        table["outcome"] = UNKNOWN
+        # 按列写入并落盘，中途打断时已算好的列仍然可用，其余格子运行时按需计算
+        start = time.perf_counter()
+        with Pool(workers) as pool:
+            for done, (i, column) in enumerate(pool.imap_unordered(_build_column, [(formation, i) for i in range(GRID_NX)])):
+                table[i] = column
+                table.flush()
+                print(f"column {done + 1}/{GRID_NX}  {time.perf_counter() - start:.0f}s")
+        del table
+        return ShotTable(path)
+
+    def lookup(self, game_state, team_idx, player_idx, angle, power, compute=True):
+        # 返回 (outcome, contact, frames, 静止 x, 静止 y)，坐标为真实场地坐标
+        # compute=False 时只查表和缓存，查不到返回 None
+        return self.lookup_many(game_state, team_idx, [(player_idx, angle, power)], compute)[0]
+
+    def lookup_many(self, game_state, team_idx, shots, compute=True, exact=True):
+        # 同一局面下的多脚射门：镜像和站位比对只做一次
+        # exact=False 时不管其余球员是否离开建表站位都直接用表里的格子：只看球和射门本身的近似结果，
+        # 给 AI 规划器排候选顺序用（之后的推演按真实局面算）
+        formation, x, y = mirror_state(game_state, team_idx)
+        moved = {n for n, ((px, py), (fx, fy)) in enumerate(zip(formation, self.formation))
+                 if abs(px - fx) > POSITION_TOLERANCE or abs(py - fy) > POSITION_TOLERANCE}
+        formation_key = None
+        results = []
+        for player_idx, angle, power in shots:
+            if team_idx == 2:
+                angle = math.pi - angle
+            i, j, k, m = grid_index(x, y, angle, power)
+            gx, gy, gangle, gpower = grid_values(i, j, k, m)
+            tx, ty = approach_point({"x": gx, "y": gy}, gangle)
+            # 除射门球员外都在建表站位上，且射门球员与建表时选的是同一人，才能用表里的格子
+            if not exact or moved <= {player_idx} and player_idx == nearest_shooter(self.formation[:3], tx, ty):
+                entry = self.table[i, j, k, m]
+                if entry["outcome"] != UNKNOWN:
+                    self.hits += 1
+                    result = entry.item()
+                else:
+                    result = self._compute(("table", i, j, k, m), self.formation, gx, gy, gangle, gpower,
+                                           player_idx, compute)
+                    if result is not None and self.writable:
+                        self.table[i, j, k, m] = result
+            else:
+                if formation_key is None:
+                    formation_key = tuple((round(px), round(py)) for px, py in formation)
+                result = self._compute((formation_key, player_idx, i, j, k, m), formation, gx, gy, gangle, gpower,
+                                       player_idx, compute)
+            results.append(field_result(result, team_idx))
+        return results
+
+    def predict(self, mirrored, team_idx, player_idx, angle, power, compute=True):
+        # 瞄准提示：从真实局面推演（球、射门球员和其余球员都在实际位置，角度力量不套网格）
+        # mirrored 为 mirror_state 的结果；缓存键按 HINT_* 量化，走位时相邻几帧共用一次推演
+        formation, x, y = mirrored
+        if team_idx == 2:
+            angle = math.pi - angle
+        key = ("hint", player_idx, round(x / HINT_POSITION), round(y / HINT_POSITION),
+               tuple((round(px / HINT_POSITION), round(py / HINT_POSITION)) for px, py in formation),
+               round(angle / HINT_ANGLE), round(power / HINT_POWER))
+        result = self._compute(key, formation, x, y, angle, power, player_idx, compute, approach=False)
+        return field_result(result, team_idx)
+
+    def _compute(self, key, formation, x, y, angle, power, shooter, compute=True, approach=True):
+        # 瞄准提示在后台线程里调用，缓存的读写加锁；推演本身不持锁
+        with self.lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        if not compute:
+            return None
+        result = simulate_shot(formation, x, y, angle, power, shooter, approach)
+        with self.lock:
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    def coverage(self):
+        return float(np.count_nonzero(self.table["outcome"] != UNKNOWN)) / self.table.size
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self.cache), "coverage": self.coverage()}
+
+
+class ShotPredictor:
+    # 瞄准提示的后台推演：渲染循环每帧提交最新的请求，只取已经算好的结果，从不等待推演
+    # on_ready 在后台线程里调用（例如投递一个事件唤醒等输入的主循环）
+    def __init__(self, table, on_ready=None):
+        self.table = table
+        self.on_ready = on_ready
+        self.cond = threading.Condition()
+        self.request = None
+        self.latest = None
+        self.thread = threading.Thread(target=self._run, name="shot-predictor", daemon=True)
+        self.thread.start()
+
+    def submit(self, game_state, team_idx, player_idx, angle, power):
+        # 返回本局面的预测；还没算好时返回同一球位、同一射门球员的上一次预测，都没有时返回 None
+        # 请求里只放 mirror_state 复制出的数值，后台线程不碰游戏线程的 dict
+        request = (mirror_state(game_state, team_idx), team_idx, player_idx, angle, power)
+        result = self.table.predict(*request, compute=False)
+        if result is not None:
+            return result
+        with self.cond:
+            self.request = request
+            self.cond.notify()
+            latest = self.latest
+        if latest is not None and latest[0][0][1:] == request[0][1:] and latest[0][1:3] == request[1:3]:
+            return latest[1]
+        return None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.request is None:
+                    self.cond.wait()
+                request, self.request = self.request, None
+            result = self.table.predict(*request)
+            with self.cond:
+                self.latest = (request, result)
+            if self.on_ready is not None:
+                self.on_ready()
+
+if __name__ == "__main__":
+    # python shot_table.py build [shot_table.bin]
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("usage: python shot_table.py build [PATH]")
+        sys.exit(1)
+    table = ShotTable.build(sys.argv[2] if len(sys.argv) > 2 else "shot_table.bin")
+    print(table.stats())
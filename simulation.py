@@ -0,0 +1,567 @@
+import math
+import random
+
+# 纯逻辑核心：不依赖 pygame，可在服务器 / CI 中无窗口运行
+WIDTH, HEIGHT = 800, 600
+
+PLAYER_RADIUS = 25
+BALL_RADIUS = 12
+# 下面的速度、摩擦、蓄力速度都按每步给出，物理固定每秒 TICK_RATE 步
+TICK_RATE = 60
+PLAYER_SPEED = 4
+MAX_SHOT_POWER = 15
+POWER_SPEED = 0.25
+FRICTION = 0.96
+GOAL_WIDTH = 150
+GOAL_DEPTH = 20
+
+GOAL_TOP = HEIGHT // 2 - GOAL_WIDTH // 2
+GOAL_BOTTOM = HEIGHT // 2 + GOAL_WIDTH // 2
+HIT_DIST = PLAYER_RADIUS + BALL_RADIUS
+# 每帧位移超过该值才做扫掠检测，慢速滚动仍走原来的离散步进
+SWEEP_SPEED = BALL_RADIUS / 2
+MAX_SWEEP_EVENTS = 8
+
+# 开球站位模板：(x, y)，前 3 个为 players1，后 3 个为 players2
+P1_X = 50 + GOAL_DEPTH + PLAYER_RADIUS + 10
+P2_X = WIDTH - 50 - GOAL_DEPTH - PLAYER_RADIUS - 10
+FORMATION = [
+    (P1_X, HEIGHT // 2), (P1_X + 100, HEIGHT // 2 - 60), (P1_X + 100, HEIGHT // 2 + 60),
+    (P2_X, HEIGHT // 2), (P2_X - 100, HEIGHT // 2 - 60), (P2_X - 100, HEIGHT // 2 + 60),
+]
+
+def init_game(formation=FORMATION):
+    half = len(formation) // 2
+    players = [{"x": x, "y": y, "active": False, "num": i % half + 1} for i, (x, y) in enumerate(formation)]
+    ball = {"x": WIDTH // 2, "y": HEIGHT // 2, "vx": 0, "vy": 0}
+    return {
+        'players1': players[:half],
+        'players2': players[half:],
+        # 两队球员的同一批 dict 按顺序排成一个列表，逐帧遍历时不必再拼接
+        'players': players,
+        'selected_player': 0,
+        'ball': ball,
+        # 场上所有的球；'ball' 是其中被射出（或将被射出）的那一个，普通模式下只有它
+        'balls': [ball],
+        'current_player': 1,
+        'game_state': "aiming",
+        'shot_power': 0,
+        'charging_power': False,
+        'score': {"player1": 0, "player2": 0},
+        'winner': None,
+        'kicker': None
+    }
+
+def reset_positions(game_state, formation=FORMATION):
+    for p, (x, y) in zip(game_state['players'], formation):
+        p["x"], p["y"], p["active"] = x, y, False
+    game_state['ball'].update({"x": WIDTH // 2, "y": HEIGHT // 2, "vx": 0, "vy": 0})
+    game_state['shot_power'] = 0
+    game_state['charging_power'] = False
+    game_state['selected_player'] = 0
+    game_state['kicker'] = None
+
+def goal_scorer(ball):
+    # 球进了哪边的球门：返回得分的队伍，没进返回 None
+    if ball["x"] - BALL_RADIUS < 30 and HEIGHT // 2 - GOAL_WIDTH // 2 < ball["y"] < HEIGHT // 2 + GOAL_WIDTH // 2:
+        return 2
+    if ball["x"] + BALL_RADIUS > WIDTH - 30 and HEIGHT // 2 - GOAL_WIDTH // 2 < ball["y"] < HEIGHT // 2 + GOAL_WIDTH // 2:
+        return 1
+    return None
+
+def score_goal(game_state, winner):
+    game_state['game_state'] = "scored"
+    game_state['winner'] = winner
+    game_state['score']["player%d" % winner] += 1
+
+def check_goal(game_state):
+    winner = goal_scorer(game_state['ball'])
+    if winner is None:
+        return False
+    score_goal(game_state, winner)
+    return True
+
+def move_ball(game_state, dt=1.0):
+    ball = game_state['ball']
+    ball["x"] += ball["vx"] * dt
+    ball["y"] += ball["vy"] * dt
+    friction = FRICTION if dt == 1.0 else FRICTION ** dt
+    ball["vx"] *= friction
+    ball["vy"] *= friction
+    if abs(ball["vx"]) < 0.1 and abs(ball["vy"]) < 0.1:
+        ball["vx"] = ball["vy"] = 0
+        return True
+    return False
+
+def handle_collisions(game_state):
+    ball = game_state['ball']
+    # 与 sweep_ball 一致：射门球员在球离开身体前不参与碰撞，低力量射门与快球同样处理
+    kicker = game_state.get('kicker')
+    skip = None if kicker is None else (kicker[0] - 1) * len(game_state['players1']) + kicker[1]
+    for i, player in enumerate(game_state['players']):
+        if i == skip:
+            continue
+        dx = ball["x"] - player["x"]
+        dy = ball["y"] - player["y"]
+        dist = math.hypot(dx, dy)
+        if dist < PLAYER_RADIUS + BALL_RADIUS:
+            angle = math.atan2(dy, dx)
+            overlap = PLAYER_RADIUS + BALL_RADIUS - dist + 1
+            ball["x"] += math.cos(angle) * overlap
+            ball["y"] += math.sin(angle) * overlap
+            speed = math.hypot(ball["vx"], ball["vy"]) * 0.9 + 2.0
+            ball["vx"] = speed * math.cos(angle)
+            ball["vy"] = speed * math.sin(angle)
+
+def handle_boundary(game_state):
+    bounce_ball(game_state['ball'])
+
+def bounce_ball(ball):
+    in_left_goal = (
+        ball["x"] < 50 + BALL_RADIUS and
+        (HEIGHT // 2 - GOAL_WIDTH // 2 - BALL_RADIUS) < ball["y"] < (HEIGHT // 2 + GOAL_WIDTH // 2 + BALL_RADIUS)
+    )
+    in_right_goal = (
+        ball["x"] > WIDTH - 50 - BALL_RADIUS and
+        (HEIGHT // 2 - GOAL_WIDTH // 2 - BALL_RADIUS) < ball["y"] < (HEIGHT // 2 + GOAL_WIDTH // 2 + BALL_RADIUS)
+    )
+    if not (in_left_goal or in_right_goal):
+        if ball["x"] < 50 + BALL_RADIUS:
+            ball["x"] = 50 + BALL_RADIUS
+            ball["vx"] = -ball["vx"] * 0.7
+        elif ball["x"] > WIDTH - 50 - BALL_RADIUS:
+            ball["x"] = WIDTH - 50 - BALL_RADIUS
+            ball["vx"] = -ball["vx"] * 0.7
+    if ball["y"] < 50 + BALL_RADIUS:
+        ball["y"] = 50 + BALL_RADIUS
+        ball["vy"] = -ball["vy"] * 0.7
+    elif ball["y"] > HEIGHT - 50 - BALL_RADIUS:
+        ball["y"] = HEIGHT - 50 - BALL_RADIUS
+        ball["vy"] = -ball["vy"] * 0.7
+
+def get_current_team(game_state):
+    return game_state['players1'] if game_state['current_player'] == 1 else game_state['players2']
+
+def deactivate_players(game_state):
+    for pl in game_state['players']:
+        pl["active"] = False
+
+def kick_ball(game_state, power):
+    # 玩家松开空格：沿球员->球方向射出
+    cur_player = get_current_team(game_state)[game_state['selected_player']]
+    dx = game_state['ball']["x"] - cur_player["x"]
+    dy = game_state['ball']["y"] - cur_player["y"]
+    dist = math.hypot(dx, dy)
+    if dist < 150 and power > 0:
+        dx /= dist
+        dy /= dist
+        game_state['ball']["vx"] = dx * power * 1.5
+        game_state['ball']["vy"] = dy * power * 1.5
+        game_state['game_state'] = "moving"
+        game_state['kicker'] = (game_state['current_player'], game_state['selected_player'])
+        deactivate_players(game_state)
+        return True
+    return False
+
+def ai_choose_player_and_move(game_state, team_idx):
+    team = game_state['players1'] if team_idx == 1 else game_state['players2']
+    ball = game_state['ball']
+    dists = [math.hypot(ball['x'] - p['x'], ball['y'] - p['y']) for p in team]
+    min_i = dists.index(min(dists))
+    game_state['selected_player'] = min_i
+    cur_player = team[min_i]
+    dx, dy = ball['x'] - cur_player['x'], ball['y'] - cur_player['y']
+    dist = math.hypot(dx, dy)
+    move_speed = PLAYER_SPEED
+    if dist > 40:
+        move_x = move_speed * dx / dist
+        move_y = move_speed * dy / dist
+        cur_player['x'] += move_x
+        cur_player['y'] += move_y
+        cur_player['x'] = max(60, min(WIDTH - 60, cur_player['x']))
+        cur_player['y'] = max(60, min(HEIGHT - 60, cur_player['y']))
+        return False
+    else:
+        return True
+
+def ai_charge_and_shoot(game_state, team_idx, rng=random):
+    team = game_state['players1'] if team_idx == 1 else game_state['players2']
+    cur_player = team[game_state['selected_player']]
+    ball = game_state['ball']
+    dx, dy = ball['x'] - cur_player['x'], ball['y'] - cur_player['y']
+    dist = math.hypot(dx, dy)
+    if dist < 150:
+        angle = math.atan2(dy, dx)
+        if team_idx == 1:
+            tx, ty = WIDTH - 20, HEIGHT // 2 + rng.randint(-40, 40)
+        else:
+            tx, ty = 20, HEIGHT // 2 + rng.randint(-40, 40)
+        tdx, tdy = tx - ball['x'], ty - ball['y']
+        tdist = math.hypot(tdx, tdy)
+        if tdist > 0:
+            tdx, tdy = tdx / tdist, tdy / tdist
+        else:
+            tdx, tdy = math.cos(angle), math.sin(angle)
+        shot_power = rng.uniform(10, 15)
+        game_state['ball']["vx"] = tdx * shot_power * 1.5
+        game_state['ball']["vy"] = tdy * shot_power * 1.5
+        game_state['game_state'] = "moving"
+        game_state['kicker'] = (team_idx, game_state['selected_player'])
+        deactivate_players(game_state)
+        game_state['shot_power'] = 0
+        return True
+    return False
+
+# 规划好的射门：(球员序号, 角度编码, 力量编码)，编码成整数便于回放文件原样记录
+PLAN_ANGLE_STEPS = 65536
+PLAN_POWER_SCALE = 1000
+# 射门前站在球后方的距离（与 ai_choose_player_and_move 的 40 像素触球距离一致）
+APPROACH_DIST = 38
+# 规划器分帧推演、本帧还没出结果时 plan() 返回它
+PLAN_PENDING = object()
+
+def encode_plan(player_idx, angle, power):
+    angle_code = int(round(angle % (2 * math.pi) / (2 * math.pi) * PLAN_ANGLE_STEPS)) % PLAN_ANGLE_STEPS
+    power_code = int(round(min(max(power, 0), MAX_SHOT_POWER) * PLAN_POWER_SCALE))
+    return (player_idx, angle_code, power_code)
+
+def decode_plan(plan):
+    player_idx, angle_code, power_code = plan
+    return player_idx, angle_code * 2 * math.pi / PLAN_ANGLE_STEPS, power_code / PLAN_POWER_SCALE
+
+def approach_point(ball, angle):
+    x = ball["x"] - math.cos(angle) * APPROACH_DIST
+    y = ball["y"] - math.sin(angle) * APPROACH_DIST
+    return max(60, min(WIDTH - 60, x)), max(60, min(HEIGHT - 60, y))
+
+def shoot_planned(game_state, team_idx, player_idx, angle, power):
+    game_state['selected_player'] = player_idx
+    game_state['ball']["vx"] = math.cos(angle) * power * 1.5
+    game_state['ball']["vy"] = math.sin(angle) * power * 1.5
+    game_state['game_state'] = "moving"
+    game_state['kicker'] = (team_idx, player_idx)
+    deactivate_players(game_state)
+    game_state['shot_power'] = 0
+
+def ai_follow_plan(game_state, team_idx, plan):
+    # 选中的球员走到球后方的站位点，到位后按规划的角度和力量射门；返回是否已射门
+    player_idx, angle, power = decode_plan(plan)
+    team = game_state['players1'] if team_idx == 1 else game_state['players2']
+    game_state['selected_player'] = player_idx
+    cur_player = team[player_idx]
+    tx, ty = approach_point(game_state['ball'], angle)
+    dx, dy = tx - cur_player['x'], ty - cur_player['y']
+    dist = math.hypot(dx, dy)
+    if dist > PLAYER_SPEED:
+        cur_player['x'] += PLAYER_SPEED * dx / dist
+        cur_player['y'] += PLAYER_SPEED * dy / dist
+        return False
+    cur_player['x'], cur_player['y'] = tx, ty
+    shoot_planned(game_state, team_idx, player_idx, angle, power)
+    return True
+
+def time_of_impact(ball, players, limit):
+    # 返回 (t, 事件, 对象)：t 为本帧内最早碰撞时刻（帧为单位），无碰撞时事件为 None
+    bx, by, vx, vy = ball["x"], ball["y"], ball["vx"], ball["vy"]
+    best_t, event, target = limit, None, None
+    a = vx * vx + vy * vy
+    for p in players:
+        rx, ry = bx - p["x"], by - p["y"]
+        half_b = rx * vx + ry * vy
+        if half_b >= 0:
+            continue
+        c = rx * rx + ry * ry - HIT_DIST * HIT_DIST
+        if c < 0:
+            t = 0.0
+        else:
+            disc = half_b * half_b - a * c
+            if disc < 0:
+                continue
+            t = (-half_b - math.sqrt(disc)) / a
+        if t <= best_t:
+            best_t, event, target = t, "player", p
+    if vy < 0:
+        t = max(0.0, (50 + BALL_RADIUS - by) / vy)
+        if t <= best_t:
+            best_t, event, target = t, "wall_y", 50 + BALL_RADIUS
+    elif vy > 0:
+        t = max(0.0, (HEIGHT - 50 - BALL_RADIUS - by) / vy)
+        if t <= best_t:
+            best_t, event, target = t, "wall_y", HEIGHT - 50 - BALL_RADIUS
+    if vx != 0:
+        wall_x = 50 + BALL_RADIUS if vx < 0 else WIDTH - 50 - BALL_RADIUS
+        goal_x = 30 + BALL_RADIUS if vx < 0 else WIDTH - 30 - BALL_RADIUS
+        t = max(0.0, (wall_x - bx) / vx)
+        if t <= best_t:
+            y_at = by + vy * t
+            if not (GOAL_TOP - BALL_RADIUS < y_at < GOAL_BOTTOM + BALL_RADIUS):
+                best_t, event, target = t, "wall_x", wall_x
+            else:
+                # 球门口没有边线，继续看是否越过球门线
+                t = max(0.0, (goal_x - bx) / vx)
+                if t <= best_t and GOAL_TOP < by + vy * t < GOAL_BOTTOM:
+                    best_t, event, target = t, "goal", goal_x
+    return best_t, event, target
+
+def sweep_ball(game_state, dt):
+    # 扫掠圆积分：按时间顺序依次处理本帧内的球员碰撞、边线反弹和进球
+    ball = game_state['ball']
+    # 与离散步进一致：同一名球员每帧最多触球一次，避免夹在球员和边线之间时反复加速
+    # 射门球员在球离开身体前不参与碰撞（射门方向可能穿过自己）
+    players = list(game_state['players'])
+    kicker = game_state.get('kicker')
+    if kicker is not None:
+        players.pop((kicker[0] - 1) * len(game_state['players1']) + kicker[1])
+    remaining = dt
+    for _ in range(MAX_SWEEP_EVENTS):
+        t, event, target = time_of_impact(ball, players, remaining)
+        ball["x"] += ball["vx"] * t
+        ball["y"] += ball["vy"] * t
+        remaining -= t
+        if event is None:
+            break
+        if event == "player":
+            players = [p for p in players if p is not target]
+            dx = ball["x"] - target["x"]
+            dy = ball["y"] - target["y"]
+            dist = math.hypot(dx, dy)
+            nx, ny = (dx / dist, dy / dist) if dist > 0 else (1.0, 0.0)
+            overlap = HIT_DIST - dist + 1
+            ball["x"] += nx * overlap
+            ball["y"] += ny * overlap
+            speed = math.hypot(ball["vx"], ball["vy"]) * 0.9 + 2.0
+            ball["vx"] = speed * nx
+            ball["vy"] = speed * ny
+        elif event == "wall_x":
+            ball["x"] = target
+            ball["vx"] = -ball["vx"] * 0.7
+        elif event == "wall_y":
+            ball["y"] = target
+            ball["vy"] = -ball["vy"] * 0.7
+        else:
+            # 越过球门线即进球，停在门线内侧
+            ball["x"] = target - 1e-6 if ball["vx"] < 0 else target + 1e-6
+            return True
+    else:
+        ball["x"] += ball["vx"] * remaining
+        ball["y"] += ball["vy"] * remaining
+    return False
+
+def release_kicker(game_state):
+    kicker = game_state.get('kicker')
+    if kicker is None:
+        return
+    team = game_state['players1'] if kicker[0] == 1 else game_state['players2']
+    p = team[kicker[1]]
+    ball = game_state['ball']
+    if math.hypot(ball["x"] - p["x"], ball["y"] - p["y"]) >= HIT_DIST:
+        game_state['kicker'] = None
+
+def integrate_ball(game_state, dt=1.0):
+    ball = game_state['ball']
+    if math.hypot(ball["vx"], ball["vy"]) * dt <= SWEEP_SPEED:
+        ball_stopped = move_ball(game_state, dt)
+        handle_collisions(game_state)
+        handle_boundary(game_state)
+        release_kicker(game_state)
+        return ball_stopped, check_goal(game_state)
+    scored = sweep_ball(game_state, dt)
+    release_kicker(game_state)
+    if scored:
+        return False, check_goal(game_state)
+    friction = FRICTION if dt == 1.0 else FRICTION ** dt
+    ball["vx"] *= friction
+    ball["vy"] *= friction
+    ball_stopped = abs(ball["vx"]) < 0.1 and abs(ball["vy"]) < 0.1
+    if ball_stopped:
+        ball["vx"] = ball["vy"] = 0
+    handle_boundary(game_state)
+    return ball_stopped, check_goal(game_state)
+
+def step_ball(game_state, dt=1.0):
+    # 一帧物理：快球走扫掠检测，慢球走 移动 -> 碰撞 -> 边界 -> 进球判定
+    return integrate_ball(game_state, dt)
+
+def end_turn(game_state):
+    game_state['current_player'] = 2 if game_state['current_player'] == 1 else 1
+    game_state['game_state'] = "aiming"
+    game_state['shot_power'] = 0
+    game_state['charging_power'] = False
+    game_state['kicker'] = None
+    deactivate_players(game_state)
+
+
+class Simulator:
+    # 无窗口比赛驱动：main() 与批量模拟共用同一套逻辑
+    def __init__(self, mode="pvp", seed=None, ai_teams=None, planner=None, analytics=None):
+        self.mode = mode
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if ai_teams is None:
+            ai_teams = (2,) if mode == "vs_ai" else (1, 2) if mode == "ai_vs_ai" else ()
+        self.ai_teams = tuple(ai_teams)
+        # 有规划器时 AI 每回合先规划一次射门，再按计划走位射门；没有时沿用原来的就近球员射门
+        self.planner = planner
+        self.plan = None
+        # 可选的比赛统计（analytics.MatchAnalytics）：射门、运动阶段每帧、回合结束时各调用一次
+        self.analytics = analytics
+        self.state = init_game()
+        self.frames = 0
+        self.turns = 0
+
+    def reset(self):
+        self.state = init_game()
+        self.plan = None
+        self.frames = 0
+        self.turns = 0
+
+    def set_plan(self, plan):
+        self.plan = plan
+
+    def turn_rng(self):
+        # 有种子时每次射门的随机数只由 (种子, 回合数) 决定，回放可以从任意关键帧接着推进
+        if self.seed is None:
+            return self.rng
+        return random.Random(self.seed * 1000003 + self.turns)
+
+    def is_ai_turn(self):
+        return self.state['current_player'] in self.ai_teams
+
+    def current_team(self):
+        return get_current_team(self.state)
+
+    def select_player(self, idx):
+        if self.state['game_state'] == "aiming" and not self.is_ai_turn():
+            self.state['selected_player'] = idx
+
+    def player_at(self, x, y):
+        for i, p in enumerate(self.current_team()):
+            if math.hypot(x - p["x"], y - p["y"]) < PLAYER_RADIUS + 6:
+                return i
+        return None
+
+    def move_selected(self, dx, dy, slow=False):
+        gs = self.state
+        if gs['game_state'] != "aiming" or self.is_ai_turn():
+            return
+        cur_player = self.current_team()[gs['selected_player']]
+        cur_player["active"] = True
+        speed = PLAYER_SPEED * (0.7 if slow else 1)
+        if dx < 0 and cur_player["x"] > 60:
+            cur_player["x"] -= speed
+        if dx > 0 and cur_player["x"] < WIDTH - 60:
+            cur_player["x"] += speed
+        if dy < 0 and cur_player["y"] > 60:
+            cur_player["y"] -= speed
+        if dy > 0 and cur_player["y"] < HEIGHT - 60:
+            cur_player["y"] += speed
+
+    def start_charge(self):
+        gs = self.state
+        if gs['game_state'] == "aiming" and not self.is_ai_turn() and not gs['charging_power']:
+            gs['charging_power'] = True
+            gs['shot_power'] = 0
+
+    def release_shot(self):
+        gs = self.state
+        if gs['game_state'] != "aiming" or self.is_ai_turn() or not gs['charging_power']:
+            return False
+        gs['charging_power'] = False
+        fired = kick_ball(gs, gs['shot_power'])
+        gs['shot_power'] = 0
+        if fired:
+            self.turns += 1
+            if self.analytics is not None:
+                self.analytics.shot(gs)
+        return fired
+
+    def shoot(self, player_idx, power):
+        # 无窗口调用：直接以给定力量射门
+        self.select_player(player_idx)
+        self.start_charge()
+        self.state['shot_power'] = min(power, MAX_SHOT_POWER)
+        return self.release_shot()
+
+    def continue_after_goal(self):
+        gs = self.state
+        if gs['game_state'] != "scored":
+            return
+        reset_positions(gs)
+        gs['current_player'] = 2 if gs['winner'] == 1 else 1
+        gs['game_state'] = "aiming"
+        gs['winner'] = None
+
+    def think(self):
+        # AI 回合还没有计划时先让规划器推演；分帧推演本帧没算完时返回 True，这一帧不推进
+        gs = self.state
+        if gs['game_state'] != "aiming" or self.plan is not None or self.planner is None or not self.is_ai_turn():
+            return False
+        plan = self.planner.plan(gs, gs['current_player'])
+        if plan is PLAN_PENDING:
+            return True
+        self.set_plan(plan)
+        return False
+
+    def step(self):
+        if self.think():
+            return self.state['game_state']
+        gs = self.state
+        self.frames += 1
+        if gs['game_state'] == "aiming":
+            team_idx = gs['current_player']
+            if self.is_ai_turn():
+                shot = False
+                if self.plan is not None:
+                    if ai_follow_plan(gs, team_idx, self.plan):
+                        self.plan = None
+                        shot = True
+                elif ai_choose_player_and_move(gs, team_idx):
+                    shot = ai_charge_and_shoot(gs, team_idx, self.turn_rng())
+                if shot:
+                    self.turns += 1
+                    if self.analytics is not None:
+                        self.analytics.shot(gs)
+            else:
+                self.current_team()[gs['selected_player']]["active"] = True
+                if gs['charging_power']:
+                    gs['shot_power'] += POWER_SPEED
+                    if gs['shot_power'] > MAX_SHOT_POWER:
+                        gs['shot_power'] = MAX_SHOT_POWER
+        elif gs['game_state'] == "moving":
+            ball_stopped, scored = step_ball(gs)
+            if self.analytics is not None:
+                self.analytics.frame(gs)
+                if ball_stopped or scored:
+                    self.analytics.turn_end(gs)
+            if ball_stopped and not scored:
+                end_turn(gs)
+        return gs['game_state']
+
+    def run_until_rest(self, max_frames=2000):
+        for _ in range(max_frames):
+            if self.state['game_state'] != "moving":
+                break
+            self.step()
+        return self.state['game_state']
+
+    def play_turn(self, max_frames=2000):
+        # AI 回合：走位、射门、直到球停或进球；进球后自动开球
+        turns = self.turns
+        for _ in range(max_frames):
+            result = self.step()
+            if self.turns > turns and result != "moving":
+                break
+        else:
+            # 球被夹在球员与边线之间会一直弹跳，超时后强制停球换人
+            if self.state['game_state'] == "moving":
+                self.state['ball']["vx"] = self.state['ball']["vy"] = 0
+                end_turn(self.state)
+        if self.state['game_state'] == "scored":
+            self.continue_after_goal()
+            return "scored"
+        return self.state['game_state']
+
+    def play(self, turns, max_frames=2000):
+        for _ in range(turns):
+            self.play_turn(max_frames)
+        return self.state['score']
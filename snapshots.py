@@ -0,0 +1,122 @@
+import zlib
+from array import array
+
+# 局面快照：把 game_state 里会变的数值按固定顺序平铺进 array('d')，
+# 保存/恢复都是原地读写，不新建 dict 和 list（AI 推演的草稿局面、网络快照、回放倒带都用它）
+# 布局：每个球 x/y/vx/vy（game_state['balls'] 的顺序），每名球员 x/y/active，然后是 SCALARS 里的标量
+# 球和球员的个数不写进快照，由调用方保证同一块缓冲只在同样规模的局面之间读写
+STATES = ("aiming", "moving", "scored")
+SCALARS = 10
+
+def state_size(n_players, n_balls=1):
+    return 4 * n_balls + 3 * n_players + SCALARS
+
+def pack_into(game_state, buf, offset=0):
+    i = offset
+    current = 0
+    for k, ball in enumerate(game_state['balls']):
+        buf[i] = ball["x"]
+        buf[i + 1] = ball["y"]
+        buf[i + 2] = ball["vx"]
+        buf[i + 3] = ball["vy"]
+        if ball is game_state['ball']:
+            current = k
+        i += 4
+    for p in game_state['players']:
+        buf[i] = p["x"]
+        buf[i + 1] = p["y"]
+        buf[i + 2] = p["active"]
+        i += 3
+    kicker = game_state['kicker']
+    buf[i] = game_state['shot_power']
+    buf[i + 1] = game_state['charging_power']
+    buf[i + 2] = game_state['current_player']
+    buf[i + 3] = game_state['selected_player']
+    buf[i + 4] = STATES.index(game_state['game_state'])
+    buf[i + 5] = game_state['score']["player1"]
+    buf[i + 6] = game_state['score']["player2"]
+    buf[i + 7] = game_state['winner'] or 0
+    buf[i + 8] = -1 if kicker is None else kicker[0] * 16 + kicker[1]
+    buf[i + 9] = current
+
+def unpack_from(game_state, buf, offset=0):
+    # 写回已有的 dict（球员和球 dict 的身份不变，players / players1 / players2 / balls 仍指向同一批对象）
+    balls = game_state['balls']
+    i = offset
+    for ball in balls:
+        ball["x"] = buf[i]
+        ball["y"] = buf[i + 1]
+        ball["vx"] = buf[i + 2]
+        ball["vy"] = buf[i + 3]
+        i += 4
+    for p in game_state['players']:
+        p["x"] = buf[i]
+        p["y"] = buf[i + 1]
+        p["active"] = buf[i + 2] != 0
+        i += 3
+    game_state['shot_power'] = buf[i]
+    game_state['charging_power'] = buf[i + 1] != 0
+    game_state['current_player'] = int(buf[i + 2])
+    game_state['selected_player'] = int(buf[i + 3])
+    game_state['game_state'] = STATES[int(buf[i + 4])]
+    game_state['score']["player1"] = int(buf[i + 5])
+    game_state['score']["player2"] = int(buf[i + 6])
+    game_state['winner'] = int(buf[i + 7]) or None
+    kicker = int(buf[i + 8])
+    game_state['kicker'] = None if kicker < 0 else (kicker // 16, kicker % 16)
+    game_state['ball'] = balls[int(buf[i + 9])]
+
+def snapshot(game_state):
+    buf = array("d", bytes(8 * state_size(len(game_state['players']), len(game_state['balls']))))
+    pack_into(game_state, buf)
+    return buf
+
+def state_hash(game_state):
+    # 结构哈希：同样的局面在任何进程、任何次运行中都得到同一个值
+    return zlib.crc32(snapshot(game_state).tobytes())
+
+
+class StateRing:
+    # 最近 capacity 个局面的环形缓冲，满了覆盖最旧的；用于回放倒带
+    def __init__(self, capacity, n_players=6, n_balls=1):
+        self.capacity = capacity
+        self.size = state_size(n_players, n_balls)
+        self.buf = array("d", bytes(8 * self.size * capacity))
+        self.frames = array("q", bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+
+    def push(self, game_state, frame=0):
+        slot = self.head
+        pack_into(game_state, self.buf, slot * self.size)
+        self.frames[slot] = frame
+        self.head = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return slot
+
+    def slot(self, back=0):
+        # back=0 为最近一次保存的槽位
+        if not 0 <= back < self.count:
+            raise IndexError("snapshot not in ring")
+        return (self.head - 1 - back) % self.capacity
+
+    def restore(self, game_state, back=0):
+        slot = self.slot(back)
+        unpack_from(game_state, self.buf, slot * self.size)
+        return self.frames[slot]
+
+    def pop(self, game_state):
+        # 恢复最近一次保存的局面并将其移出
+        frame = self.restore(game_state)
+        self.head = (self.head - 1) % self.capacity
+        self.count -= 1
+        return frame
+
+    def hash(self, back=0):
+        slot = self.slot(back)
+        start = slot * self.size * 8
+        return zlib.crc32(memoryview(self.buf).cast("B")[start:start + self.size * 8])
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
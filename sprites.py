@@ -0,0 +1,87 @@
+import math
+
+import pygame
+
+from simulation import PLAYER_RADIUS, BALL_RADIUS
+from text_cache import render_text
+
+# 精灵图集：球员（两队 x 普通/选中 x 号码）和不同旋转角度的足球在启动时画好，每帧只需 blit
+BALL_FRAMES = 16
+# 正五边形旋转 72 度后与自身重合，一组帧只需覆盖这一段
+BALL_PERIOD = 2 * math.pi / 5
+SELECT_COLOR = (255, 255, 0)
+PENTAGON = [(0, -1), (0.95, -0.31), (0.59, 0.81), (-0.59, 0.81), (-0.95, -0.31)]
+
+def draw_ball(surf, center, radius, rotation=0.0):
+    sx, sy = center
+    pygame.draw.circle(surf, (235, 235, 235), (int(sx), int(sy)), radius)
+    for i in range(5):
+        angle = i * (2 * math.pi / 5) + rotation
+        pts = []
+        for px, py in PENTAGON:
+            a = angle + math.atan2(py, px)
+            r = radius * 0.45 if i % 2 == 0 else radius * 0.28
+            pts.append((int(sx + math.cos(a) * r), int(sy + math.sin(a) * r)))
+        pygame.draw.polygon(surf, (40, 40, 40), pts)
+
+
+class SpriteAtlas:
+    def __init__(self, font, team_colors, max_num=3):
+        self.font = font
+        self.team_colors = team_colors
+        self.player_half = PLAYER_RADIUS + 10
+        self.players = {}
+        for team in team_colors:
+            for num in range(1, max_num + 1):
+                for selected in (False, True):
+                    self.player(team, num, selected)
+        self.ball_frames = []
+        for k in range(BALL_FRAMES):
+            surf = pygame.Surface((BALL_RADIUS * 2, BALL_RADIUS * 2), pygame.SRCALPHA)
+            draw_ball(surf, (BALL_RADIUS, BALL_RADIUS), BALL_RADIUS, k * BALL_PERIOD / BALL_FRAMES)
+            self.ball_frames.append(surf)
+        # 原来的“阴影”是 BLEND_RGBA_ADD 叠加到画面上的，保持单独一层
+        self.ball_shadow = pygame.Surface((BALL_RADIUS * 2, BALL_RADIUS * 2), pygame.SRCALPHA)
+        pygame.draw.circle(self.ball_shadow, (50, 50, 50, 90), (BALL_RADIUS, BALL_RADIUS + 3), int(BALL_RADIUS * 0.97))
+        # 每个球各自的滚动状态（多球模式），键为球 dict 的 id
+        self._roll = {}
+
+    def player(self, team, num, selected):
+        key = (team, num, selected)
+        surf = self.players.get(key)
+        if surf is None:
+            # 球员号码可超出初始范围（大名单），首次用到时补画
+            c = self.player_half
+            surf = pygame.Surface((c * 2, c * 2), pygame.SRCALPHA)
+            border = (255, 255, 255)
+            if selected:
+                border = SELECT_COLOR
+                pygame.draw.circle(surf, SELECT_COLOR, (c, c), PLAYER_RADIUS + 7, 3)
+            pygame.draw.circle(surf, self.team_colors[team], (c, c), PLAYER_RADIUS)
+            pygame.draw.circle(surf, border, (c, c), PLAYER_RADIUS, 2)
+            num_text = render_text(self.font, str(num), True, (255, 255, 255))
+            surf.blit(num_text, (c - num_text.get_width() // 2, c - num_text.get_height() // 2))
+            self.players[key] = surf
+        return surf
+
+    def ball_frame(self, ball):
+        # 按累计滚动距离选帧：滚过 r 的距离球转 1 弧度
+        roll = self._roll.get(id(ball))
+        if roll is None:
+            if len(self._roll) > 16:
+                self._roll.clear()
+            roll = self._roll[id(ball)] = {"x": ball["x"], "y": ball["y"], "dist": 0.0}
+        else:
+            roll["dist"] += math.hypot(ball["x"] - roll["x"], ball["y"] - roll["y"])
+        roll["x"], roll["y"] = ball["x"], ball["y"]
+        angle = (roll["dist"] / BALL_RADIUS) % BALL_PERIOD
+        return self.ball_frames[int(angle / BALL_PERIOD * BALL_FRAMES) % BALL_FRAMES]
+
+    def draw_player(self, screen, team, p, selected, pos):
+        surf = self.player(team, p['num'], selected)
+        screen.blit(surf, (pos[0] - self.player_half, pos[1] - self.player_half))
+
+    def draw_ball(self, screen, ball, pos):
+        x, y = int(pos[0]) - BALL_RADIUS, int(pos[1]) - BALL_RADIUS
+        screen.blit(self.ball_frame(ball), (x, y))
+        screen.blit(self.ball_shadow, (x, y), special_flags=pygame.BLEND_RGBA_ADD)
@@ -0,0 +1,45 @@
+import math
+import random
+
+from broadphase import SpatialHash
+
+
+def brute_force(bodies):
+    # 真正相交的圆对
+    keys = sorted(bodies)
+    return {(a, b) for i, a in enumerate(keys) for b in keys[i + 1:]
+            if math.hypot(bodies[a][0] - bodies[b][0], bodies[a][1] - bodies[b][1]) < bodies[a][2] + bodies[b][2]}
+
+def check(grid, bodies):
+    found = list(grid.pairs())
+    # 每对只报告一次，且包含全部真正相交的圆对
+    assert len(found) == len(set(found))
+    assert all(a < b for a, b in found)
+    assert brute_force(bodies) <= set(found)
+
+def test_pairs_cover_brute_force():
+    rng = random.Random(3)
+    grid = SpatialHash(64)
+    bodies = {}
+    for key in range(80):
+        bodies[key] = (rng.uniform(0, 800), rng.uniform(0, 600), rng.choice((12, 25)))
+        grid.insert(key, *bodies[key])
+    check(grid, bodies)
+    for _ in range(50):
+        for key in rng.sample(sorted(bodies), 20):
+            x, y, r = bodies[key]
+            bodies[key] = (x + rng.uniform(-30, 30), y + rng.uniform(-30, 30), r)
+            grid.move(key, bodies[key][0], bodies[key][1])
+        check(grid, bodies)
+
+def test_remove_and_reinsert():
+    grid = SpatialHash(64)
+    grid.insert(1, 100, 100, 25)
+    grid.insert(2, 120, 100, 25)
+    assert list(grid.pairs()) == [(1, 2)]
+    grid.remove(2)
+    assert list(grid.pairs()) == []
+    grid.insert(1, 500, 500, 25)
+    grid.insert(2, 510, 500, 12)
+    assert list(grid.pairs()) == [(1, 2)]
+    assert not grid.query(100, 100, 1)
@@ -0,0 +1,80 @@
+import os
+
+from history_writer import HistoryWriter, encode_record, read_journal
+
+
+def journal_records():
+    match = {"key": "test:1", "mode": "PvP", "started_at": 1000.0}
+    return [
+        dict(match, seq=1, event="goal", args=[1, 1, 0, 1001.0]),
+        dict(match, seq=2, event="goal", args=[2, 1, 1, 1002.0]),
+        dict(match, seq=3, event="finish", args=[1003.0]),
+    ]
+
+def write_journal(path, records, tail=b""):
+    with open(path, "wb") as f:
+        for r in records:
+            f.write(encode_record(r))
+        f.write(tail)
+
+def test_read_journal_drops_partial_tail(tmp_path):
+    path = tmp_path / "j"
+    records = journal_records()
+    full = sum(len(encode_record(r)) for r in records[:2])
+    write_journal(path, records[:2], encode_record(records[2])[:-3])
+    got, good = read_journal(str(path))
+    assert got == records[:2]
+    assert good == full
+
+def test_read_journal_stops_at_bad_crc(tmp_path):
+    path = tmp_path / "j"
+    data = bytearray(b"".join(encode_record(r) for r in journal_records()))
+    first = len(encode_record(journal_records()[0]))
+    data[first + 10] ^= 0xff
+    path.write_bytes(bytes(data))
+    got, good = read_journal(str(path))
+    assert got == journal_records()[:1]
+    assert good == first
+
+def test_read_journal_missing_file(tmp_path):
+    assert read_journal(str(tmp_path / "missing")) == ([], 0)
+
+def open_writer(tmp_path):
+    writer = HistoryWriter(str(tmp_path / "history.db"), flush_interval=0.05).start()
+    assert writer.flush()
+    return writer
+
+def test_recovers_journal_once(tmp_path):
+    journal = str(tmp_path / "history.db.journal")
+    write_journal(journal, journal_records(), b"\x05\x00")
+    writer = open_writer(tmp_path)
+    try:
+        assert writer.recovered == 3
+        [row] = writer.recent()
+        assert (row["score1"], row["score2"], row["finished"]) == (1, 1, 1)
+    finally:
+        writer.close()
+    assert os.path.getsize(journal) == 0
+
+    # 清空日志前崩溃：已提交的序号再次出现时跳过，比分不会重复累加
+    write_journal(journal, journal_records())
+    writer = open_writer(tmp_path)
+    try:
+        assert writer.recovered == 0
+        [row] = writer.recent()
+        assert (row["score1"], row["score2"]) == (1, 1)
+    finally:
+        writer.close()
+
+def test_events_reach_database(tmp_path):
+    writer = open_writer(tmp_path)
+    try:
+        match = writer.new_match("vs AI")
+        writer.record_goal(match, 2, 0, 1)
+        writer.finish_match(match)
+        assert writer.flush()
+        [row] = writer.recent()
+        assert (row["mode"], row["score1"], row["score2"], row["finished"]) == ("vs AI", 0, 1, 1)
+        assert writer.dropped == 0 and writer.error is None
+    finally:
+        writer.close()
@@ -0,0 +1,57 @@
+from array import array
+
+import pytest
+
+from netcode import (
+    QUANT, SnapshotEncoder, SnapshotDecoder, encode_state, write_varint, read_varint, encode_delta, decode_delta,
+)
+from simulation import init_game
+from snapshots import state_size
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 63, -64, 64, -65, 8191, -8192, 1 << 20, -(1 << 20), 1 << 40, -(1 << 40)])
+def test_varint_round_trip(value):
+    out = bytearray()
+    write_varint(out, value)
+    decoded, pos = read_varint(out, 0)
+    assert decoded == value
+    assert pos == len(out)
+
+def test_zigzag_keeps_small_negatives_short():
+    for value in (-1, -63, 63):
+        out = bytearray()
+        write_varint(out, value)
+        assert len(out) == 1
+
+def test_delta_only_sends_changed_slots():
+    base = [0, 5, -7, 100, 3]
+    values = [0, 6, -7, -100, 3]
+    payload = encode_delta(42, base, values)
+    state = list(base)
+    assert decode_delta(payload, state) == 42
+    assert state == values
+    # 4 字节帧号 + 1 字节位图 + 两个变化槽位
+    assert len(payload) < 4 + 1 + 2 * 3
+
+def test_unchanged_snapshot_has_empty_body():
+    values = list(range(20))
+    payload = encode_delta(1, values, list(values))
+    assert payload[4:] == bytes(3)
+
+def test_encoder_decoder_track_state():
+    server = init_game()
+    client = init_game()
+    n = len(server['players'])
+    buf = array("d", bytes(8 * state_size(n)))
+    encoder, decoder = SnapshotEncoder(n), SnapshotDecoder(n)
+    for tick in range(1, 6):
+        server['ball']["x"] += 13.37
+        server['ball']["vy"] = -2.5 * tick
+        server['players'][tick % n]["y"] -= 7.1
+        server['score']["player2"] = tick // 3
+        assert decoder.apply(encoder.encode(tick, encode_state(server, buf)), client) == tick
+        for a, b in zip(server['players'] + [server['ball']], client['players'] + [client['ball']]):
+            for k in ("x", "y"):
+                assert abs(a[k] - b[k]) <= 0.5 / QUANT
+        assert client['ball']["vy"] == server['ball']["vy"]
+        assert client['score'] == server['score']
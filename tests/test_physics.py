@@ -0,0 +1,109 @@
+import copy
+import math
+import random
+
+import numpy as np
+
+from batch_physics import BatchSimulator, SCORED
+from simulation import (
+    HIT_DIST, SWEEP_SPEED, init_game, integrate_ball, move_ball, handle_collisions, step_ball, time_of_impact,
+)
+
+
+def lone_player_state(ball, player=(400.0, 200.0)):
+    # 只有 1 队 0 号球员在球路附近，其余球员排在下边线附近
+    gs = init_game()
+    for i, p in enumerate(gs['players']):
+        p["x"], p["y"] = 100.0 + 110 * i, 500.0
+    gs['players'][0]["x"], gs['players'][0]["y"] = player
+    gs['ball'].update(ball)
+    gs['game_state'] = "moving"
+    return gs
+
+def test_time_of_impact_touches_at_hit_distance():
+    gs = lone_player_state({"x": 300.0, "y": 210.0, "vx": 20.0, "vy": 0.0})
+    t, event, target = time_of_impact(gs['ball'], gs['players'], 10.0)
+    assert event == "player" and target is gs['players'][0]
+    x = gs['ball']["x"] + gs['ball']["vx"] * t
+    assert math.isclose(math.hypot(x - 400.0, 210.0 - 200.0), HIT_DIST, rel_tol=1e-9)
+
+def test_sweep_catches_what_one_discrete_step_tunnels_through():
+    # 球擦过球员：一帧的位移大于相交区间的宽度，离散步进两帧都落在碰撞距离之外
+    offset = 36.5
+    half_chord = math.sqrt(HIT_DIST ** 2 - offset ** 2)
+    ball = {"x": 400.0 - half_chord - 1.0, "y": 200.0 + offset, "vx": 22.5, "vy": 0.0}
+
+    discrete = lone_player_state(ball)
+    move_ball(discrete)
+    handle_collisions(discrete)
+    assert discrete['ball']["vy"] == 0.0
+
+    swept = lone_player_state(ball)
+    step_ball(swept)
+    # 细分子步的离散积分作为参照：每个子步位移不超过 SWEEP_SPEED，走离散路径
+    fine = lone_player_state(ball)
+    for _ in range(16):
+        integrate_ball(fine, 1.0 / 16)
+    assert swept['ball']["vy"] > 0 and fine['ball']["vy"] > 0
+    a = math.atan2(swept['ball']["vy"], swept['ball']["vx"])
+    b = math.atan2(fine['ball']["vy"], fine['ball']["vx"])
+    assert abs(a - b) < 0.15
+
+def test_slow_ball_uses_discrete_step():
+    ball = {"x": 300.0, "y": 150.0, "vx": SWEEP_SPEED * 0.6, "vy": -SWEEP_SPEED * 0.6}
+    swept = lone_player_state(ball)
+    discrete = lone_player_state(ball)
+    for _ in range(30):
+        step_ball(swept)
+        move_ball(discrete)
+        handle_collisions(discrete)
+        discrete_ball = discrete['ball']
+        if not (62 <= discrete_ball["x"] <= 738 and 62 <= discrete_ball["y"] <= 538):
+            break
+    assert swept['ball'] == discrete['ball']
+
+def test_slow_shot_passes_through_kicker():
+    ball = {"x": 430.0, "y": 200.0, "vx": -3.0, "vy": 0.0}
+    bounced = lone_player_state(ball)
+    step_ball(bounced)
+    assert bounced['ball']["vx"] > 0
+    kicked = lone_player_state(ball)
+    kicked['kicker'] = (1, 0)
+    step_ball(kicked)
+    assert kicked['ball']["vx"] < 0
+
+def test_batch_matches_scalar_step():
+    rng = random.Random(1)
+    n = 120
+    base = init_game()
+    batch = BatchSimulator(n, base)
+    states = []
+    for i in range(n):
+        gs = copy.deepcopy(base)
+        angle, power = rng.uniform(-math.pi, math.pi), rng.uniform(0.2, 15)
+        gs['ball'].update({"x": rng.uniform(120, 680), "y": rng.uniform(80, 520),
+                           "vx": math.cos(angle) * power * 1.5, "vy": math.sin(angle) * power * 1.5})
+        gs['game_state'] = "moving"
+        if i % 2:
+            team, idx = rng.randint(1, 2), rng.randint(0, 2)
+            p = (gs['players1'] if team == 1 else gs['players2'])[idx]
+            gs['ball']["x"], gs['ball']["y"] = p["x"] + 20, p["y"]
+            gs['kicker'] = (team, idx)
+        batch.load_state(gs, i)
+        states.append(gs)
+    for _ in range(400):
+        batch.step()
+        for i, gs in enumerate(states):
+            if gs['game_state'] != "moving":
+                continue
+            stopped, scored = step_ball(gs)
+            if not scored and stopped:
+                gs['game_state'] = "aiming"
+            # math.hypot 与 np.hypot 末位可能不同，允许极小偏差
+            assert abs(gs['ball']["x"] - batch.ball_x[i]) < 1e-6
+            assert abs(gs['ball']["y"] - batch.ball_y[i]) < 1e-6
+    for i, gs in enumerate(states):
+        assert (gs['game_state'] == "scored") == (batch.status[i] == SCORED)
+        if gs['game_state'] == "scored":
+            assert gs['winner'] == batch.winner[i]
+    assert np.count_nonzero(batch.status == SCORED) > 0
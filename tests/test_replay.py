@@ -0,0 +1,81 @@
+import bisect
+
+import pytest
+
+from ai_planner import ShotPlanner
+from replay import RecordingSimulator, ReplayPlayer, ReplayReader, pack_state, unpack_state, run_headless
+from snapshots import snapshot, state_hash
+
+STEPS = 2000
+INTERVAL = 64
+
+
+def record(path, **kw):
+    rec = RecordingSimulator(str(path), "ai_vs_ai", seed=11, keyframe_interval=INTERVAL, **kw)
+    while rec.frames < STEPS:
+        if rec.step() == "scored":
+            rec.continue_after_goal()
+    rec.close()
+    return rec
+
+@pytest.fixture(scope="module")
+def replay(tmp_path_factory):
+    path = tmp_path_factory.mktemp("replay") / "match.scr"
+    rec = record(path)
+    reader = ReplayReader(str(path))
+    # 顺序重演时每一帧的局面，作为 seek 和关键帧的参照
+    player = ReplayPlayer(reader)
+    states = [snapshot(player.sim.state)]
+    while player.advance(1):
+        states.append(snapshot(player.sim.state))
+    yield path, reader, rec, states, player
+    reader.close()
+
+def test_headless_run_matches_recording(replay):
+    path, reader, rec, states, player = replay
+    assert len(reader.chunks) > 3
+    assert player.desyncs == 0
+    assert reader.total_steps == rec.frames == len(states) - 1
+    assert snapshot(player.sim.state) == snapshot(rec.state)
+    assert run_headless(str(path))["hash"] == state_hash(rec.state)
+
+def test_seek_around_chunk_boundaries(replay):
+    path, reader, rec, states, _ = replay
+    targets = {0, 1, reader.total_steps}
+    for step in reader.chunk_steps:
+        targets.update(s for s in (step - 1, step, step + 1) if 0 <= s <= reader.total_steps)
+    player = ReplayPlayer(reader)
+    for step in sorted(targets, reverse=True):
+        player.seek(step)
+        assert player.step_index == step
+        assert snapshot(player.sim.state) == states[step], step
+
+def test_keyframes_restore_chunk_start(replay):
+    path, reader, rec, states, _ = replay
+    for c, step in enumerate(reader.chunk_steps):
+        sim = reader.new_simulator()
+        unpack_state(sim, reader.keyframe(c))
+        assert snapshot(sim.state) == states[step]
+        assert sim.frames == step
+        assert bisect.bisect_right(reader.chunk_steps, step) - 1 == c
+
+def test_rewind_matches_seek(replay):
+    path, reader, rec, states, _ = replay
+    player = ReplayPlayer(reader, rewind=200)
+    player.advance(500)
+    for back in range(1, 201):
+        assert player.step_back()
+        assert player.step_index == 500 - back
+        assert snapshot(player.sim.state) == states[500 - back]
+    assert not player.step_back()
+    player.advance(10)
+    assert snapshot(player.sim.state) == states[310]
+
+def test_sliced_planner_replays_without_desync(tmp_path):
+    planner = ShotPlanner("easy", frame_budget=0.001)
+    rec = record(tmp_path / "planned.scr", planner=planner)
+    result = run_headless(str(tmp_path / "planned.scr"))
+    assert result["desyncs"] == 0
+    assert result["steps"] == rec.frames
+    assert result["hash"] == state_hash(rec.state)
+    assert planner.turns > 0
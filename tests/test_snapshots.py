@@ -0,0 +1,63 @@
+import pytest
+
+from practice import init_practice
+from simulation import init_game
+from snapshots import StateRing, snapshot, state_hash, unpack_from
+
+
+def moved_state():
+    gs = init_game()
+    gs['ball'].update({"x": 321.5, "y": 123.25, "vx": -4.0, "vy": 2.5})
+    gs['players'][4]["x"] -= 50
+    gs['players'][1]["active"] = False
+    gs['game_state'] = "moving"
+    gs['kicker'] = (2, 1)
+    gs['score']["player1"] = 3
+    gs['shot_power'] = 7.5
+    return gs
+
+def test_round_trip_keeps_dict_identity():
+    src = moved_state()
+    dst = init_game()
+    players = dst['players']
+    unpack_from(dst, snapshot(src))
+    assert dst['players'] is players and dst['players1'][0] is players[0]
+    assert snapshot(dst) == snapshot(src)
+    assert dst['kicker'] == (2, 1)
+    assert dst['game_state'] == "moving"
+
+def test_round_trip_multi_ball():
+    src = init_practice(11, 3)
+    for k, ball in enumerate(src['balls']):
+        ball.update({"x": 100.0 + k, "y": 200.0 + k, "vx": k * 1.5, "vy": -k})
+    src['ball'] = src['balls'][2]
+    dst = init_practice(11, 3)
+    unpack_from(dst, snapshot(src))
+    assert [dict(b) for b in dst['balls']] == [dict(b) for b in src['balls']]
+    assert dst['ball'] is dst['balls'][2]
+    assert state_hash(dst) == state_hash(src)
+
+def test_state_hash_changes_with_state():
+    a, b = init_game(), init_game()
+    assert state_hash(a) == state_hash(b)
+    b['ball']["x"] += 1e-9
+    assert state_hash(a) != state_hash(b)
+
+def test_ring_restore_and_overwrite():
+    ring = StateRing(3)
+    gs = init_game()
+    hashes = []
+    for frame in range(5):
+        gs['ball']["x"] = 100.0 + frame
+        ring.push(gs, frame)
+        hashes.append(state_hash(gs))
+    assert ring.count == 3
+    assert ring.hash(0) == hashes[4]
+    out = init_game()
+    assert ring.restore(out, 2) == 2
+    assert out['ball']["x"] == 102.0
+    with pytest.raises(IndexError):
+        ring.slot(3)
+    assert ring.pop(out) == 4
+    assert ring.restore(out) == 3
+    assert state_hash(out) == hashes[3]
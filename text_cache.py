@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+# 文字渲染缓存：相同 (字体, 文本, 颜色, 抗锯齿) 直接复用已光栅化的 Surface
+# 返回的 Surface 是共享的，调用方只能 blit，不能在上面继续绘制
+
+
+class TextCache:
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, tuple(color), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._surfaces),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+text_cache = TextCache()
+
+def render_text(font, text, antialias, color):
+    # 参数顺序与 Font.render 相同
+    return text_cache.render(font, text, antialias, color)
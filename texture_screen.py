@@ -0,0 +1,106 @@
+import weakref
+
+import pygame
+
+# 纹理渲染后端：基于 pygame._sdl2.video 的 Renderer/Texture
+# TextureScreen 模仿 Surface.blit 的接口，原有绘制函数不用改就能画上来：
+# 每个 Surface 第一次被 blit 时上传成纹理（按对象缓存，Surface 被回收时纹理一起释放），之后每帧只是纹理拷贝
+# 约定与 text_cache 相同：传进来的 Surface 上传后不能再原地修改
+# 没有 GPU 时 SDL 自动用软件渲染器，批量纹理拷贝仍比逐个图元光栅化快
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture
+except ImportError:
+    Window = Renderer = Texture = None
+
+BLEND_NONE = 0
+BLEND_ALPHA = 1
+BLEND_ADD = 2
+ADD_FLAGS = (pygame.BLEND_ADD, pygame.BLEND_RGBA_ADD)
+
+def available():
+    return Renderer is not None
+
+
+class TextureScreen:
+    def __init__(self, size, title="", accelerated=-1, vsync=False):
+        if Renderer is None:
+            raise pygame.error("pygame._sdl2.video is not available")
+        self.window = Window(title, size)
+        # accelerated=-1：有硬件渲染器就用，没有就退回 SDL 的软件渲染器
+        self.renderer = Renderer(self.window, accelerated=accelerated, vsync=vsync)
+        self.size = tuple(size)
+        self.textures = weakref.WeakKeyDictionary()
+        # 加法混合的 Surface 另存一份：Surface 的 BLEND_RGBA_ADD 不按透明度加权，SDL 的 ADD 会，先把透明度烘进颜色
+        self.additive = weakref.WeakKeyDictionary()
+        self.uploads = 0
+        self.copies = 0
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self):
+        return pygame.Rect((0, 0), self.size)
+
+    def texture(self, surf, additive=False):
+        cache = self.additive if additive else self.textures
+        tex = cache.get(surf)
+        if tex is None:
+            src = surf
+            if additive:
+                src = pygame.Surface(surf.get_size())
+                src.blit(surf, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            tex = Texture.from_surface(self.renderer, src)
+            # 不带透明度的 Surface（背景等）直接覆盖，软件渲染器下比逐像素混合快一个数量级
+            if additive:
+                tex.blend_mode = BLEND_ADD
+            else:
+                tex.blend_mode = BLEND_ALPHA if surf.get_flags() & pygame.SRCALPHA else BLEND_NONE
+            cache[surf] = tex
+            self.uploads += 1
+        return tex
+
+    def blit(self, surf, dest, area=None, special_flags=0):
+        tex = self.texture(surf, special_flags in ADD_FLAGS)
+        x, y = dest[0], dest[1]
+        if area is not None:
+            area = pygame.Rect(area)
+            rect = pygame.Rect(x, y, area.w, area.h)
+            tex.draw(srcrect=area, dstrect=rect)
+        else:
+            rect = pygame.Rect(x, y, tex.width, tex.height)
+            tex.draw(dstrect=rect)
+        self.copies += 1
+        return rect
+
+    def shade(self, rgba, rect=None):
+        # 半透明遮罩：带混合的矩形填充，不需要为遮罩分配 Surface 或纹理
+        # （SDL 软件渲染器里按颜色调制的拉伸纹理拷贝反而慢三倍，这里不用）
+        self.renderer.draw_blend_mode = BLEND_ALPHA
+        self.renderer.draw_color = tuple(rgba[:3]) + ((rgba[3] if len(rgba) > 3 else 255),)
+        self.renderer.fill_rect(pygame.Rect(rect) if rect is not None else pygame.Rect((0, 0), self.size))
+        self.copies += 1
+
+    def draw_line(self, color, start, end, width=1):
+        self.renderer.draw_color = tuple(color[:3]) + (255,)
+        for k in range(width):
+            self.renderer.draw_line((start[0], start[1] + k), (end[0], end[1] + k))
+        return pygame.Rect(start, (0, 0)).union(pygame.Rect(end, (0, 0)))
+
+    def clear(self, color=(0, 0, 0)):
+        self.renderer.draw_color = tuple(color[:3]) + (255,)
+        self.renderer.clear()
+
+    def present(self):
+        self.renderer.present()
+
+    def to_surface(self):
+        return self.renderer.to_surface()
+
+    def stats(self):
+        return {"textures": len(self.textures) + len(self.additive), "uploads": self.uploads, "copies": self.copies}
@@ -0,0 +1,237 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+from analytics import MatchAnalytics
+from simulation import WIDTH, HEIGHT, MAX_SHOT_POWER, Simulator, approach_point, encode_plan, end_turn
+
+# AI 自对弈联赛：无窗口、不限帧率地跑 AI 对 AI 比赛，分到进程池里并行；
+# 每场结果逐行写入 JSON Lines 文件，全部跑完后按比赛序号依次更新 Elo 并打印积分榜
+# 一场比赛：先进 goals 球者胜，max_turns 回合后未分胜负算平局。1 队先开球，所以每对 AI 主客场轮换
+DEFAULT_GOALS = 3
+DEFAULT_MAX_TURNS = 60
+ELO_START = 1500.0
+ELO_K = 16.0
+
+
+class GreedyAI:
+    # 原有 AI：就近球员走到球边，朝球门随机一点射门（ai_choose_player_and_move + ai_charge_and_shoot）
+    def __init__(self, seed):
+        pass
+
+    def plan(self, game_state, team_idx):
+        # 返回 None 让 Simulator 走原来的就近球员射门
+        return None
+
+
+class AimedAI:
+    # 不推演：离站位点最近的球员直接全力射向球门中间
+    def __init__(self, seed):
+        pass
+
+    def plan(self, game_state, team_idx):
+        ball = game_state['ball']
+        goal_x = WIDTH - 30 if team_idx == 1 else 30
+        angle = math.atan2(HEIGHT / 2 - ball["y"], goal_x - ball["x"])
+        return encode_plan(nearest_shooter(game_state, team_idx, ball, angle), angle, MAX_SHOT_POWER)
+
+
+class RandomAI:
+    # 基准线：随机方向、随机力量
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def plan(self, game_state, team_idx):
+        ball = game_state['ball']
+        angle = self.rng.uniform(-math.pi, math.pi)
+        return encode_plan(nearest_shooter(game_state, team_idx, ball, angle), angle,
+                           self.rng.uniform(5, MAX_SHOT_POWER))
+
+
+class PlannerAI:
+    # ai_planner 的推演规划器，单进程（外层已经按比赛并行）
+    def __init__(self, seed, difficulty):
+        from ai_planner import ShotPlanner
+        self.planner = ShotPlanner(difficulty, workers=0, seed=seed)
+
+    def plan(self, game_state, team_idx):
+        return self.planner.plan(game_state, team_idx)
+
+
+VARIANTS = {
+    "greedy": GreedyAI,
+    "aimed": AimedAI,
+    "random": RandomAI,
+    "planner-easy": lambda seed: PlannerAI(seed, "easy"),
+    "planner-normal": lambda seed: PlannerAI(seed, "normal"),
+    "planner-hard": lambda seed: PlannerAI(seed, "hard"),
+}
+DEFAULT_VARIANTS = ("greedy", "aimed", "random")
+
+def nearest_shooter(game_state, team_idx, ball, angle):
+    team = game_state['players1'] if team_idx == 1 else game_state['players2']
+    tx, ty = approach_point(ball, angle)
+    return min(range(len(team)), key=lambda i: math.hypot(team[i]["x"] - tx, team[i]["y"] - ty))
+
+
+class TeamPlanners:
+    # Simulator 只认一个规划器：按当前回合的队伍转给各自的 AI
+    def __init__(self, ai1, ai2):
+        self.ais = {1: ai1, 2: ai2}
+
+    def plan(self, game_state, team_idx):
+        return self.ais[team_idx].plan(game_state, team_idx)
+
+
+def play_match(job, analytics=None):
+    # 在工作进程里跑一场，返回结果 dict；同一 (种子, 双方 AI) 下 greedy/aimed/random 的比赛可复现
+    match_id, seed, home, away, goals, max_turns = job
+    start = time.perf_counter()
+    sim = Simulator("ai_vs_ai", seed, planner=TeamPlanners(VARIANTS[home](seed * 2), VARIANTS[away](seed * 2 + 1)),
+                    analytics=analytics)
+    gs = sim.state
+    score = gs['score']
+    shots = {1: 0, 2: 0}
+    stalls = 0
+    turns = 0
+    while turns < max_turns and max(score["player1"], score["player2"]) < goals:
+        team = gs['current_player']
+        before = sim.turns
+        sim.play_turn()
+        turns += 1
+        if sim.turns > before:
+            shots[team] += 1
+        elif gs['game_state'] == "aiming" and gs['current_player'] == team:
+            # AI 一直没出脚（例如够不着球）：判这一回合作废，换对方
+            stalls += 1
+            sim.plan = None
+            end_turn(gs)
+    if analytics is not None:
+        analytics.match_end()
+    return {
+        "match": match_id,
+        "seed": seed,
+        "home": home,
+        "away": away,
+        "score": [score["player1"], score["player2"]],
+        "turns": turns,
+        "shots": [shots[1], shots[2]],
+        "stalls": stalls,
+        "frames": sim.frames,
+        "seconds": time.perf_counter() - start,
+    }
+
+def play_batch(args):
+    # 一批比赛在同一进程里跑完再整体返回；统计数组每批只回传一次
+    jobs, with_analytics = args
+    analytics = MatchAnalytics() if with_analytics else None
+    return [play_match(job, analytics) for job in jobs], analytics
+
+def schedule(variants, matches, seed):
+    # 所有有序对（含主客场）循环排满 matches 场
+    pairs = list(itertools.permutations(variants, 2))
+    for i in range(matches):
+        home, away = pairs[i % len(pairs)]
+        yield i, seed * 1000003 + i, home, away
+
+
+class Standings:
+    def __init__(self, variants):
+        self.rows = {v: {"elo": ELO_START, "played": 0, "won": 0, "drawn": 0, "lost": 0, "gf": 0, "ga": 0}
+                     for v in variants}
+
+    def add(self, result):
+        a, b = self.rows[result["home"]], self.rows[result["away"]]
+        ga, gb = result["score"]
+        actual = 1.0 if ga > gb else 0.5 if ga == gb else 0.0
+        expected = 1.0 / (1.0 + 10 ** ((b["elo"] - a["elo"]) / 400))
+        delta = ELO_K * (actual - expected)
+        a["elo"] += delta
+        b["elo"] -= delta
+        for row, gf, gag, s in ((a, ga, gb, actual), (b, gb, ga, 1.0 - actual)):
+            row["played"] += 1
+            row["gf"] += gf
+            row["ga"] += gag
+            row["won" if s == 1.0 else "drawn" if s == 0.5 else "lost"] += 1
+
+    def table(self):
+        return sorted(self.rows.items(), key=lambda item: item[1]["elo"], reverse=True)
+
+    def report(self):
+        lines = [f"{'#':>2} {'ai':16s} {'elo':>7} {'P':>6} {'W':>6} {'D':>6} {'L':>6} {'GF':>6} {'GA':>6}"]
+        for rank, (name, r) in enumerate(self.table(), 1):
+            lines.append(f"{rank:2d} {name:16s} {r['elo']:7.1f} {r['played']:6d} {r['won']:6d} {r['drawn']:6d} "
+                         f"{r['lost']:6d} {r['gf']:6d} {r['ga']:6d}")
+        return "\n".join(lines)
+
+
+def run_tournament(variants, matches, seed=0, goals=DEFAULT_GOALS, max_turns=DEFAULT_MAX_TURNS,
+                   workers=None, out=None, progress=True, analytics=None):
+    jobs = [job + (goals, max_turns) for job in schedule(variants, matches, seed)]
+    workers = workers or os.cpu_count() or 1
+    # 每批几十场，减少进程间往返；结果按批完成的顺序流式写出
+    size = max(1, min(64, matches // (workers * 8)))
+    batches = [(jobs[i:i + size], analytics is not None) for i in range(0, matches, size)]
+    results = [None] * matches
+    start = time.perf_counter()
+    done = 0
+    f = open(out, "w") if out else None
+    try:
+        with Pool(workers) as pool:
+            for batch, stats in pool.imap_unordered(play_batch, batches):
+                if stats is not None:
+                    analytics.merge(stats)
+                for result in batch:
+                    results[result["match"]] = result
+                    if f is not None:
+                        f.write(json.dumps(result) + "\n")
+                done += len(batch)
+                if progress and (done // 500 > (done - len(batch)) // 500 or done == matches):
+                    elapsed = time.perf_counter() - start
+                    print(f"{done}/{matches} matches  {elapsed:.1f}s  {done / elapsed:.0f} matches/s",
+                          file=sys.stderr)
+    finally:
+        if f is not None:
+            f.close()
+    # Elo 与完成顺序无关：按比赛序号依次结算
+    standings = Standings(variants)
+    for result in results:
+        standings.add(result)
+    return standings, results, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless AI-vs-AI tournament with Elo standings")
+    parser.add_argument("--variants", default=",".join(DEFAULT_VARIANTS),
+                        help="comma-separated AI variants: " + ", ".join(VARIANTS))
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--goals", type=int, default=DEFAULT_GOALS, help="goals needed to win a match")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="turns before a match is a draw")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", default="tournament.jsonl", help="per-match results, one JSON object per line")
+    parser.add_argument("--analytics", metavar="PATH", help="also collect match analytics into this .npz file")
+    args = parser.parse_args(argv)
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown or len(set(variants)) < 2:
+        parser.error("need at least two distinct variants from: " + ", ".join(VARIANTS))
+    analytics = MatchAnalytics() if args.analytics else None
+    standings, results, seconds = run_tournament(list(dict.fromkeys(variants)), args.matches, args.seed,
+                                                 args.goals, args.max_turns, args.workers, args.out,
+                                                 analytics=analytics)
+    if analytics is not None:
+        analytics.save(args.analytics)
+        print(analytics.summary())
+    turns = sum(r["turns"] for r in results)
+    print(f"{len(results)} matches, {turns} turns in {seconds:.1f}s  ->  {args.out}")
+    print(standings.report())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
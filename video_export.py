@@ -0,0 +1,234 @@
+import argparse
+import os
+import queue
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import time
+import zlib
+
+# 比赛导出成视频帧：离屏用游戏自己的绘制函数逐帧画出，缩放到指定分辨率，
+# 交给工作线程编码成编号 PNG，或按顺序写成原始 RGB24 流（文件 / 标准输出 / 管道给本地编码器）
+# 队列有上限，渲染比编码快时主线程会等，长比赛内存也不涨。无显示环境下用 SDL dummy 驱动
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+import game
+from replay import ReplayReader, ReplayPlayer
+from simulation import TICK_RATE, Simulator
+
+SIM_FPS = TICK_RATE
+# 无头 AI 比赛进球后定格的秒数（回放里的停顿按录制时的原样）
+GOAL_HOLD = 1.5
+# 无头比赛的总帧数上限：AI 够不着球或球卡住来回弹时也能结束
+MAX_TURN_FRAMES = 2000
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_FILTER_UP = 2
+
+def png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+def encode_png(rgb, width, height, level=3):
+    # 不经过 pygame：NumPy 做行间滤波、zlib 压缩，两者都释放 GIL，多个线程能真正并行
+    # 每行都用 Up 滤波（减去上一行），底图是照片时比不滤波小约 1/6
+    stride = width * 3
+    rows = np.frombuffer(rgb, np.uint8).reshape(height, stride)
+    raw = np.empty((height, stride + 1), np.uint8)
+    raw[:, 0] = PNG_FILTER_UP
+    raw[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=raw[1:, 1:])
+    return (PNG_SIGNATURE + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+            png_chunk(b"IDAT", zlib.compress(raw, level)) + png_chunk(b"IEND", b""))
+
+
+class FrameEncoder:
+    # submit() 在满队列时阻塞；PNG 模式多线程乱序写各自的文件，流模式单线程按帧序写
+    def __init__(self, width, height, out_dir=None, stream=None, workers=4, queue_size=None, level=3):
+        self.width = width
+        self.height = height
+        self.out_dir = out_dir
+        self.stream = stream
+        self.level = level
+        if stream is not None:
+            workers = 1
+        self.queue = queue.Queue(queue_size or workers * 2)
+        self.error = None
+        self.frames = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        self.threads = [threading.Thread(target=self._work, name=f"video-encoder-{i}", daemon=True)
+                        for i in range(max(1, workers))]
+        for t in self.threads:
+            t.start()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            index, rgb = item
+            try:
+                if self.stream is not None:
+                    self.stream.write(rgb)
+                    size = len(rgb)
+                else:
+                    data = encode_png(rgb, self.width, self.height, self.level)
+                    with open(os.path.join(self.out_dir, "frame_%06d.png" % index), "wb") as f:
+                        f.write(data)
+                    size = len(data)
+            except Exception as e:
+                # 写失败（例如编码器退出）后丢弃剩余帧，由 submit 抛给主线程
+                self.error = self.error or e
+                continue
+            with self.lock:
+                self.frames += 1
+                self.bytes += size
+
+    def submit(self, index, rgb):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((index, rgb))
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join()
+        if self.stream is not None:
+            self.stream.flush()
+        if self.error is not None:
+            raise self.error
+
+
+def replay_frames(path):
+    # 录制的比赛（正常对局都会写 last_replay.scr）：按录制的 60 帧/秒逐帧推进
+    reader = ReplayReader(path)
+    player = ReplayPlayer(reader)
+    try:
+        yield player.sim.state
+        while player.advance(1):
+            yield player.sim.state
+    finally:
+        reader.close()
+
+def ai_frames(seed, goals, max_turns):
+    # 无头 AI 对 AI：与联赛同样的规则，先进 goals 球或打满 max_turns 回合结束
+    sim = Simulator("ai_vs_ai", seed)
+    gs = sim.state
+    hold = 0
+    yield gs
+    while (max(gs['score'].values()) < goals and sim.turns < max_turns
+           and sim.frames < max_turns * MAX_TURN_FRAMES):
+        if gs['game_state'] == "scored":
+            hold += 1
+            if hold >= GOAL_HOLD * SIM_FPS:
+                hold = 0
+                sim.continue_after_goal()
+        else:
+            sim.step()
+        yield gs
+    # 最后一球的定格
+    for _ in range(int(GOAL_HOLD * SIM_FPS)):
+        yield gs
+
+def draw_scene(surface, background, game_state):
+    surface.blit(background, (0, 0))
+    game.draw_players(surface, game_state)
+    game.draw_ui(surface, game_state)
+    if game_state['game_state'] == "scored":
+        game.draw_goal_overlay(surface, game_state, prompt=None)
+
+def export(states, encoder, fps, size, progress=True):
+    # states 每项为一帧模拟（60 帧/秒）后的局面；按输出帧率抽帧，只画要输出的帧
+    game.init_display()
+    canvas = pygame.Surface((game.PANEL_WIDTH, game.PANEL_HEIGHT)).convert()
+    scaled = pygame.Surface(size).convert() if size != canvas.get_size() else None
+    background = game.get_background(game.field_image())
+    step = SIM_FPS / fps
+    next_frame = 0.0
+    index = 0
+    start = time.perf_counter()
+    for sim_frame, state in enumerate(states):
+        if sim_frame < next_frame:
+            continue
+        next_frame += step
+        draw_scene(canvas, background, state)
+        out = canvas
+        if scaled is not None:
+            pygame.transform.smoothscale(canvas, size, scaled)
+            out = scaled
+        encoder.submit(index, pygame.image.tobytes(out, "RGB"))
+        index += 1
+        if progress and index % (fps * 10) == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{index} frames  {index / fps:.0f}s of video  {index / elapsed:.0f} fps", file=sys.stderr)
+    encoder.close()
+    return index, time.perf_counter() - start
+
+def parse_size(text):
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a match offscreen to PNG frames or a raw RGB24 stream")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", metavar="FILE", help="recorded match (default: last_replay.scr)")
+    source.add_argument("--seed", type=int, help="play a headless AI-vs-AI match with this seed instead")
+    parser.add_argument("--goals", type=int, default=3, help="AI match: goals needed to win")
+    parser.add_argument("--max-turns", type=int, default=60, help="AI match: turn limit")
+    parser.add_argument("--size", type=parse_size, default=(game.PANEL_WIDTH, game.PANEL_HEIGHT), help="WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=int, default=30)
+    sink = parser.add_mutually_exclusive_group()
+    sink.add_argument("--png", metavar="DIR", help="write numbered PNG frames (default: video_frames)")
+    sink.add_argument("--raw", metavar="FILE", help="write a raw RGB24 stream to FILE, or - for stdout")
+    sink.add_argument("--pipe", metavar="COMMAND",
+                      help="pipe the raw RGB24 stream into COMMAND; {w} {h} {fps} are substituted, e.g. "
+                           "'ffmpeg -f rawvideo -pix_fmt rgb24 -s {w}x{h} -r {fps} -i - match.mp4'")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="PNG encoder threads")
+    parser.add_argument("--level", type=int, default=3, help="PNG compression level (0-9)")
+    args = parser.parse_args(argv)
+    if not 1 <= args.fps <= SIM_FPS:
+        parser.error(f"--fps must be between 1 and {SIM_FPS}")
+
+    if args.seed is not None:
+        states = ai_frames(args.seed, args.goals, args.max_turns)
+    else:
+        path = args.replay or game.replay_file
+        try:
+            ReplayReader(path).close()
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read replay {path}: {e}")
+        states = replay_frames(path)
+
+    w, h = args.size
+    proc = None
+    if args.pipe:
+        proc = subprocess.Popen(shlex.split(args.pipe.format(w=w, h=h, fps=args.fps)), stdin=subprocess.PIPE)
+        encoder = FrameEncoder(w, h, stream=proc.stdin)
+    elif args.raw:
+        stream = sys.stdout.buffer if args.raw == "-" else open(args.raw, "wb")
+        encoder = FrameEncoder(w, h, stream=stream)
+    else:
+        encoder = FrameEncoder(w, h, out_dir=args.png or "video_frames", workers=args.workers, level=args.level)
+    try:
+        frames, seconds = export(states, encoder, args.fps, args.size)
+    finally:
+        if proc is not None:
+            proc.stdin.close()
+            proc.wait()
+        elif args.raw and args.raw != "-":
+            encoder.stream.close()
+    video = frames / args.fps
+    print(f"{frames} frames ({video:.1f}s of video at {w}x{h}, {args.fps} fps) in {seconds:.1f}s, "
+          f"{video / seconds if seconds else 0:.1f}x real time, {encoder.bytes / 1e6:.1f} MB", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())